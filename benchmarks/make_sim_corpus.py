@@ -0,0 +1,121 @@
+# benchmarks/make_sim_corpus.py
+"""
+生成 vision_bench 使用的模拟器语料（benchmarks/corpus_sim/）
+每一帧把模拟器摆到下面 FRAMES 中写明的状态后整屏渲染，标注是按画面内容手工写出的期望值，
+不调用被测的识别代码。背景为纯色以控制截图体积；文字是色块标签，需配合模拟 OCR 运行：
+    python -m benchmarks.vision_bench --corpus benchmarks/corpus_sim --simulated-ocr
+
+该语料只覆盖区域换算、模板匹配、OCR 结果解析与文字匹配等流程，不代表实机画面上 PaddleOCR 的准确率；
+实机语料仍需在游戏机器上用 vision_bench record 录制并人工标注。
+
+用法: python -m benchmarks.make_sim_corpus [--output DIR]
+"""
+import argparse
+import json
+import os
+
+from loguru import logger
+
+from utils import clock, layout
+from utils.lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+
+SIM_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus_sim")
+GAME_MINUTES = 20
+
+# 各帧的模拟器状态与期望值；未写出的文字场景期望为 False，物品期望由 items 推出
+FRAMES = [
+    {"file": "lobby_001.png", "screen": "lobby", "state": {},
+     "expect": {"text:开始游戏": True, "run_time": None}},
+    {"file": "ingame_001.png", "screen": "ingame",
+     "state": {"seconds": 5 * 60, "store_open": True, "items": ["shengji", "jueze", None, "quanneng"]},
+     "expect": {"text:升级物品": True, "run_time": "05:00"}},
+    {"file": "ingame_002.png", "screen": "ingame",
+     "state": {"seconds": 12 * 60 + 34, "store_open": False, "items": ["shenhua"], "choice": "shengji"},
+     "expect": {"text:攻击速度": True, "run_time": "12:34"}},
+    {"file": "ingame_003.png", "screen": "ingame",
+     "state": {"seconds": 8 * 60 + 15, "store_open": True, "items": [],
+               "skill_panel": ["极速箭术", "月神箭", "暴击强化"]},
+     "expect": {"text:升级物品": True, "text:刷新": True, "run_time": "08:15",
+                "list:optional_skill": ["极速箭术", "月神箭", "暴击强化"]}},
+    {"file": "ingame_004.png", "screen": "ingame",
+     "state": {"seconds": 16 * 60 + 48, "store_open": False, "items": ["jueze", None, "shenhua"],
+               "choice": "shenhua"},
+     # 弹窗文字是“生命恢复”，不能当成“生命值”
+     "expect": {"run_time": "16:48"}},
+    {"file": "result_001.png", "screen": "result", "state": {"defeated": False},
+     "expect": {"text:收起": True, "run_time": f"{GAME_MINUTES:02d}:00"}},
+    {"file": "result_002.png", "screen": "result", "state": {"defeated": True},
+     "expect": {"text:收起": True, "text:失败": True, "run_time": f"{GAME_MINUTES:02d}:00"}},
+    {"file": "archive_001.png", "screen": "archive", "state": {"archive_done": True},
+     "expect": {"text:确定": True, "run_time": None, "list:archive_rewards": ["铜币", "二阶宝箱"]}},
+    {"file": "town_001.png", "screen": "town", "state": {"menu_open": True},
+     "expect": {"run_time": None}},
+]
+TEXT_KEYS = ("text:开始游戏", "text:升级物品", "text:收起", "text:失败", "text:刷新", "text:确定",
+             "text:攻击速度", "text:生命值")
+
+
+def _expectations(frame):
+    from game_components.item_manager import ITEM_TEMPLATES
+
+    expect = {key: False for key in TEXT_KEYS}
+    items = [name for name in frame["state"].get("items", []) if name is not None]
+    for name in ITEM_TEMPLATES:
+        expect[f"image:{name}"] = name in items
+    expect["images:item_bar_all"] = items
+    expect.update(frame["expect"])
+    return expect
+
+
+def _pose(game, screen, state):
+    """按 FRAMES 中的状态直接设置模拟器，不经过随机摆放"""
+    now = clock.now()
+    game._reset_round()
+    game.screen = screen
+    if screen == "ingame":
+        game.started_at = now - (state["seconds"] + 0.5) / game.speed
+        # 渲染期间不再发放物品、不重新打开商店
+        game.next_item = game.next_store_open = game.game_seconds_total
+        game.store_open = state["store_open"]
+        game.items = list(state["items"])
+        game.choice = state.get("choice")
+        game.skill_panel = state.get("skill_panel")
+    elif screen == "result":
+        game.ended_at = now
+        game.started_at = now - game.game_seconds_total / game.speed - 0.5
+        game.defeated = state["defeated"]
+    elif screen == "archive":
+        game.archive_started = now - (game.archive_seconds + 1) / game.speed
+    elif screen == "town":
+        game.menu_open = state["menu_open"]
+
+
+def generate(output_dir=SIM_CORPUS_DIR):
+    from simulator.game import SimulatedGame
+
+    os.makedirs(output_dir, exist_ok=True)
+    game = SimulatedGame(game_minutes=GAME_MINUTES, screen_layout=layout.configure((1920, 1080)), textured=False)
+    frames = []
+    for frame in FRAMES:
+        _pose(game, frame["screen"], frame["state"])
+        image = game.render()
+        cv2.imwrite(os.path.join(output_dir, frame["file"]), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        frames.append({"file": frame["file"], "screen": frame["screen"], "expect": _expectations(frame)})
+    # 色块颜色按文字首次出现的顺序编码，模拟 OCR 需按同一顺序还原编码表
+    labels = {"codec": game.codec.texts, "frames": frames}
+    with open(os.path.join(output_dir, "labels.json"), "w", encoding="utf-8") as f:
+        json.dump(labels, f, ensure_ascii=False, indent=2)
+    logger.info(f"已生成 {len(frames)} 帧模拟器语料: {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 vision_bench 的模拟器语料")
+    parser.add_argument("--output", default=SIM_CORPUS_DIR)
+    args = parser.parse_args()
+    generate(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/ocr_modes.py
+"""
+对比完整 OCR 流程（检测 + 方向分类 + 识别）与仅识别模式在实际按钮区域上的耗时
+用法: python -m benchmarks.ocr_modes <截图目录> [每个区域重复次数]
+截图为整屏游戏画面，区域按截图分辨率从界面布局换算
+"""
+import statistics
+import sys
+import time
+
+from loguru import logger
+
+from benchmarks.stats import percentile
+from utils import layout
+from utils.frame_source import FileFrameSource
+from utils.ocr_cache import OCRResultCache
+from utils.vision_processor import VisionProcess
+
+# 只包含单行水平文字的按钮区域（布局区域名）
+BUTTON_REGIONS = [
+    ("开始游戏", "common.start_game_button"),  # DifficultyPhase / RestartPhase
+    ("刷新", "runtime.refresh_button"),
+    ("确定", "archive.confirm_button"),
+]
+
+
+def run(frames_dir, repeat=20):
+    source = FileFrameSource(frames_dir, preload=True)
+    positions = layout.configure(source.bbox[2:])
+    # 关闭 OCR 缓存，保证每次调用都真正推理
+    vision = VisionProcess(frame_source=source, settle_delay=0, ocr_cache=OCRResultCache(max_entries=0))
+    frame_count = len(vision.frame_source.paths)
+    report = {}
+    vision.ocr  # 等待引擎就绪，避免把加载时间计入首个区域
+    try:
+        for text, region in BUTTON_REGIONS:
+            roi = positions.region(region)
+            for rec_only in (False, True):
+                latencies = []
+                hits = 0
+                for i in range(repeat * frame_count):
+                    with vision.snapshot():
+                        start = time.perf_counter()
+                        x, _, _ = vision.find_text(text, *roi, rec_only=rec_only)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    hits += x > 0
+                mode = "仅识别" if rec_only else "完整流程"
+                report[(text, mode)] = {
+                    "mean_ms": statistics.mean(latencies),
+                    "p50_ms": percentile(latencies, 0.5),
+                    "p95_ms": percentile(latencies, 0.95),
+                    "hits": hits,
+                    "calls": len(latencies),
+                }
+    finally:
+        vision.close()
+
+    for (text, mode), stats in report.items():
+        logger.info(f"{text:<6}{mode:<6} 平均 {stats['mean_ms']:7.1f} ms  p50 {stats['p50_ms']:7.1f} ms  "
+                    f"p95 {stats['p95_ms']:7.1f} ms  命中 {stats['hits']}/{stats['calls']}")
+    return report
+
+
+if __name__ == "__main__":
+    run(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,174 @@
+# benchmarks/screen_classifier.py
+"""
+画面分类器准确率与耗时测试
+标注样本来自两处：
+    1. 录制的整屏截图语料（与 vision_bench 共用 corpus/labels.json 的 screen 字段），按画面隔帧划分训练/测试集；
+    2. 模拟器按画面随机摆出的状态（--simulator N，每种画面 N 帧）：simulator 数据集的训练集与测试集
+       使用同一套背景、不同的随机状态，对应实机上画面美术不变的情况；simulator_new_art 的测试集
+       另换一套背景纹理，用来观察画面整体变化（如画质设置不同）时回退 OCR 的比例。
+报告整体准确率、覆盖率（置信度达标、无需回退 OCR 的比例）、各画面的正确/回退/错误数、混淆矩阵，
+以及特征提取与分类的 p50/p95 耗时。OCR 探测本身的耗时见 vision_bench 中 text:开始游戏 等场景。
+
+局限：仓库中没有实机截取的画面参考帧，语料目录为空时只有模拟器数据集。模拟器画面是纯色块与噪声纹理合成的，
+其结果（如 simulator 的 100% 准确率、simulator_new_art 约 67% 的覆盖率）只验证分类与回退机制，
+不代表实机画面上的准确率与覆盖率；实机数据需在游戏机器上录制并人工标注 screen 字段后再评估。
+
+用法:
+    python -m benchmarks.screen_classifier [--corpus DIR] [--simulator N] [--output report.json]
+    python -m benchmarks.screen_classifier fit [--corpus DIR]   # 用全部语料生成 images/screen_references.npz
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from loguru import logger
+
+from benchmarks.stats import percentile
+from benchmarks.vision_bench import CORPUS_DIR, load_labels
+from game_components.phase_dispatcher import Screen
+from utils import layout
+from utils.lazy_import import lazy_module
+from utils.screen_classifier import REFERENCE_PATH, ScreenClassifier, evaluate, extract_features
+
+cv2 = lazy_module("cv2")
+
+# 语料中沿用的旧画面名
+SCREEN_ALIASES = {"ingame": Screen.IN_GAME, "game_start": Screen.IN_GAME}
+SIMULATED_SCREENS = (Screen.LOBBY, Screen.IN_GAME, Screen.RESULT, Screen.TOWN, Screen.ARCHIVE, Screen.ARCHIVE_RESULT)
+
+
+def corpus_samples(corpus_dir=CORPUS_DIR):
+    """
+    :return: [(特征, 画面, 文件名)]，没有 screen 标注的帧跳过
+    """
+    samples = []
+    for entry in load_labels(corpus_dir)["frames"]:
+        screen = entry.get("screen")
+        if not screen:
+            continue
+        bgr = cv2.imread(os.path.join(corpus_dir, entry["file"]), cv2.IMREAD_COLOR)
+        if bgr is None:
+            logger.warning(f"无法读取: {entry['file']}")
+            continue
+        frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        layout.configure((frame.shape[1], frame.shape[0]))
+        samples.append((extract_features(frame), SCREEN_ALIASES.get(screen, screen), entry["file"]))
+    return samples
+
+
+def simulator_samples(per_screen, background_seed, state_seed, timings=None):
+    """
+    在模拟器上按画面生成标注样本
+    :param background_seed: 决定背景纹理
+    :param state_seed: 决定对局时间、商店、弹窗等随机状态
+    :param timings: 传入列表时追加每帧特征提取的毫秒数
+    :return: [(特征, 画面, 描述)]
+    """
+    from simulator.game import SimulatedGame
+
+    layout.configure((1920, 1080))
+    game = SimulatedGame(seed=background_seed)
+    rng = random.Random(state_seed)
+    samples = []
+    for screen in SIMULATED_SCREENS:
+        for index in range(per_screen):
+            game.pose(screen, rng)
+            frame = game.render()
+            start = time.perf_counter()
+            features = extract_features(frame)
+            if timings is not None:
+                timings.append((time.perf_counter() - start) * 1000)
+            samples.append((features, screen, f"sim{background_seed}_{state_seed}_{screen}_{index}"))
+    return samples
+
+
+def split(samples):
+    """按画面隔帧划分：偶数帧训练，奇数帧测试"""
+    train, test, seen = [], [], {}
+    for sample in samples:
+        index = seen[sample[1]] = seen.get(sample[1], -1) + 1
+        (train if index % 2 == 0 else test).append(sample)
+    return train, test
+
+
+def run(corpus_dir=CORPUS_DIR, simulator=0, seed=0):
+    """
+    :param simulator: 每种画面生成的模拟样本数，0 表示只用语料
+    :return: {数据集: 统计结果}
+    """
+    datasets = {}
+    corpus = corpus_samples(corpus_dir)
+    if corpus:
+        datasets["corpus"] = split(corpus)
+    extract_ms = []
+    if simulator:
+        train = simulator_samples(simulator, seed, seed)
+        datasets["simulator"] = (train, simulator_samples(simulator, seed, seed + 1, extract_ms))
+        datasets["simulator_new_art"] = (train, simulator_samples(simulator, seed + 1, seed + 1))
+    if not datasets:
+        raise SystemExit(f"没有标注样本: {corpus_dir} 中无 screen 标注，可使用 --simulator N 生成模拟样本")
+    if "corpus" not in datasets:
+        logger.warning("没有实机标注语料，只评估模拟器合成画面，结果不代表实机准确率与覆盖率")
+
+    report = {}
+    for name, (train, test) in datasets.items():
+        classifier = ScreenClassifier(reference_path=None, save_learned=False)
+        for features, screen, _ in train:
+            classifier.add(features, screen)
+        stats = evaluate(classifier, [(features, screen) for features, screen, _ in test])
+        if name == "simulator":
+            stats["extract_p50_ms"] = percentile(extract_ms, 0.5)
+            stats["extract_p95_ms"] = percentile(extract_ms, 0.95)
+        stats["train"] = len(train)
+        report[name] = stats
+        _print_report(name, stats)
+    return report
+
+
+def _print_report(name, stats):
+    logger.info(f"===== {name}: 训练 {stats['train']} 帧, 测试 {stats['total']} 帧 =====")
+    logger.info(f"正确 {stats['correct']}, 回退 OCR {stats['fallback']}, 错误 {stats['wrong']} | "
+                f"覆盖率 {stats['coverage']:.1%}, 分类准确率 {stats['precision']:.1%}")
+    timing = f"分类 p50 {stats['classify_p50_ms']:.2f}ms, p95 {stats['classify_p95_ms']:.2f}ms"
+    if "extract_p50_ms" in stats:
+        timing += f" | 特征提取 p50 {stats['extract_p50_ms']:.2f}ms, p95 {stats['extract_p95_ms']:.2f}ms"
+    logger.info(timing)
+    for screen, counts in stats["per_label"].items():
+        logger.info(f"  {screen:<16}{counts['correct']:>4}/{counts['total']:<4} 回退 {counts['fallback']:<4}"
+                    f"错误 {counts['wrong']:<4}{stats['confusion'][screen]}")
+
+
+def fit(corpus_dir=CORPUS_DIR, path=REFERENCE_PATH):
+    """用全部语料生成参考帧文件"""
+    samples = corpus_samples(corpus_dir)
+    if not samples:
+        raise SystemExit(f"没有标注样本: {corpus_dir}")
+    classifier = ScreenClassifier(reference_path=None, save_learned=False, max_per_label=len(samples))
+    for features, screen, _ in samples:
+        classifier.add(features, screen)
+    classifier.save(path)
+    logger.info(f"参考帧已写入 {path}: {classifier.counts()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="画面分类器准确率与耗时测试")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "fit"])
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--simulator", type=int, default=0, help="每种画面生成的模拟样本数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="把报告写入 JSON 文件")
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        fit(args.corpus)
+        return
+    report = run(args.corpus, args.simulator, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# benchmarks/stats.py
+"""各基准脚本共用的统计函数"""
+
+
+def percentile(values, q):
+    """
+    :param q: 0~1 之间的分位点，如 0.95
+    :return: 最近秩分位数；values 不能为空
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
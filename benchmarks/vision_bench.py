@@ -0,0 +1,228 @@
+# benchmarks/vision_bench.py
+"""
+视觉模块基准与准确率测试
+在录制的整屏截图语料上回放（FileFrameSource 代替 ImageGrab），对各阶段实际使用的区域
+运行 find_text / find_image / get_run_time / get_all_coordinates_and_text，
+统计 p50/p95 延迟、吞吐量以及对照标注的命中/漏检/误检。纯 CPU，可在 Linux 上运行。
+
+语料目录结构:
+    corpus/labels.json       标注清单
+    corpus/<screen>_<n>.png  1920x1080 整屏截图
+
+labels.json 格式:
+    {"frames": [{"file": "lobby_001.png", "screen": "lobby",
+                 "expect": {"text:开始游戏": true, "image:shengji": false, "run_time": "12:34"}}]}
+expect 中未列出的场景只统计耗时，不计入准确率。标注需按画面内容人工填写，record 只负责截图。
+
+benchmarks/corpus_sim/ 是 make_sim_corpus 生成的模拟器语料（色块文字，labels.json 中附带编码表），
+需加 --simulated-ocr 使用模拟 OCR 运行；它验证识别流程本身，不代表实机上的 OCR 准确率。
+
+用法:
+    python -m benchmarks.vision_bench [--corpus DIR] [--repeat N] [--cache] [--full-match] [--simulated-ocr]
+                                      [--output report.json]
+    python -m benchmarks.vision_bench record <screen> [--corpus DIR]   # 在游戏机器上录制一帧，随后人工标注
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from loguru import logger
+
+from benchmarks.stats import percentile
+from utils import layout
+from utils.clock_reader import ClockReader
+from utils.frame_source import FileFrameSource, ScreenFrameSource
+from utils.ocr_cache import OCRResultCache
+from utils.vision_processor import VisionProcess
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+# 物品栏模板（ItemManager）
+ITEM_TEMPLATES = ("shengji", "jueze", "shenhua", "quanneng")
+
+# (场景名, 布局区域名) —— 与各阶段使用的区域一致，按语料分辨率换算
+TEXT_SCENARIOS = [
+    ("开始游戏", "common.start_game_button"),  # DifficultyPhase / RestartPhase
+    ("升级物品", "runtime.upgrade_text"),
+    ("收起", "runtime.collapse_button"),
+    ("失败", "runtime.defeat_text"),
+    ("刷新", "runtime.refresh_button"),
+    ("确定", "archive.confirm_button"),
+    ("攻击速度", "item.attack_speed"),
+    ("生命值", "item.shenhua_choice"),
+]
+LIST_SCENARIOS = [
+    ("optional_skill", "runtime.optional_skill"),
+    ("archive_rewards", "archive.rewards"),
+]
+
+
+def build_scenarios():
+    """
+    :return: [(场景键, 调用函数)]，调用函数返回用于与标注比较的观测值
+    """
+    positions = layout.current()
+    item_bar = positions.region("item.bar")
+    scenarios = []
+    for text, region in TEXT_SCENARIOS:
+        roi = positions.region(region)
+        scenarios.append((f"text:{text}", lambda v, t=text, r=roi: v.find_text(t, *r)[0] > 0))
+    for name in ITEM_TEMPLATES:
+        scenarios.append((f"image:{name}",
+                          lambda v, n=name: v.find_image(n, *item_bar)[0] > 0))
+    scenarios.append(("images:item_bar", lambda v: v.find_images(ITEM_TEMPLATES, *item_bar)))
+    scenarios.append(("images:item_bar_all",
+                      lambda v: [name for name, _, _, _ in v.find_all_images(ITEM_TEMPLATES, *item_bar)]))
+    scenarios.append(("run_time", lambda v: v.get_run_time()[0] or None))
+    for name, region in LIST_SCENARIOS:
+        roi = positions.region(region)
+        scenarios.append((f"list:{name}", lambda v, r=roi: [t for _, _, t in v.get_all_coordinates_and_text(*r)]))
+    return scenarios
+
+
+def load_labels(corpus_dir):
+    path = os.path.join(corpus_dir, "labels.json")
+    if not os.path.exists(path):
+        return {"frames": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _simulated_engines(labels):
+    """:return: (模拟 OCR 引擎, 时钟读取器)，按语料附带的编码表解码色块文字"""
+    from simulator.labels import LabelCodec
+    from simulator.ocr import SimulatedOCR
+
+    if "codec" not in labels:
+        raise SystemExit("语料没有附带色块编码表，--simulated-ocr 只能用于 make_sim_corpus 生成的语料")
+    # 时钟是单个色块，字形读取器总是回退到 OCR；使用空的字形目录，不读写实机字形
+    reader = ClockReader(glyph_dir=tempfile.mkdtemp(prefix="bench_glyphs_"), save_learned=False)
+    return SimulatedOCR(LabelCodec(labels["codec"])), reader
+
+
+def run(corpus_dir=CORPUS_DIR, repeat=5, use_cache=False, pyramid_match=True, simulated_ocr=False):
+    """
+    运行全部场景
+    :param pyramid_match: False 时使用全分辨率彩色模板匹配，用于对比金字塔匹配的速度与结果
+    :param simulated_ocr: 使用模拟 OCR（用于模拟器语料），不加载 PaddleOCR
+    :return: {场景键: 统计结果}
+    """
+    labels = load_labels(corpus_dir)
+    frames = labels["frames"]
+    if not frames:
+        raise SystemExit(f"语料为空: {corpus_dir}，请先在游戏机器上使用 record 子命令录制")
+
+    source = FileFrameSource([os.path.join(corpus_dir, f["file"]) for f in frames], preload=True)
+    layout.configure(source.bbox[2:])
+    ocr_engine, clock_reader = _simulated_engines(labels) if simulated_ocr else (None, None)
+    vision = VisionProcess(frame_source=source, settle_delay=0,
+                           ocr_cache=OCRResultCache() if use_cache else OCRResultCache(max_entries=0),
+                           pyramid_match=pyramid_match, ocr_engine=ocr_engine, clock_reader=clock_reader)
+    vision.ocr  # 等待引擎就绪，避免把加载时间计入首个场景
+
+    scenarios = build_scenarios()
+    latencies = {key: [] for key, _ in scenarios}
+    outcomes = {key: {"tp": 0, "tn": 0, "fp": 0, "fn": 0, "match": 0, "mismatch": 0} for key, _ in scenarios}
+
+    try:
+        for index, frame in enumerate(frames):
+            source.seek(index)
+            with vision.snapshot():
+                for key, call in scenarios:
+                    observed = None
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        observed = call(vision)
+                        latencies[key].append((time.perf_counter() - start) * 1000)
+                    if key in frame.get("expect", {}):
+                        _score(outcomes[key], frame["expect"][key], observed, frame["file"], key)
+    finally:
+        vision.close()
+
+    report = {}
+    for key, _ in scenarios:
+        values = latencies[key]
+        total_ms = sum(values)
+        report[key] = {
+            "calls": len(values),
+            "p50_ms": percentile(values, 0.5),
+            "p95_ms": percentile(values, 0.95),
+            "mean_ms": statistics.mean(values),
+            "throughput_per_s": len(values) / (total_ms / 1000) if total_ms else 0.0,
+            **outcomes[key],
+        }
+    _print_report(report)
+    return report
+
+
+def _score(outcome, expected, observed, file, key):
+    if isinstance(expected, bool):
+        kind = ("tp" if observed else "fn") if expected else ("fp" if observed else "tn")
+    else:
+        kind = "match" if expected == observed else "mismatch"
+    outcome[kind] += 1
+    if kind in ("fp", "fn", "mismatch"):
+        logger.warning(f"{file} {key}: 期望 {expected}，实际 {observed}")
+
+
+def _print_report(report):
+    logger.info(f"{'场景':<24}{'p50(ms)':>10}{'p95(ms)':>10}{'次/秒':>10}   准确率")
+    for key, stats in report.items():
+        labelled = stats["tp"] + stats["tn"] + stats["fp"] + stats["fn"] + stats["match"] + stats["mismatch"]
+        correct = stats["tp"] + stats["tn"] + stats["match"]
+        accuracy = f"{correct}/{labelled}" if labelled else "-"
+        logger.info(f"{key:<24}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+                    f"{stats['throughput_per_s']:>10.1f}   {accuracy}")
+
+
+def record(screen, corpus_dir=CORPUS_DIR):
+    """
+    截取当前游戏画面加入语料，expect 留空
+    标注不能取自被测实现的识别结果，否则准确率只是实现与自身比较；录制后按画面内容手工填写需要评估的场景
+    """
+    from PIL import Image
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    labels = load_labels(corpus_dir)
+    count = sum(1 for f in labels["frames"] if f["screen"] == screen)
+    file = f"{screen}_{count + 1:03d}.png"
+
+    frame = ScreenFrameSource().refresh()
+    Image.fromarray(frame).save(os.path.join(corpus_dir, file))
+
+    labels["frames"].append({"file": file, "screen": screen, "expect": {}})
+    with open(os.path.join(corpus_dir, "labels.json"), "w", encoding="utf-8") as f:
+        json.dump(labels, f, ensure_ascii=False, indent=2)
+    keys = ", ".join(key for key, _ in build_scenarios())
+    logger.info(f"已录制 {file}，请在 labels.json 中按画面内容填写 expect，可用场景: {keys}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视觉模块基准与准确率测试")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "record"])
+    parser.add_argument("screen", nargs="?", help="record 时的画面名称，如 lobby、ingame、result、archive")
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cache", action="store_true", help="启用 OCR 结果缓存")
+    parser.add_argument("--full-match", action="store_true", help="使用全分辨率模板匹配（关闭金字塔匹配）")
+    parser.add_argument("--simulated-ocr", action="store_true", help="使用模拟 OCR，用于 make_sim_corpus 生成的语料")
+    parser.add_argument("--output", help="把报告写入 JSON 文件")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        if not args.screen:
+            parser.error("record 需要指定画面名称")
+        record(args.screen, args.corpus)
+        return
+
+    report = run(args.corpus, args.repeat, args.cache, not args.full_match, args.simulated_ocr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,24 @@
 主模块，负责协调游戏自动化任务的执行流程
 """
 import os
-import time
 
-from PyQt5.QtCore import QThread
 from loguru import logger
 
 from game_phases.game_archive import ArchiveProcess
 from game_phases.game_difficulty import DifficultyPhase
 from game_phases.game_restart import RestartPhase
-from game_phases.game_runtime import CollapsePhase
+from game_phases.game_runtime import CollapsePhase, PositionConstants
 # 游戏自动化组件
+from game_components.phase_dispatcher import PhaseDispatcher, ScreenIdentifier
 from game_phases.game_start import GameStartPhase
-from utils.keyboard_listener import KeyboardListener
 from utils.km_controller import KMController
 # 配置和工具
-from utils.state_manager import StateManager
+from utils import clock, layout, tracer
+from utils.platform_backend import default_platform
+from utils.metrics import METRICS_DB, GameRecord, MetricsStore
+from utils.screen_classifier import ScreenClassifier
+from utils.screen_monitor import ScreenMonitor
+from utils.state_manager import StateManager, StopRequested
 from utils.vision_processor import VisionProcess
 
 
@@ -46,29 +49,75 @@ class GameAutomation:
     管理核心组件初始化、主循环执行和资源清理
     """
 
-    def __init__(self, config=None):
-        """初始化游戏自动化系统，加载配置并初始化各组件"""
+    def __init__(self, config=None, platform=None, ocr_engine=None):
+        """
+        初始化游戏自动化系统，加载配置并初始化各组件
+        :param platform: 平台后端，默认使用实机 Windows 环境；可传入模拟器后端在无游戏环境下运行
+        :param ocr_engine: 已提前开始加载的 OCR 引擎 Future（见 start_ocr_warm_up），默认使用平台提供的引擎
+        """
         logger.info("===== 游戏自动化系统初始化 =====")
         # 加载配置
         logger.debug("加载配置文件")
         self.config = config if config else {}
         self._log_config()
+        self.platform = platform if platform is not None else default_platform()
+        logger.info(f"平台后端: {self.platform.name}")
+        if self.platform.clock is not None:
+            clock.install(self.platform.clock)
+        logger.info(f"时钟: {clock.current().name}")
+        # 时间线追踪：开启后每局写出一个 Chrome Trace 文件
+        if self.config.get("trace"):
+            tracer.enable(self.config.get("trace_dir") or tracer.TRACE_DIR)
+
+        # 按实际分辨率换算界面布局，之后各模块的坐标与模板都以此为准
+        logger.debug("加载界面布局")
+        # window_title 指定时按游戏窗口客户区定位，否则按全屏处理
+        rect = self.platform.game_rect(self.config.get("window_title"))
+        if self.config.get("resolution"):
+            layout.configure(self.config["resolution"])
+        elif rect is not None:
+            layout.configure(rect[2:], origin=rect[:2])
+        else:
+            layout.configure()
 
         # 初始化核心组件
         logger.debug("初始化状态管理器")
         self.state_manager = StateManager()
+        self.state_manager.reset()
+        self.state_manager.beeper = self.platform.beep
 
         logger.debug("初始化键盘鼠标控制器")
-        self.km_controller = KMController()
+        self.km_controller = KMController(backend=self.platform.create_input(),
+                                          click_padding=self.config.get("click_padding", 0.5))
 
         logger.debug("初始化视觉处理器")
-        self.vision = VisionProcess()
+        self.vision = VisionProcess(frame_source=self.platform.create_frame_source(),
+                                    ocr_workers=self.config.get("ocr_workers", 1),
+                                    ocr_engine=ocr_engine if ocr_engine is not None else self.platform.ocr_engine,
+                                    clock_reader=self.platform.clock_reader)
+
+        # 画面监测线程：只截取登记的区域，默认每秒 2 次；monitor_rate 为 0 时关闭，各阶段退回固定睡眠
+        self.monitor = None
+        monitor_rate = self.config.get("monitor_rate", 2)
+        if monitor_rate > 0:
+            logger.debug("初始化画面监测线程")
+            self.monitor = ScreenMonitor(self.vision.frame_source, rate=monitor_rate)
+            self.monitor.watch("collapse", PositionConstants.COLLAPSE_BUTTON_AREA)
+
+        # 运行指标：每局写入 SQLite，metrics_db 为空时关闭
+        self.metrics = None
+        metrics_db = self.config.get("metrics_db", METRICS_DB)
+        if metrics_db:
+            logger.debug("初始化运行指标库")
+            self.metrics = MetricsStore(metrics_db, config=self.config, platform=self.platform.name)
+            self.metrics.start()
 
         # 初始化各个阶段实例
         logger.debug("初始化各个阶段类实例")
         self.phases = {
             "开局": GameStartPhase(self.state_manager, self.km_controller, self.vision),
-            "收起": CollapsePhase(self.state_manager, self.km_controller, self.vision, self.config),
+            "收起": CollapsePhase(self.state_manager, self.km_controller, self.vision, self.config,
+                                self.monitor),
             "重开": RestartPhase(self.state_manager, self.km_controller,self.vision),
             "难度": DifficultyPhase(self.state_manager, self.km_controller, self.vision, self.config),
             "存档": ArchiveProcess(self.config, self.state_manager, self.vision, self.km_controller)
@@ -76,62 +125,74 @@ class GameAutomation:
 
         # 初始化键盘监听器用于控制
         logger.debug("初始化键盘监听器")
-        self.keyboard_listener = KeyboardListener(self.state_manager.toggle_pause)
+        self.keyboard_listener = self.platform.create_keyboard_listener(self.state_manager.toggle_pause,
+                                                                       self.state_manager.stop)
         logger.info("启动键盘监听线程")
         self.keyboard_listener.start()
 
-        # 状态跟踪
-        self.is_first_start = True
+        # 按当前画面调度阶段，可从任意画面启动；画面分类器置信度不足时回退到 OCR 探测
+        classifier = None
+        if self.config.get("screen_classifier", True):
+            classifier = self.platform.screen_classifier or ScreenClassifier()
+        self.dispatcher = PhaseDispatcher(self.phases, ScreenIdentifier(self.vision, classifier), self.state_manager)
         logger.info("游戏自动化系统初始化完成")
 
     def _log_config(self):
         """记录当前加载的配置信息"""
         logger.info("===== 当前配置 =====")
         logger.info(f"配置内容: {self.config}")
-        logger.info(f"起始阶段: {self.config.get('mode', '开局')}")
         logger.info(f"难度级别: {self.config.get('difficulty', 10) - 1}")
         logger.info(f"使用资源: {self.config.get('use_gold', True)}")
         logger.info("===== 配置结束 =====")
 
     def main_loop(self):
-        """自动化系统的主执行循环，控制游戏各阶段的执行顺序"""
+        """自动化系统的主执行循环，按当前画面调度游戏各阶段；stop() 后在当前动作处退出"""
+        try:
+            self._run_games()
+        except StopRequested:
+            logger.info("自动化流程已停止")
+
+    def stop(self):
+        """请求停止主循环，可在任意线程调用；进行中的等待立即返回"""
+        self.state_manager.stop()
+
+    def _run_games(self):
         logger.info("等待用户启动自动化流程...")
         self.state_manager.wait_until_resumed()
-        logger.info("脚本已启动。按F11暂停/恢复。")
+        logger.info("脚本已启动。按F11暂停/恢复，F12停止。")
+        if self.monitor is not None:
+            self.monitor.start()
+        if self.metrics is not None:
+            self.metrics.start_run()
 
-        phases_order = ["难度", "开局", "收起", "存档", "重开"]  # 明确阶段顺序
-        starting_phase = self.config.get("mode", "开局")
-        initial_phases = phases_order.copy()  # 首次循环可能需要调整起始点
         game_times = 0
-        while True:
-            game_success = False  # 初始化，防止未定义错误
-            current_phases = phases_order  # 默认执行所有阶段
-
-            # 首次启动时，从配置的起始阶段开始执行后续阶段
-            if self.is_first_start:
-                try:
-                    start_idx = phases_order.index(starting_phase)
-                    current_phases = phases_order[start_idx:]
-                except ValueError:
-                    logger.error(f"配置的起始阶段'{starting_phase}'无效，使用默认顺序")
-                    self.is_first_start = False
-
-            logger.debug(f"当前执行阶段顺序: {current_phases}")
-            for phase_name in current_phases:
-                logger.info(f"========主流程：开始执行 {phase_name} 阶段=======")
-                if phase_name == "收起":
-                    game_success = self.phases[phase_name].execute()
-                elif phase_name == "存档" and game_success:
-                    self.phases[phase_name].execute()
-                else:
-                    self.phases[phase_name].execute()
-                logger.info(f"{phase_name} 阶段完成")
-
-            if self.is_first_start:
-                logger.info("========主流程：首次启动序列执行完毕=======")
-                self.is_first_start = False
-
-            time.sleep(0.1)  # 防止CPU占用过高
+        while not self.state_manager.stop_requested:
+            game_times += 1
+            record = GameRecord(game_times)
+            with tracer.span("game", "game"):
+                game_success = self.dispatcher.run_game(record)
+
+            cache_stats = self.vision.ocr_cache_stats()
+            record.finish(game_success, cache_stats)
+            outcome = "未完成对局" if game_success is None else ("胜利" if game_success else "失败")
+            logger.info(f"第 {game_times} 局结束: {outcome}, 用时 {record.duration:.0f}s, "
+                        f"调度 {self.dispatcher.stats}, 画面识别 {self.dispatcher.identifier.stats}")
+            if self.metrics is not None:
+                self.metrics.record_game(record)
+                live = self.metrics.live_stats()
+                logger.info(f"本次运行: 每小时 {live['games_per_hour']:.1f} 局, 平均每局 {live['avg_game_s']:.0f}s, "
+                            f"胜率 {live['success_rate']:.0%}")
+            logger.info(f"本局 OCR 缓存: 命中 {cache_stats['hits']} 次, 未命中 {cache_stats['misses']} 次, "
+                        f"命中率 {cache_stats['hit_rate']:.1%}")
+            self.vision.ocr_cache.reset_stats()
+            if self.monitor is not None:
+                logger.info(f"画面监测: {self.monitor.stats()}")
+            logger.info(f"物品使用累计: {self.phases['收起'].item_mgr.stats}")
+            self.km_controller.latency.report()
+            self.km_controller.latency.reset()
+            tracer.dump()
+
+            self.state_manager.sleep(0.1)  # 防止CPU占用过高
 
     def cleanup(self):
         """在程序退出前清理资源，确保所有线程和连接正常关闭"""
@@ -140,21 +201,18 @@ class GameAutomation:
         logger.info("停止键盘监听线程")
         self.keyboard_listener.stop()
 
-        logger.info("释放其他资源...")
-        # 可以添加更多清理操作
+        if self.monitor is not None:
+            logger.info("停止画面监测线程")
+            self.monitor.stop()
 
-        logger.info("===== 资源清理完成 =====")
+        if self.metrics is not None:
+            logger.info("写入剩余运行指标")
+            self.metrics.close()
 
-class GameAutomationWorker(QThread):
-    def __init__(self, automation: GameAutomation):
-        super().__init__()
-        self.automation = automation
+        logger.info("关闭 OCR 服务")
+        self.vision.close()
 
+        logger.info("释放其他资源...")
+        # 可以添加更多清理操作
 
-    def run(self):
-        try:
-            self.automation.main_loop()
-        except Exception as e:
-            logger.exception(f"自动化主循环异常: {e}")
-        finally:
-            self.automation.cleanup()
\ No newline at end of file
+        logger.info("===== 资源清理完成 =====")
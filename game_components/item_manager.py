@@ -3,10 +3,35 @@ Game item management for automation.
 """
 from loguru import logger
 
+from utils import clock, tracer
+from utils.km_controller import InputSequence, KMController
+from utils.layout import LayoutPoint, LayoutRegion
+from utils.postconditions import RegionChanges
 from utils.vision_processor import VisionProcess
 from utils.state_manager import StateManager
-from utils.km_controller import KMController
 
+# Item templates looked up in the item bar, in the order items are used
+ITEM_TEMPLATES = ("shengji", "jueze", "shenhua", "quanneng")
+
+# Popup opened by each item -> preferred options in priority order, as (text, ItemPositions area, clicks).
+# Items without options are used directly; when no option is found the default choice is clicked twice.
+ITEM_CHOICES = {
+    "shengji": (("攻击速度", "ATTACK_SPEED_AREA", 2),),
+    "jueze": (("生命值", "JUEZE_LEFT_AREA", 1), ("生命值", "JUEZE_RIGHT_AREA", 1)),
+    "shenhua": (("生命值", "SHENHUA_CHOICE_AREA", 1), ("生命恢复", "SHENHUA_CHOICE_AREA", 1)),
+    "quanneng": (),
+}
+
+
+class ItemPositions:
+    """Click points and ROIs, resolved for the current resolution from the layout registry."""
+
+    ITEM_BAR_AREA = LayoutRegion("item.bar")
+    ATTACK_SPEED_AREA = LayoutRegion("item.attack_speed")
+    JUEZE_LEFT_AREA = LayoutRegion("item.jueze_left")
+    JUEZE_RIGHT_AREA = LayoutRegion("item.jueze_right")
+    SHENHUA_CHOICE_AREA = LayoutRegion("item.shenhua_choice")
+    DEFAULT_CHOICE = LayoutPoint("item.default_choice")
 
 
 class ItemManager:
@@ -14,6 +39,9 @@ class ItemManager:
     Manages item usage and related functions.
     """
 
+    # Upper bound on item-bar captures in one call; each capture plans a whole pass over the bar
+    MAX_PASSES = 5
+
     def __init__(self, state_manager: StateManager,
                  mouse_controller: KMController,
                  vision_processor: VisionProcess
@@ -22,73 +50,97 @@ class ItemManager:
         self.state_manager = state_manager
         self.km = mouse_controller
         self.vision = vision_processor
+        # Totals over all passes; the last pass is kept separately for logging
+        self.stats = {"passes": 0, "iterations": 0, "captures": 0, "wall_s": 0.0}
+        self.last_pass = None
 
+    @tracer.traced("manager")
     def use_items(self):
-        """Use items function."""
+        """
+        Use every item in the item bar, in priority order 升级 -> 抉择 -> 神话 -> 全能.
+
+        Each pass presses F1, captures the item bar once and plans the clicks for every item found in
+        that capture. Item slots keep their position when an item is used, so the planned positions stay
+        valid for the whole pass. Items without a popup sort last and are clicked in one input sequence.
+        Each popup is captured once after it appears. One batched OCR of that capture locates the
+        preferred option. The capture of the next pass verifies the result: passes repeat until the bar
+        is empty (at most MAX_PASSES), so items granted during a pass are used as well.
+        :return: pass statistics {"iterations", "captures", "wall_s"}
+        """
         self.state_manager.wait_until_resumed()
         logger.info("Starting to use items")
+        started = clock.now()
+        iterations = captures = 0
 
-        for i in range(20):
+        for _ in range(self.MAX_PASSES):
             self.km.press_key("f1")
-            # Look for upgrade button
-            x, y = self.vision.find_image(
-                "images/shengji.bmp", 1142, 931, 1372, 1064
-            )
-            if x > 0:
-                self.km.move_and_click(x, y)
-                # Look for attack speed
-                x_gs, y_gs,conf_gs = self.vision.find_text(
-                    "攻击速度", 803, 335, 1075, 591
-                )
-                if x_gs > 0:
-                    logger.info("Found attack speed")
-                    self.km.move_and_click(x_gs, y_gs, 2)
-                    continue
-                # Click default position
-                self.km.move_and_click(898, 561, 2)
-                continue
-
-            # Look for jueze button
-            x, y = self.vision.find_image(
-                "images/jueze.bmp", 1142, 931, 1372, 1064
-            )
-            if x > 0:
-                self.km.move_and_click(x, y)
-                x_sm, y_sm, conf_sm = self.vision.find_text("生命值", 713, 371, 789, 563)
-                if x_sm > 0:
-                    self.km.move_and_click(x_sm, y_sm)
+            items = self.vision.find_all_images(ITEM_TEMPLATES, *ItemPositions.ITEM_BAR_AREA)
+            captures += 1
+            if not items:
+                # All complete
+                break
+            items.sort(key=lambda item: ITEM_TEMPLATES.index(item[0]))
+
+            sequence = InputSequence()
+            for name, x, y, _ in items:
+                iterations += 1
+                self._item_click(sequence, x, y)
+                if not ITEM_CHOICES[name]:
+                    sequence.wait(self.km.click_padding)
                     continue
-                x_sm, y_sm, conf_sm = self.vision.find_text("生命值", 907, 368, 976, 567)
-                if x_sm > 0:
-                    self.km.move_and_click(x_sm, y_sm)
+
+                panel = self._choice_panel()
+                popup_shown = RegionChanges(self.vision, panel, description="物品弹窗出现")
+                shown = self.km.run_verified(sequence, popup_shown, timeout=1.5)
+                sequence = InputSequence()
+                if not shown:
+                    logger.warning(f"No popup after clicking {name}, leaving it to the next pass")
                     continue
+                with self.vision.snapshot():
+                    captures += 1
+                    (choice_x, choice_y), clicks = self._plan_choice(name)
+                logger.info(f"Item {name}: choosing ({choice_x}, {choice_y})")
+                popup_closed = RegionChanges(self.vision, panel, description="物品弹窗关闭")
+                self.km.move_and_click(choice_x, choice_y, clicks, expect=popup_closed, timeout=1.5)
 
-                self.km.move_and_click(898, 561, 2)
-                continue
-            # Look for shenhua button
-            x, y = self.vision.find_image(
-                "images/shenhua.bmp", 1142, 931, 1372, 1064
-            )
-            if x > 0:
-                self.km.move_and_click(x, y)
+            if sequence.steps:
+                self.km.run(sequence)
+        else:
+            logger.warning(f"Item bar still not empty after {self.MAX_PASSES} passes")
 
-                x_sm,  y_sm,conf_sm = self.vision.find_text("生命值", 835, 361, 986,565)
-                if x_sm > 0:
-                    self.km.move_and_click(x_sm, y_sm)
-                    continue
-                x_sm, y_sm, conf_sm = self.vision.find_text("生命恢复", 835, 361, 986,565)
-                if x_sm > 0:
-                    self.km.move_and_click(x_sm, y_sm)
-                    continue
-                self.km.move_and_click(898, 561, 2)
-                continue
+        wall = clock.now() - started
+        self.last_pass = {"iterations": iterations, "captures": captures, "wall_s": wall}
+        self.stats["passes"] += 1
+        self.stats["iterations"] += iterations
+        self.stats["captures"] += captures
+        self.stats["wall_s"] += wall
+        logger.info(f"Item pass done: {iterations} items, {captures} captures, {wall:.2f}s")
+        return self.last_pass
+
+    def _item_click(self, sequence, x, y):
+        """Append a single click on an item icon"""
+        return sequence.move(x, y).wait(self.km.move_delay).click(x, y)
+
+    @staticmethod
+    def _choice_panel():
+        """Bounding box of every popup option area"""
+        areas = [getattr(ItemPositions, area) for options in ITEM_CHOICES.values() for _, area, _ in options]
+        return (min(a[0] for a in areas), min(a[1] for a in areas),
+                max(a[2] for a in areas), max(a[3] for a in areas))
+
+    def _plan_choice(self, name):
+        """
+        Pick the option to click in the popup of the clicked item, from the held frame.
 
-            # Look for quanneng button
-            x, y = self.vision.find_image(
-                "images/quanneng.bmp", 1142, 931, 1372, 1064
-            )
+        The options of that popup are read in one batched OCR and tried in priority order. Other popups'
+        options are not consulted: their areas overlap, so a hit there does not identify the popup.
+        When no option is found the default choice is clicked twice.
+        :param name: template name of the clicked item
+        :return: ((x, y), clicks)
+        """
+        options = ITEM_CHOICES[name]
+        queries = [(text, getattr(ItemPositions, area)) for text, area, _ in options]
+        for (x, y, _), (_, _, clicks) in zip(self.vision.find_texts(queries), options):
             if x > 0:
-                self.km.move_and_click(x, y)
-                continue
-            # All complete
-            break
+                return (x, y), clicks
+        return tuple(ItemPositions.DEFAULT_CHOICE), 2
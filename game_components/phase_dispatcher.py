@@ -0,0 +1,210 @@
+# game_components/phase_dispatcher.py
+"""
+按画面调度阶段
+每一步先从同一帧识别当前画面，再执行与画面对应的阶段，不再按固定顺序执行、由各阶段盲目轮询；
+阶段结束后在转移表给出的超时内等待画面到达预期状态，超时则按实际画面继续。
+因此程序可以从任意画面启动，对局中途出错后也能从当前画面恢复，不再需要手动选择起始阶段。
+画面先由 ScreenClassifier 在毫秒级内分类，置信度不足时才回退到 OCR 探测。
+OCR 探测什么都没认出时画面记为 UNKNOWN，不执行任何阶段；连续多次都认不出才判定为主城，
+一次截图或 OCR 失误不会触发重开、放弃进行中的对局。
+"""
+from loguru import logger
+
+from utils import clock, layout, tracer
+from utils.screen_classifier import extract_features
+
+
+class Screen:
+    """可识别的画面"""
+
+    LOBBY = "lobby"                    # 大厅：难度列表与开始游戏按钮
+    GAME_START = "game_start"          # 对局开始后 60 秒内
+    IN_GAME = "in_game"                # 对局中
+    RESULT = "result"                  # 对局结束，显示收起按钮
+    ARCHIVE = "archive"                # 存档战斗中，只有分类器能识别
+    ARCHIVE_RESULT = "archive_result"  # 存档战斗结束，显示确定按钮
+    TOWN = "town"                      # 结算后回到主城：分类器识别，或连续多次没有以上任何标志
+    UNKNOWN = "unknown"                # 本次没有认出任何标志，等待下一次识别
+
+
+# 画面 -> 执行的阶段；主城画面在上一局胜利且尚未存档时改为执行存档
+SCREEN_PHASES = {
+    Screen.LOBBY: "难度",
+    Screen.GAME_START: "开局",
+    Screen.IN_GAME: "收起",
+    Screen.RESULT: "收起",
+    Screen.ARCHIVE: "领奖",
+    Screen.ARCHIVE_RESULT: "领奖",
+    Screen.TOWN: "重开",
+}
+
+# 阶段 -> (执行后预期到达的画面, 等待画面到达的超时秒数)
+TRANSITIONS = {
+    "难度": ((Screen.GAME_START, Screen.IN_GAME), 30),
+    "开局": ((Screen.GAME_START, Screen.IN_GAME), 10),
+    "收起": ((Screen.TOWN,), 15),
+    "存档": ((Screen.TOWN,), 15),
+    "领奖": ((Screen.TOWN,), 15),
+    "重开": ((Screen.LOBBY,), 30),
+}
+
+
+class ScreenIdentifier:
+    """
+    从一帧中识别当前画面
+    有分类器时先用分类器，置信度不足时回退到 OCR 探测：三个按钮区域合并为一次 OCR，时钟用字形读取；
+    OCR 确认的画面再交给分类器学习
+    """
+
+    def __init__(self, vision, classifier=None, town_confirmations=3):
+        """
+        :param classifier: ScreenClassifier，None 时只用 OCR 探测
+        :param town_confirmations: OCR 探测连续多少次没有认出任何标志才判定为主城，之前返回 UNKNOWN
+        """
+        self.vision = vision
+        self.classifier = classifier
+        self.town_confirmations = town_confirmations
+        self._unrecognised = 0  # OCR 探测连续没有认出任何标志的次数
+        self.stats = {"identifications": 0, "classified": 0, "ocr_fallbacks": 0, "unrecognised": 0}
+
+    @tracer.traced("dispatch")
+    def identify(self):
+        """:return: (画面, 游戏运行秒数)，非对局画面的运行秒数为 None"""
+        self.stats["identifications"] += 1
+        with self.vision.snapshot() as frame:
+            features = None
+            if self.classifier is not None:
+                features = extract_features(frame, self.vision.frame_source.crop)
+                with tracer.span("classify", "dispatch"):
+                    screen, confidence = self.classifier.classify(features)
+                if confidence >= self.classifier.min_confidence:
+                    if screen != Screen.IN_GAME:
+                        self.stats["classified"] += 1
+                        self._unrecognised = 0
+                        return screen, None
+                    # 对局画面由时钟区分开局与对局中
+                    run_time, run_time_sec = self.vision.get_run_time()
+                    if run_time != 0:
+                        self.stats["classified"] += 1
+                        self._unrecognised = 0
+                        return (Screen.GAME_START if run_time_sec < 60 else Screen.IN_GAME), run_time_sec
+                logger.debug(f"画面分类置信度不足: {screen} {confidence:.2f}，回退到 OCR")
+
+            self.stats["ocr_fallbacks"] += 1
+            screen, run_time_sec = self._probe()
+        if screen == Screen.UNKNOWN:
+            return self._unrecognised_screen(), None
+        self._unrecognised = 0
+        if features is not None:
+            self.classifier.learn(features, Screen.IN_GAME if screen == Screen.GAME_START else screen)
+        return screen, run_time_sec
+
+    def _unrecognised_screen(self):
+        """
+        OCR 探测没有认出任何标志：连续 town_confirmations 次才判定为主城
+        主城是“没有任何标志”的兜底结果，不作为分类器的学习样本
+        """
+        self.stats["unrecognised"] += 1
+        self._unrecognised += 1
+        if self._unrecognised < self.town_confirmations:
+            logger.debug(f"未识别出画面（连续 {self._unrecognised}/{self.town_confirmations} 次）")
+            return Screen.UNKNOWN
+        return Screen.TOWN
+
+    def _probe(self):
+        """在锁定帧内用 OCR 探测按钮与时钟；什么都没认出时返回 UNKNOWN"""
+        positions = layout.current()
+        start_hit, collapse_hit, confirm_hit = self.vision.find_texts([
+            ("开始游戏", positions.region("common.start_game_button")),
+            ("收起", positions.region("runtime.collapse_button")),
+            ("确定", positions.region("archive.confirm_button")),
+        ])
+        if start_hit[0] > 0:
+            return Screen.LOBBY, None
+        if collapse_hit[0] > 0:
+            return Screen.RESULT, None
+        if confirm_hit[0] > 0:
+            return Screen.ARCHIVE_RESULT, None
+        # get_run_time 未识别到时钟时返回 (0, 60)
+        run_time, run_time_sec = self.vision.get_run_time()
+        if run_time == 0:
+            return Screen.UNKNOWN, None
+        return (Screen.GAME_START if run_time_sec < 60 else Screen.IN_GAME), run_time_sec
+
+
+class PhaseDispatcher:
+    """根据当前画面选择并执行阶段，一局以回到大厅为界"""
+
+    def __init__(self, phases, identifier, state_manager, poll_interval=0.5):
+        """
+        :param phases: 阶段名 -> 阶段实例，"存档" 阶段需提供 collect_rewards()
+        :param identifier: ScreenIdentifier
+        :param poll_interval: 画面未到达预期状态时重新识别的间隔（秒）
+        """
+        self.identifier = identifier
+        self.state_manager = state_manager
+        self.poll_interval = poll_interval
+        self.handlers = {name: phase.execute for name, phase in phases.items()}
+        self.handlers["领奖"] = phases["存档"].collect_rewards
+        # 上一局胜利、尚未存档
+        self.archive_pending = False
+        self._expected = None
+        self.stats = {"dispatches": 0, "timeouts": 0}
+
+    def run_game(self, record):
+        """
+        从当前画面开始调度，直到执行过阶段后再次回到大厅
+        :param record: GameRecord，记录各阶段耗时
+        :return: 本局胜负，未执行收起阶段时为 None
+        """
+        success = None
+        executed = []
+        while True:
+            screen = self._next_screen()
+            if screen == Screen.UNKNOWN:
+                # 没有认出画面时不执行任何阶段，稍后重新识别
+                self.state_manager.sleep(self.poll_interval)
+                continue
+            phase_name = self._phase_for(screen, executed)
+            if phase_name == "难度" and any(name != "难度" for name in executed):
+                return success
+
+            logger.info(f"========主流程：当前画面 {screen}，执行 {phase_name} 阶段=======")
+            self.stats["dispatches"] += 1
+            with record.phase(phase_name):
+                result = self.handlers[phase_name]()
+            logger.info(f"{phase_name} 阶段完成")
+            executed.append(phase_name)
+
+            if phase_name == "收起":
+                success = result
+                self.archive_pending = bool(result)
+            elif phase_name in ("存档", "领奖"):
+                self.archive_pending = False
+            self._expected = (phase_name,) + TRANSITIONS[phase_name]
+
+    def _phase_for(self, screen, executed):
+        phase_name = SCREEN_PHASES[screen]
+        if phase_name == "开局" and "开局" in executed:
+            return "收起"
+        if phase_name == "重开" and self.archive_pending:
+            return "存档"
+        return phase_name
+
+    def _next_screen(self):
+        """识别当前画面；上一阶段有预期画面时，在超时内等待画面到达"""
+        screen, _ = self.identifier.identify()
+        if self._expected is None:
+            return screen
+        phase_name, expected, timeout = self._expected
+        self._expected = None
+        deadline = clock.now() + timeout
+        while screen not in expected:
+            if clock.now() >= deadline:
+                self.stats["timeouts"] += 1
+                logger.warning(f"{phase_name} 阶段结束 {timeout}s 后仍未到达预期画面 {expected}，"
+                               f"按当前画面 {screen} 继续")
+                break
+            self.state_manager.sleep(self.poll_interval)
+            screen, _ = self.identifier.identify()
+        return screen
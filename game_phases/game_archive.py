@@ -1,7 +1,7 @@
-import time
-
 from loguru import logger
+from utils import layout, tracer
 from utils.km_controller import KMController
+from utils.postconditions import RegionChanges
 from utils.state_manager import StateManager
 from utils.vision_processor import VisionProcess
 
@@ -13,34 +13,48 @@ class ArchiveProcess:
         self.vision = vision_processor
         self.km = km_controller
 
+    @tracer.traced("phase")
     def execute(self):
         self.state_manager.wait_until_resumed()
         logger.info("开始执行游戏存档阶段")
         self.battle_royal()
 
 
+    @tracer.traced("phase")
     def battle_royal(self):
+        positions = layout.current()
+        # 确认框出现/关闭都会改变确认按钮区域，画面响应后立即进行下一步
+        confirm_area = positions.region("archive.confirm_enter_button")
         self.km.press_key('F2')
-        self.km.move_and_click(1076,603  )
-        time.sleep(1)
-        self.km.move_and_click(832,625)
-        time.sleep(1)
-        self.km.move_a_to_target_position(0,0,962,521)
-        for i in range(50):
-            x, y, conf = self.vision.find_text("确定", 871, 847, 1051, 895)
-            time.sleep(6)
-            if x > 0:
-                result_list = self.vision.get_all_coordinates_and_text(497, 195, 1367, 733)
-                for result in result_list:
-                    if '铜币' in result[2]:
-                        self.km.move_and_click(result[0], result[1])
-                for result in result_list:
-                    if '阶' in result[2]:
-                        self.km.move_and_click(result[0], result[1])
-
-                self.km.move_and_click(x, y, 2)
-                break
-            time.sleep(3)
-
-
-        self.km.press_key('F2',2)
+        self.km.move_and_click(*positions.point("archive.enter"),
+                               expect=RegionChanges(self.vision, confirm_area, "打开存档确认框"), timeout=1.5)
+        self.km.move_and_click(*positions.point("archive.confirm_enter"),
+                               expect=RegionChanges(self.vision, confirm_area, "确认进入存档"), timeout=1.5)
+        self.km.move_a_to_target_position(0, 0, *positions.point("archive.attack_target"))
+        self.collect_rewards()
+
+    @tracer.traced("phase")
+    def collect_rewards(self, timeout=450):
+        """
+        等待存档战斗结束，领取奖励并返回主城；从存档战斗或结算画面恢复时直接调用
+        :param timeout: 等待确定按钮的最长秒数，默认为原先 50 轮轮询的总时长
+        """
+        positions = layout.current()
+        x, y, conf = self.vision.wait_for_text("确定", *positions.region("archive.confirm_button"),
+                                               timeout=timeout, rec_only=True)
+        if x > 0:
+            # 等待奖励列表加载完成后再识别
+            rewards_area = positions.region("archive.rewards")
+            self.vision.wait_for_region_stable(*rewards_area, stable_time=1, timeout=6)
+            result_list = self.vision.get_all_coordinates_and_text(*rewards_area)
+            for result in result_list:
+                if '铜币' in result[2]:
+                    self.km.move_and_click(result[0], result[1])
+            for result in result_list:
+                if '阶' in result[2]:
+                    self.km.move_and_click(result[0], result[1])
+
+            self.km.move_and_click(x, y, 2)
+
+
+        self.km.press_key('F2',2)
\ No newline at end of file
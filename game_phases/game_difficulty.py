@@ -1,26 +1,38 @@
 # game_phases/difficulty.py
-import time
 from loguru import logger
 
+from utils import layout, tracer
+
 
 class DifficultyPhase:
-    def __init__(self, state_manager, km_controller, vision_processor, config):
+    def __init__(self, state_manager, km_controller, vision_processor, config, timeout=10):
+        """
+        :param timeout: 等待开始游戏按钮的最长秒数，未出现时交还调度器按当前画面处理
+        """
         self.state_manager = state_manager
         self.km = km_controller
         self.vision = vision_processor
         self.difficulty_level = config.get("difficulty", 6) - 1
+        self.timeout = timeout
 
+    @tracer.traced("phase")
     def execute(self):
+        """:return: 是否点击了开始游戏"""
         self.state_manager.wait_until_resumed()
         logger.info("开始执行难度选择阶段")
 
-        while True:
-            x, y, conf = self.vision.find_text("开始游戏", 1649, 939, 1819, 995)
-            if x > 0:
-                difficulty_y = 291 + self.difficulty_level * 53
-                logger.info(f"选择难度级别: {self.difficulty_level + 1}")
-                self.km.move_and_click(953, difficulty_y, 3)
-                self.km.move_and_click(x, y, 2)
-                break
-            time.sleep(5)
-        logger.info("难度选择阶段完成")
\ No newline at end of file
+        # 画面变化时才重新识别，按钮出现后立即返回
+        positions = layout.current()
+        x, y, conf = self.vision.wait_for_text("开始游戏", *positions.region("common.start_game_button"),
+                                               timeout=self.timeout, rec_only=True)
+        if x <= 0:
+            logger.warning(f"{self.timeout}s 内未找到开始游戏按钮，交还调度器")
+            return False
+        first_x, first_y = positions.point("difficulty.first_level")
+        _, level_step = positions.offset("difficulty.level_step")
+        difficulty_y = first_y + round(self.difficulty_level * level_step)
+        logger.info(f"选择难度级别: {self.difficulty_level + 1}")
+        self.km.move_and_click(first_x, difficulty_y, 3)
+        self.km.move_and_click(x, y, 2)
+        logger.info("难度选择阶段完成")
+        return True
\ No newline at end of file
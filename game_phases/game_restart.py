@@ -1,29 +1,49 @@
 # game_phases/restart.py
-import time
 from loguru import logger
 
+from utils import layout, tracer
+
 
 class RestartPhase:
-    def __init__(self, state_manager, km_controller,vivison_processor):
+    def __init__(self, state_manager, km_controller,vivison_processor, max_attempts=3):
+        """
+        :param max_attempts: 重开操作的最多尝试次数，仍未回到大厅时交还调度器按当前画面处理
+        """
         self.state_manager = state_manager
         self.km = km_controller
         self.vision = vivison_processor
+        self.max_attempts = max_attempts
 
+    @tracer.traced("phase")
     def execute(self):
+        """:return: 是否回到了大厅"""
         self.state_manager.wait_until_resumed()
         logger.info("开始执行游戏重开阶段")
         logger.debug("点击游戏菜单按钮")
-        while self.vision.find_text("开始游戏", 1649, 939, 1819, 995)[0] <= 0:
+        positions = layout.current()
+        start_button = positions.region("common.start_game_button")
+        found = self.vision.find_text("开始游戏", *start_button, rec_only=True)[0] > 0
+        attempts = 0
+        while not found and attempts < self.max_attempts:
+            attempts += 1
             self.km.press_key('F1', 2)
             self.km.press_key('F2')
-            time.sleep(1)
+            with tracer.span("sleep", "phase"):
+                self.state_manager.sleep(1)
             logger.info("开始执行重开操作")
-            self.km.move_and_click(1068,913, 2)
+            self.km.move_and_click(*positions.point("restart.restart_button"), 2)
             logger.debug("确认重开游戏")
-            time.sleep(1)
-            self.km.move_and_click(823, 624, 2, 1)
+            with tracer.span("sleep", "phase"):
+                self.state_manager.sleep(1)
+            self.km.move_and_click(*positions.point("restart.confirm"), 2, 1)
+            # 等待大厅界面出现，未出现则重新执行重开操作
+            found = self.vision.wait_for_text("开始游戏", *start_button, timeout=5, rec_only=True)[0] > 0
 
+        if not found:
+            logger.warning(f"{attempts} 次重开操作后仍未回到大厅")
+            return False
         logger.info("游戏重开阶段完成")
+        return True
 
 
 
@@ -1,35 +1,48 @@
 # game_phases/game_runtime.py
-import time
+import threading
+
 from loguru import logger
 from game_components.item_manager import ItemManager
+from utils import tracer
+from utils.layout import LayoutPath, LayoutPoint, LayoutRegion
+from utils.phase_runtime import ActionCancelled, InputQueue, PerceptionLoop
+from utils.postconditions import RegionChanges, TextAppears
+from utils.text_matcher import TextMatcher
 
 
 class PositionConstants:
+    """点击位置与识别区域，按当前分辨率从界面布局中取出"""
 
     # 关闭商店
-    CLOSE_STORE = (1664, 1045)
+    CLOSE_STORE = LayoutPoint("runtime.close_store")
     # 投资按钮
-    INVEST_TOGGLE = (806, 976)
+    INVEST_TOGGLE = LayoutPoint("runtime.invest_toggle")
     # 技能购买按钮
-    SKILL_UPGRADE_BUTTON = (878, 991)
+    SKILL_UPGRADE_BUTTON = LayoutPoint("runtime.skill_upgrade_button")
     # 默认技能位置
-    DEFAULT_SKILL_POSITION = (770, 551)
+    DEFAULT_SKILL_POSITION = LayoutPoint("runtime.default_skill")
     # 挑战升级按钮
-    UPGRADE_CHALLENGE_LEVEL = (1872, 341)
+    UPGRADE_CHALLENGE_LEVEL = LayoutPoint("runtime.upgrade_challenge_level")
+    # 商店切换按钮
+    SWITCH_STORE = LayoutPoint("runtime.switch_store")
 
 
     # 查找可选技能查找范围
-    FIND_OPTIONAL_SKILL = (512, 442, 1398, 525)
+    FIND_OPTIONAL_SKILL = LayoutRegion("runtime.optional_skill")
     # 商店状态查找范围
-    UPGRADE_TEXT_AREA = (1530, 12, 1896, 55)
+    UPGRADE_TEXT_AREA = LayoutRegion("runtime.upgrade_text")
     # 刷新按钮查找范围
-    REFRESH_BOTTON = (813, 783, 1107, 867)
+    REFRESH_BOTTON = LayoutRegion("runtime.refresh_button")
+    # 收起按钮查找范围
+    COLLAPSE_BUTTON_AREA = LayoutRegion("runtime.collapse_button")
+    # 失败文字查找范围
+    DEFEAT_TEXT_AREA = LayoutRegion("runtime.defeat_text")
 
 
     # 转换耕作队列
-    REBIRTH_SEQUENCE = [(947, 982), (1034, 978), (770, 551), (1066, 634)]
-    # 移动到塔下操作列表
-    TOWER_MOVE_REGION = (73, 911, 707, 420)
+    REBIRTH_SEQUENCE = LayoutPath("runtime.rebirth")
+    # 移动到塔下操作路径：(小地图位置, 主画面位置)
+    TOWER_MOVE_PATH = LayoutPath("runtime.tower_move")
 
 
 
@@ -39,6 +52,7 @@ class InvestmentManager:
         self.km = km
         self.config = config
 
+    @tracer.traced("manager")
     def toggle_investment(self):
         if not self.config.get("use_gold", True):
             return
@@ -58,40 +72,46 @@ class SkillUpgradeManager:
             "琉璃大炮", "小金库", "百步穿杨", "献祭", "多重射击",
             "浸毒武器", "剧毒体质", "死亡之舞", "黄金剑", "自愈之力"
         ]
+        self.skill_matcher = TextMatcher(self.texts_to_find, max_distance=1)
 
+    @tracer.traced("manager")
     def handle_skill_upgrades(self):
         if self.shenji_times >= 8:
             return
 
-        self.km.move_and_click(*PositionConstants.SKILL_UPGRADE_BUTTON)
-
-        time.sleep(1)
-        x, y, conf = self.vision.find_text("刷新", *PositionConstants.REFRESH_BOTTON, save=True)
-        if x > 0:
+        # 刷新按钮一出现就继续，不再固定等待 1 秒
+        refresh_shown = TextAppears(self.vision, "刷新", PositionConstants.REFRESH_BOTTON, rec_only=True,
+                                    description="技能面板出现刷新按钮")
+        if self.km.move_and_click(*PositionConstants.SKILL_UPGRADE_BUTTON, expect=refresh_shown, timeout=1.5):
             self.shenji_times += 1
             logger.info(f"[技能升级] 第 {self.shenji_times} 次刷新")
             self.km.move_and_click(*self._get_shenji_position(), 1)
 
         self.km.return_to_initial_position()
         logger.debug("[技能升级] 执行转世操作")
-        for pos in PositionConstants.REBIRTH_SEQUENCE:
-            time.sleep(0.5)
-            self.km.move_and_click(*pos)
+        self.km.click_path("rebirth", PositionConstants.REBIRTH_SEQUENCE, pause=0.5)
         logger.info("[技能升级] 升级和转世完成")
     def _get_shenji_position(self):
         shenji_list = self.vision.get_all_coordinates_and_text(
-            *PositionConstants.FIND_OPTIONAL_SKILL)
+            *PositionConstants.FIND_OPTIONAL_SKILL, with_confidence=True)
 
-        for shenji_name in self.texts_to_find:
-            for shenji_corr in shenji_list:
-                if shenji_corr[2] == shenji_name:
-                    return shenji_corr[0], shenji_corr[1]
+        # 按 texts_to_find 的优先级一次匹配全部候选，容忍一个错字
+        match = self.skill_matcher.best(shenji_list, threshold=0.5)
+        if match is not None:
+            logger.info(f"[技能升级] 选择技能 {match.pattern}（识别为 {match.text}）")
+            return match.x, match.y
         return PositionConstants.DEFAULT_SKILL_POSITION
 class StoreManager:
     def __init__(self, km, vision):
         self.km = km
         self.vision = vision
 
+    def _click_close_store(self):
+        """点击关闭商店，商店区域画面变化后立即返回"""
+        store_changed = RegionChanges(self.vision, PositionConstants.UPGRADE_TEXT_AREA, description="关闭商店")
+        self.km.move_and_click(*PositionConstants.CLOSE_STORE, expect=store_changed, timeout=1.5)
+
+    @tracer.traced("manager")
     def open_store(self):
         for _ in range(5):  # 最多尝试5次
             x, y, _ = self.vision.find_text('升级物品', *PositionConstants.UPGRADE_TEXT_AREA)
@@ -99,106 +119,214 @@ class StoreManager:
                 self.km.move_and_click(x, y, 2)
                 break
             # 没找到就尝试关闭商店
-            self.km.move_and_click(*PositionConstants.CLOSE_STORE)
-            time.sleep(1)
-
-    def close_store(self):
-        for _ in range(5):
-            if self.vision.find_text('升级物品', *PositionConstants.UPGRADE_TEXT_AREA)[0] <= 0:
+            self._click_close_store()
+
+    @tracer.traced("manager")
+    def close_store(self, store_open=None):
+        """
+        :param store_open: 调用方已从当前帧得知的商店状态，传入时省去第一次查找
+        """
+        for i in range(5):
+            if i == 0 and store_open is not None:
+                if not store_open:
+                    break
+            elif self.vision.find_text('升级物品', *PositionConstants.UPGRADE_TEXT_AREA)[0] <= 0:
                 break  # 如果条件不满足，提前退出循环
-            self.km.move_and_click(*PositionConstants.CLOSE_STORE)
-            time.sleep(1)
+            self._click_close_store()
 
+    @tracer.traced("manager")
     def switch_store(self):
         self.open_store()
-        self.km.right_click(1794, 343)
-        self.km.right_click(1794, 343)
+        self.km.right_click(*PositionConstants.SWITCH_STORE)
+        self.km.right_click(*PositionConstants.SWITCH_STORE)
         self.close_store()
 
 
 class CollapsePhase:
-    def __init__(self, state_manager, km, vision, config):
+    """
+    对局中的资源收集阶段
+    默认以流水线方式运行：后台感知线程持续读取运行时间、商店状态、收起按钮和胜负，
+    阶段线程基于最新完成的感知结果决定本轮操作，键鼠动作都经同一个输入队列串行执行；
+    感知线程一看到收起按钮就抢占输入队列点击收起，不必等阶段线程走完物品使用等操作。
+    """
+
+    def __init__(self, state_manager, km, vision, config, monitor=None):
+        """
+        :param monitor: 可选的 ScreenMonitor；提供时收起按钮区域一变化就立即重新感知（串行流程中用于提前结束等待）
+        config 中 pipelined_runtime 为 False 时退回串行流程，perception_interval 为后台感知的间隔秒数
+        """
         self.state_manager = state_manager
-        self.km = km
         self.vision = vision
         self.config = config
-
-        self.invest_mgr = InvestmentManager(km, config)
-        self.skill_mgr = SkillUpgradeManager(km, vision, config)
-        self.store_mgr = StoreManager(km, vision)
-        self.item_mgr = ItemManager(state_manager, km, vision)
+        self.monitor = monitor
+        self.pipelined = config.get("pipelined_runtime", True)
+
+        # 本阶段的键鼠动作都经输入队列执行；队列未启动（串行流程）时直接执行
+        self.inputs = InputQueue(km)
+        self.km = self.inputs.controller
+        self.perception = PerceptionLoop(self._perceive, state_manager,
+                                         interval=config.get("perception_interval", 1.0),
+                                         on_result=self._on_perception, name="runtime-perception")
+        self._end_lock = threading.Lock()
+        self._ended = threading.Event()
+        self._collapse = None  # 点击收起的 Future，看到收起按钮后设置
+        self._games_success = True
+
+        self.invest_mgr = InvestmentManager(self.km, config)
+        self.skill_mgr = SkillUpgradeManager(self.km, vision, config)
+        self.store_mgr = StoreManager(self.km, vision)
+        self.item_mgr = ItemManager(state_manager, self.km, vision)
         logger.info("游戏阶段控制器初始化完成 | 投资管理、技能升级、商店管理、物品管理已加载")
 
+    @tracer.traced("phase")
     def execute(self):
         self.state_manager.wait_until_resumed()
         logger.info("=== 开始资源收集阶段 ===")
-
+        self._ended.clear()
+        self._collapse = None
+        self._games_success = True
+        if not self.pipelined:
+            return self._run_rounds()
+
+        self.inputs.start()
+        self.perception.start()
+        handle = None
+        if self.monitor is not None:
+            handle = self.monitor.subscribe(self._on_collapse_region, names=["collapse"])
+        try:
+            return self._run_rounds()
+        finally:
+            if handle is not None:
+                self.monitor.unsubscribe(handle)
+            self.perception.stop()
+            self.inputs.stop()
+            logger.info(f"流水线累计 | 感知 {self.perception.stats} | 输入队列 {self.inputs.stats}")
+
+    def _run_rounds(self):
         investment_toggled = True
         taxia_performed = False
         FIND_TEXT_TIMEOUT = 60
-        games_success = True
+        # 等待新感知结果的最长秒数，超时则同步感知一次
+        PERCEPTION_TIMEOUT = 5
+        exec_time_sec = 0
+        seq = 0
+
+        try:
+            while not self._ended.is_set():
+                # 取比上一轮更新的感知结果；收起按钮由 _on_perception 处理
+                perception = self.perception.next(after=seq, timeout=PERCEPTION_TIMEOUT)
+                seq = perception["seq"]
+                exec_time_sec = perception["run_time_sec"]
+                if self._ended.is_set():
+                    break
+                logger.info(f"当前游戏运行时间: {exec_time_sec // 60}分{exec_time_sec % 60}秒")
+
+                # 投资管理
+                store_open = perception["store_open"]
+                if exec_time_sec < 60 and investment_toggled:
+                    logger.info("执行初始投资切换...")
+                    self.invest_mgr.toggle_investment()
+                    investment_toggled = False
+                    store_open = None  # 点击后画面已变化，商店状态需要重新查找
+
+                # 商店管理
+                self.store_mgr.close_store(store_open=store_open)
+
+                self.km.return_to_initial_position()
+
+                # 超时重新投资
+                if not investment_toggled and exec_time_sec > FIND_TEXT_TIMEOUT:
+                    logger.info("达到超时时间，重新切换投资状态")
+                    self.invest_mgr.toggle_investment()
+                    investment_toggled = True
+
+                # 特殊阶段操作
+                if not taxia_performed and exec_time_sec > 1000:
+                    logger.info(">>> 进入特殊阶段操作 <<<")
+                    logger.info("商店切换操作...")
+                    self.store_mgr.switch_store()
+                    logger.info("执行塔下特殊操作...")
+                    self._perform_special_operations()
+                    self.skill_mgr.shenji_times = 0
+                    taxia_performed = True
+                    logger.info("<<< 特殊阶段操作完成 >>>")
+
+                # 常规操作循环
+                if exec_time_sec < 1000:
+                    if self.config.get("useMoney", True):
+                        logger.info("处理技能升级...")
+                        self.skill_mgr.handle_skill_upgrades()
+
+                    logger.info("挑战等级升级...")
+                    self.km.move_and_click(*PositionConstants.UPGRADE_CHALLENGE_LEVEL, 5)
+
+                    logger.info("使用存储物品...")
+                    self.item_mgr.use_items()
+
+                    self._wait_next_round(5)
+        except ActionCancelled:
+            logger.info("收起按钮已出现，放弃本轮剩余操作")
+
+        self.inputs.wait(self._collapse)
+        with tracer.span("sleep", "phase"):
+            self.state_manager.sleep(1)
+        logger.success(f"资源收集阶段完成 | 总耗时: {exec_time_sec // 60}分{exec_time_sec % 60}秒")
+        return self._games_success
 
-        while True:
+    def _perceive(self):
+        """每次只截一次屏：运行时间、商店状态、收起按钮和胜负都从同一帧读取，文字区域合并为一次 OCR"""
+        with self.vision.snapshot():
             _, exec_time_sec = self.vision.get_run_time()
-            logger.info(f"当前游戏运行时间: {exec_time_sec // 60}分{exec_time_sec % 60}秒")
-
-            # 投资管理
-            if exec_time_sec < 60 and investment_toggled:
-                logger.info("执行初始投资切换...")
-                self.invest_mgr.toggle_investment()
-                investment_toggled = False
-
-            # 商店管理
-            self.store_mgr.close_store()
-
-            # 检测结束条件
-            x, y, conf = self.vision.find_text("收起", 700, 706, 1145, 925)
-            if x > 0:
-                logger.success(f"检测到结束条件 | 点击收起按钮 ({x}, {y})")
-                games_success = self.vision.find_text("失败", 645,170,1484,296  )[0] <= 0
-                self.km.move_and_click(x, y, 2)
-                time.sleep(1)
-                break
-
-            self.km.return_to_initial_position()
-
-            # 超时重新投资
-            if not investment_toggled and exec_time_sec > FIND_TEXT_TIMEOUT:
-                logger.info("达到超时时间，重新切换投资状态")
-                self.invest_mgr.toggle_investment()
-                investment_toggled = True
-
-            # 特殊阶段操作
-            if not taxia_performed and exec_time_sec > 1000:
-                logger.info(">>> 进入特殊阶段操作 <<<")
-                logger.info("商店切换操作...")
-                self.store_mgr.switch_store()
-                logger.info("执行塔下特殊操作...")
-                self._perform_special_operations()
-                self.skill_mgr.shenji_times = 0
-                taxia_performed = True
-                logger.info("<<< 特殊阶段操作完成 >>>")
-
-            # 常规操作循环
-            if exec_time_sec < 1000:
-                if self.config.get("useMoney", True):
-                    logger.info("处理技能升级...")
-                    self.skill_mgr.handle_skill_upgrades()
-
-                logger.info("挑战等级升级...")
-                self.km.move_and_click(*PositionConstants.UPGRADE_CHALLENGE_LEVEL, 5)
-
-                logger.info("使用存储物品...")
-                self.item_mgr.use_items()
-
-                time.sleep(5)
-
-        logger.success(f"资源收集阶段完成 | 总耗时: {exec_time_sec // 60}分{exec_time_sec % 60}秒")
-        return games_success
+            store_hit, collapse_hit, defeat_hit = self.vision.find_texts([
+                ("升级物品", PositionConstants.UPGRADE_TEXT_AREA),
+                ("收起", PositionConstants.COLLAPSE_BUTTON_AREA),
+                ("失败", PositionConstants.DEFEAT_TEXT_AREA),
+            ])
+        return {
+            "run_time_sec": exec_time_sec,
+            "store_open": store_hit[0] > 0,
+            "collapse": collapse_hit[:2] if collapse_hit[0] > 0 else None,
+            "defeat": defeat_hit[0] > 0,
+        }
+
+    def _on_perception(self, perception):
+        """看到收起按钮时抢占输入队列点击收起；流水线模式下在感知线程中调用"""
+        with self._end_lock:
+            if perception["collapse"] is None or self._collapse is not None:
+                return
+            self._games_success = not perception["defeat"]
+            logger.success(f"检测到结束条件 | 点击收起按钮 {perception['collapse']}")
+            self._collapse = self.inputs.preempt(self._click_collapse, perception)
+        self._ended.set()
+
+    def _click_collapse(self, perception):
+        self.store_mgr.close_store(store_open=perception["store_open"])
+        self.km.move_and_click(*perception["collapse"], 2)
+
+    def _on_collapse_region(self, event):
+        self.perception.wake()
+
+    @tracer.traced("phase")
+    def _wait_next_round(self, timeout):
+        """等待下一轮检查；看到收起按钮（流水线）或收起按钮区域一有变化（串行）时立即返回"""
+        if self.pipelined:
+            with tracer.span("sleep", "phase"):
+                self.state_manager.wait(self._ended, timeout)
+            return
+        if self.monitor is None:
+            with tracer.span("sleep", "phase"):
+                self.state_manager.sleep(timeout)
+            return
+        event = self.monitor.wait_for("collapse", timeout=timeout, wait=self.state_manager.wait)
+        if event is not None:
+            logger.debug(f"收起按钮区域发生变化，提前进入下一轮检查: {event}")
 
+    @tracer.traced("phase")
     def _perform_special_operations(self):
         logger.info("移动到塔区域...")
-        self.km.move_to_position(*PositionConstants.TOWER_MOVE_REGION)
+        minimap, target = PositionConstants.TOWER_MOVE_PATH
+        self.km.move_to_position(*minimap, *target)
         logger.info("等待30秒特殊操作时间...")
-        time.sleep(30)
-        self.km.return_to_initial_position()
\ No newline at end of file
+        with tracer.span("sleep", "phase"):
+            self.state_manager.wait(self._ended, 30)
+        self.km.return_to_initial_position()
@@ -1,24 +1,42 @@
 # game_phases/game_start.py
-import time
 from loguru import logger
 
+from utils import clock, layout, tracer
+
 
 class GameStartPhase:
-    def __init__(self, state_manager, km_controller, vision_processor):
+    def __init__(self, state_manager, km_controller, vision_processor, timeout=15):
+        """
+        :param timeout: 等待开局时钟的最长秒数，超时或对局已过开局时间时交还调度器按当前画面处理
+        """
         self.state_manager = state_manager
         self.km = km_controller
         self.vision = vision_processor
+        self.timeout = timeout
 
+    @tracer.traced("phase")
     def execute(self):
+        """:return: 是否完成了开局移动"""
         self.state_manager.wait_until_resumed()
         logger.info("开始执行游戏启动阶段")
 
+        deadline = clock.now() + self.timeout
         while True:
-            run_time, run_time_sec = self.vision.get_run_time(x1=897, y1=0, x2=1015, y2=27, scale=2)
+            run_time, run_time_sec = self.vision.get_run_time(scale=2)
             if 0 < run_time_sec < 60:
                 logger.debug("移动到游戏界面初始位置")
-                self.km.move_to_position(90, 943, 939, 267)
+                minimap, target = layout.current().path("start.initial_move")
+                self.km.move_to_position(*minimap, *target)
                 break
+            # get_run_time 未识别到时钟时返回 (0, 60)，只有读到时钟才说明已过开局时间
+            if run_time != 0 and run_time_sec >= 60:
+                logger.info(f"当前时间为{run_time}，已过开局时间，跳过开局移动")
+                return False
+            if clock.now() >= deadline:
+                logger.warning(f"{self.timeout}s 内未读到开局时钟，交还调度器")
+                return False
             logger.debug(f"当前时间为{run_time},不符合开局要求")
-            time.sleep(3)
-        logger.info("游戏启动阶段完成")
\ No newline at end of file
+            # 时钟区域变化（每秒跳动）后再读取，最多等待 3 秒
+            self.vision.wait_for_region_change(*layout.current().region("common.clock"), timeout=3)
+        logger.info("游戏启动阶段完成")
+        return True
@@ -17,11 +17,6 @@ class ConfigDialog(QtWidgets.QDialog):
     def init_ui(self):
         layout = QtWidgets.QVBoxLayout()
 
-        self.mode_box = QtWidgets.QComboBox()
-        self.mode_box.addItems(["开局", "重开", "难度", "收起"])
-        layout.addWidget(QtWidgets.QLabel("模式选择"))
-        layout.addWidget(self.mode_box)
-
         self.gold_checkbox = QtWidgets.QCheckBox("是否开启金币消耗")
         layout.addWidget(self.gold_checkbox)
 
@@ -52,16 +47,11 @@ class ConfigDialog(QtWidgets.QDialog):
         conf = load_config()
         if not conf:
             return
-        mode = conf.get("mode", "开局")
-        if mode in [self.mode_box.itemText(i) for i in range(self.mode_box.count())]:
-            self.mode_box.setCurrentText(mode)
-
         self.gold_checkbox.setChecked(conf.get("use_gold", False))
         self.slider.setValue(conf.get("difficulty", 10))
 
     def on_confirm(self):
         self.result_config = {
-            "mode": self.mode_box.currentText(),
             "use_gold": self.gold_checkbox.isChecked(),
             "difficulty": self.slider.value()
         }
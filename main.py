@@ -2,13 +2,11 @@
 import os
 import sys
 
+from utils import startup_timer  # 尽早导入，以进程启动时刻为计时基准
 from PyQt5 import QtCore, QtWidgets, QtGui
 from loguru import logger
-from watchdog.events import FileSystemEventHandler
-from watchdog.observers import Observer
 
 from config.config_loader import load_config, save_config
-from game_components.game_automation import GameAutomation, GameAutomationWorker
 
 # 设置日志路径
 LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
@@ -47,8 +45,29 @@ class LogTailWorker(QtCore.QThread):
     def stop(self):
         self._running = False
         self.wait()
+
+
+class GameAutomationWorker(QtCore.QThread):
+    """在单独的线程中运行自动化主循环"""
+
+    def __init__(self, automation):
+        super().__init__()
+        self.automation = automation
+
+    def run(self):
+        try:
+            self.automation.main_loop()
+        except Exception as e:
+            logger.exception(f"自动化主循环异常: {e}")
+        finally:
+            self.automation.cleanup()
+
+
 class LogWindow(QtWidgets.QWidget):
-    def __init__(self):
+    def __init__(self, metrics=None):
+        """
+        :param metrics: 运行指标库（MetricsStore），提供时在日志上方显示实时吞吐量
+        """
         super().__init__()
         self.setWindowTitle("日志监控")
         self.setGeometry(0, 500, 500, 200)
@@ -59,6 +78,19 @@ class LogWindow(QtWidgets.QWidget):
         font = QtGui.QFont("Consolas", 10)
         layout = QtWidgets.QVBoxLayout(self)
 
+        # 实时统计面板：每小时局数、平均每局时长、胜率
+        self.metrics = metrics
+        self.stats_label = QtWidgets.QLabel()
+        self.stats_label.setFont(font)
+        self.stats_label.setStyleSheet("QLabel { background-color: black; color: gold; padding: 2px; }")
+        self.stats_label.setVisible(metrics is not None)
+        layout.addWidget(self.stats_label)
+        if metrics is not None:
+            self.stats_timer = QtCore.QTimer(self)
+            self.stats_timer.timeout.connect(self.update_stats)
+            self.stats_timer.start(2000)
+            self.update_stats()
+
         self.text_area = QtWidgets.QPlainTextEdit(readOnly=True)
         self.text_area.setFont(font)
         self.text_area.setStyleSheet("QPlainTextEdit { background-color: black; color: lightgreen; border: none; }")
@@ -81,6 +113,13 @@ class LogWindow(QtWidgets.QWidget):
             self.text_area.verticalScrollBar().maximum()
         )
 
+    def update_stats(self):
+        stats = self.metrics.live_stats()
+        self.stats_label.setText(
+            f"已完成 {stats['games']} 局 | 每小时 {stats['games_per_hour']:.1f} 局 | "
+            f"平均 {stats['avg_game_s'] / 60:.1f} 分钟/局 | 胜率 {stats['success_rate']:.0%}"
+        )
+
     def closeEvent(self, event):
         self.tail_thread.stop()
         event.accept()
@@ -101,11 +140,6 @@ class ConfigDialog(QtWidgets.QDialog):
     def init_ui(self):
         layout = QtWidgets.QVBoxLayout()
 
-        self.mode_box = QtWidgets.QComboBox()
-        self.mode_box.addItems(["难度","开局", "收起","存档","重开" ])
-        layout.addWidget(QtWidgets.QLabel("模式选择"))
-        layout.addWidget(self.mode_box)
-
         self.gold_checkbox = QtWidgets.QCheckBox("是否开启金币消耗")
         layout.addWidget(self.gold_checkbox)
 
@@ -136,16 +170,11 @@ class ConfigDialog(QtWidgets.QDialog):
         conf = load_config()
         if not conf:
             return
-        mode = conf.get("mode", "开局")
-        if mode in [self.mode_box.itemText(i) for i in range(self.mode_box.count())]:
-            self.mode_box.setCurrentText(mode)
-
         self.gold_checkbox.setChecked(conf.get("use_gold", False))
         self.slider.setValue(conf.get("difficulty", 10))
 
     def on_confirm(self):
         self.result_config = {
-            "mode": self.mode_box.currentText(),
             "use_gold": self.gold_checkbox.isChecked(),
             "difficulty": self.slider.value()
         }
@@ -161,28 +190,48 @@ class MainApplication(QtWidgets.QApplication):
         self.log_window = None
 
     def start_application(self):
+        # OCR 引擎加载最慢，在用户填写配置期间就开始在后台加载
+        from utils.vision_processor import start_ocr_warm_up
+        ocr_engine = start_ocr_warm_up(load_config().get("ocr_workers", 1))
+
         # 首先显示配置对话框
         dialog = ConfigDialog()
+        QtCore.QTimer.singleShot(0, lambda: startup_timer.mark("dialog"))
         result = dialog.exec_()
 
         if result == QtWidgets.QDialog.Accepted:
             config = dialog.result_config
             logger.info(f"用户配置: {config}")
 
-            # 初始化自动化系统
-            self.automation = GameAutomation(config)
+            # 自动化模块依赖 OpenCV 等重量级库，确认配置后再导入
+            from game_components.game_automation import GameAutomation
+
+            # 初始化自动化系统，沿用对话框显示前已开始加载的 OCR 引擎
+            self.automation = GameAutomation(config, ocr_engine=ocr_engine)
+            startup_timer.mark("automation")
+            startup_timer.report()
 
             # 启动日志窗口
-            self.log_window = LogWindow()
+            self.log_window = LogWindow(self.automation.metrics)
             self.log_window.show()
 
-            # 在单独的线程中启动游戏自动化
+            # 在单独的线程中启动游戏自动化；F12 停止后主循环退出，程序随之退出
             self.worker = GameAutomationWorker(self.automation)
+            self.worker.finished.connect(self.quit)
+            self.aboutToQuit.connect(self.shutdown)
             self.worker.start()
         else:
             logger.info("用户取消了配置")
             self.quit()
 
+    def shutdown(self):
+        """退出前请求停止，等待自动化线程完成清理"""
+        if self.worker is not None and self.worker.isRunning():
+            self.automation.stop()
+            self.worker.wait(10000)
+        if self.log_window is not None:
+            self.log_window.close()
+
 
 if __name__ == "__main__":
     app = MainApplication(sys.argv)
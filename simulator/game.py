@@ -0,0 +1,448 @@
+# simulator/game.py
+import os
+import random
+import threading
+import time
+
+import numpy as np
+from loguru import logger
+
+from game_components.item_manager import ITEM_TEMPLATES
+from simulator.labels import LabelCodec, label_rect
+from utils import clock, layout
+from utils.km_controller import VK_CODES
+from utils.lazy_import import lazy_module
+from utils.template_registry import IMAGES_DIR
+
+cv2 = lazy_module("cv2")
+
+# 技能面板中可能出现的技能，前几个在 SkillUpgradeManager 的优先列表中
+SKILL_NAMES = ["极速箭术", "月神箭", "暴击强化", "生命膨胀", "琉璃大炮", "坚韧", "疾行", "护甲"]
+# 物品弹窗：模板名 -> (选项区域, 选项文字)；None 表示点击图标即生效
+ITEM_CHOICES = {
+    "shengji": ("item.attack_speed", "攻击速度"),
+    "jueze": ("item.jueze_left", "生命值"),
+    "shenhua": ("item.shenhua_choice", "生命恢复"),
+    "quanneng": None,
+}
+# 不带文字的按钮色块颜色
+BUTTON_COLOR = (40, 90, 160)
+DIALOG_COLOR = (170, 150, 60)
+# 物品弹窗底板颜色，选项文字画在其上
+POPUP_COLOR = (25, 25, 40)
+# 按点击位置判定命中时的容差（像素，基准分辨率）
+CLICK_TOLERANCE = 15
+# 物品栏格子数
+ITEM_SLOTS = 4
+
+
+def _paint(canvas, origin, rect, value):
+    """
+    在画布上填充屏幕区域 rect，超出画布的部分裁掉
+    :param origin: 画布左上角的屏幕坐标
+    :param value: 颜色，或与 rect 同尺寸的图像
+    """
+    ox, oy = origin
+    x1, y1, x2, y2 = rect
+    height, width = canvas.shape[:2]
+    left, top = max(x1 - ox, 0), max(y1 - oy, 0)
+    right, bottom = min(x2 - ox, width), min(y2 - oy, height)
+    if left >= right or top >= bottom:
+        return
+    if isinstance(value, np.ndarray) and value.ndim == 3:
+        value = value[top + oy - y1:bottom + oy - y1, left + ox - x1:right + ox - x1]
+    canvas[top:bottom, left:right] = value
+
+
+class SimulatedGame:
+    """
+    自定义地图画面模拟器
+    依次模拟难度选择、对局中（时钟走动、商店、技能面板、物品弹窗）、结算（收起/失败）、
+    菜单与存档对话框；文字以色块标签渲染，物品图标直接使用 images/ 下的模板图片。
+    画面随注入的点击和按键变化，游戏时钟取自 utils.clock 并按 speed 倍速推进；
+    安装虚拟时钟时 speed 保持 1 即可，时间压缩由虚拟时钟完成。
+    """
+
+    def __init__(self, speed=1.0, game_minutes=20, defeat_rate=0.2, archive_seconds=60,
+                 item_interval=120, store_interval=90, seed=0, screen_layout=None, images_dir=IMAGES_DIR,
+                 textured=True):
+        """
+        :param speed: 游戏时钟相对 utils.clock 的倍速
+        :param game_minutes: 每局游戏时长（游戏时间）
+        :param defeat_rate: 对局失败的概率
+        :param archive_seconds: 存档战斗时长（游戏时间）
+        :param item_interval: 每隔多少游戏秒获得一个物品
+        :param store_interval: 商店关闭后多少游戏秒重新弹出
+        :param seed: 随机种子，固定种子时事件序列可复现
+        :param textured: False 时背景为纯色，用于生成体积小的语料截图
+        """
+        self.layout = screen_layout if screen_layout is not None else layout.current()
+        self.speed = speed
+        self.game_seconds_total = int(game_minutes * 60)
+        self.defeat_rate = defeat_rate
+        self.archive_seconds = archive_seconds
+        self.item_interval = item_interval
+        self.store_interval = store_interval
+        self.random = random.Random(seed)
+        self.codec = LabelCodec()
+        self._lock = threading.RLock()
+        self._keys = {code: name for name, code in VK_CODES.items()}
+        self._icons = self._load_icons(images_dir)
+        self._backgrounds = self._make_backgrounds(seed, textured)
+        self.cursor = (0, 0)
+
+        self.screen = "lobby"
+        self.stats = {"games_started": 0, "games_finished": 0, "defeats": 0, "archives": 0,
+                      "clicks": 0, "keys": 0, "frames": 0, "skills": 0, "items": 0}
+        # 每局耗时：时钟时间与真实时间
+        self.game_times = []
+        self.game_wall_times = []
+        # 对局结束到点击收起之间的时钟秒数
+        self.collapse_latencies = []
+        self._reset_round()
+        logger.info(f"模拟器已启动: {self.layout.width}x{self.layout.height}，{speed} 倍速，每局 {game_minutes} 分钟")
+
+    # ---------- 资源 ----------
+
+    def _load_icons(self, images_dir):
+        icons = {}
+        for name in ITEM_TEMPLATES:
+            bgr = cv2.imread(os.path.join(images_dir, f"{name}.bmp"), cv2.IMREAD_COLOR)
+            if bgr is None:
+                raise FileNotFoundError(f"缺少物品图标: {name}.bmp")
+            icons[name] = cv2.cvtColor(self.layout.scale_image(bgr), cv2.COLOR_BGR2RGB)
+        return icons
+
+    def _make_backgrounds(self, seed, textured=True):
+        """各画面的背景：带固定纹理的底色，亮度不超过 200"""
+        rng = np.random.default_rng(seed)
+        texture = rng.integers(0, 40 if textured else 1, (self.layout.height, self.layout.width, 1), dtype=np.uint8)
+        tints = {"lobby": (60, 50, 90), "ingame": (40, 80, 40), "town": (80, 70, 50), "archive": (90, 40, 40)}
+        return {name: np.clip(texture + np.array(tint, dtype=np.uint8), 0, 200).astype(np.uint8)
+                for name, tint in tints.items()}
+
+    # ---------- 状态 ----------
+
+    def _reset_round(self):
+        self.started_at = None
+        self.ended_at = None
+        self.defeated = False
+        self.store_open = True
+        self.next_store_open = 0
+        self.skill_panel = None
+        self.items = []
+        self.next_item = self.item_interval
+        self.choice = None
+        self.menu_open = False
+        self.dialog = None
+        self.archive_started = None
+
+    def _now(self):
+        return clock.now()
+
+    def game_seconds(self):
+        """当前对局的游戏时间（秒）"""
+        if self.started_at is None:
+            return 0
+        end = self.ended_at if self.ended_at is not None else self._now()
+        return min(self.game_seconds_total, int((end - self.started_at) * self.speed))
+
+    def _advance(self):
+        """推进与时间相关的状态：物品、商店、对局结束、存档结算"""
+        if self.screen == "ingame":
+            seconds = self.game_seconds()
+            while seconds >= self.next_item:
+                self._grant_item(self.random.choice(ITEM_TEMPLATES))
+                self.next_item += self.item_interval
+            if not self.store_open and seconds >= self.next_store_open:
+                self.store_open = True
+            if seconds >= self.game_seconds_total:
+                self.ended_at = self._now()
+                self.defeated = self.random.random() < self.defeat_rate
+                self.screen = "result"
+                self.skill_panel = self.choice = None
+                logger.debug(f"[模拟器] 对局结束，{'失败' if self.defeated else '胜利'}")
+
+    # ---------- 渲染 ----------
+
+    def render(self, bbox=None):
+        """
+        :param bbox: 只渲染该屏幕区域 (x1, y1, x2, y2)，默认整个画面
+        :return: 当前画面（RGB）
+        """
+        with self._lock:
+            self._advance()
+            self.stats["frames"] += 1
+            background = self._backgrounds["ingame" if self.screen == "result" else self.screen]
+            x1, y1, x2, y2 = bbox if bbox is not None else (0, 0, background.shape[1], background.shape[0])
+            canvas = background[y1:y2, x1:x2].copy()
+            if self.screen == "ingame" and self.choice is not None:
+                _paint(canvas, (x1, y1), self.layout.region(ITEM_CHOICES[self.choice][0]), POPUP_COLOR)
+            for text, rect in self._labels():
+                _paint(canvas, (x1, y1), rect, np.array(self.codec.color_of(text), dtype=np.uint8))
+            for rect, color in self._blocks():
+                _paint(canvas, (x1, y1), rect, color)
+            for _, name, rect in self._item_slots():
+                _paint(canvas, (x1, y1), rect, self._icons[name])
+            return canvas
+
+    def _labels(self):
+        """:return: [(文字, 色块位置)]"""
+        region = self.layout.region
+        labels = []
+        if self.screen == "lobby":
+            labels.append(("开始游戏", label_rect("开始游戏", region("common.start_game_button"))))
+        elif self.screen in ("ingame", "result"):
+            seconds = self.game_seconds()
+            clock = f"{seconds // 60:02d}:{seconds % 60:02d}"
+            labels.append((clock, label_rect(clock, region("common.clock"))))
+        if self.screen == "ingame":
+            if self.store_open:
+                labels.append(("升级物品", label_rect("升级物品", region("runtime.upgrade_text"))))
+            if self.skill_panel is not None:
+                labels.append(("刷新", label_rect("刷新", region("runtime.refresh_button"))))
+                labels.extend(self._skill_labels())
+            if self.choice is not None:
+                region_name, text = ITEM_CHOICES[self.choice]
+                labels.append((text, label_rect(text, region(region_name))))
+        elif self.screen == "result":
+            labels.append(("收起", label_rect("收起", region("runtime.collapse_button"))))
+            if self.defeated:
+                labels.append(("失败", label_rect("失败", region("runtime.defeat_text"))))
+        elif self.screen == "archive" and self._archive_done():
+            labels.append(("确定", label_rect("确定", region("archive.confirm_button"))))
+            x1, y1, x2, y2 = region("archive.rewards")
+            middle = (x1 + x2) // 2
+            labels.append(("铜币", label_rect("铜币", (x1, y1, middle, y2))))
+            labels.append(("二阶宝箱", label_rect("二阶宝箱", (middle, y1, x2, y2))))
+        return labels
+
+    def _skill_labels(self):
+        x1, y1, x2, y2 = self.layout.region("runtime.optional_skill")
+        width = (x2 - x1) // len(self.skill_panel)
+        return [(name, label_rect(name, (x1 + i * width, y1, x1 + (i + 1) * width, y2)))
+                for i, name in enumerate(self.skill_panel)]
+
+    def _blocks(self):
+        """:return: [(位置, 颜色)]，菜单按钮与对话框"""
+        blocks = []
+        if self.menu_open:
+            blocks.append((self._button_rect(self.layout.point("archive.enter")), BUTTON_COLOR))
+            blocks.append((self._button_rect(self.layout.point("restart.restart_button")), BUTTON_COLOR))
+        if self.dialog == "archive":
+            blocks.append((self.layout.region("archive.confirm_enter_button"), DIALOG_COLOR))
+        elif self.dialog == "restart":
+            blocks.append((self._button_rect(self.layout.point("restart.confirm")), DIALOG_COLOR))
+        return blocks
+
+    def _button_rect(self, point, half_width=60, half_height=20):
+        x, y = point
+        return (max(0, x - half_width), max(0, y - half_height),
+                min(self.layout.width, x + half_width), min(self.layout.height, y + half_height))
+
+    def _grant_item(self, name):
+        """获得物品：放入第一个空格子，物品栏已满时丢弃"""
+        if None in self.items:
+            self.items[self.items.index(None)] = name
+        elif len(self.items) < ITEM_SLOTS:
+            self.items.append(name)
+
+    def _item_slots(self):
+        """
+        :return: [(格子序号, 模板名, 图标位置)]
+        物品栏格子位置固定：使用物品后格子留空，其余物品不移动
+        """
+        if self.screen != "ingame":
+            return []
+        x1, y1, x2, y2 = self.layout.region("item.bar")
+        pitch = max(icon.shape[1] for icon in self._icons.values()) + 16
+        slots = []
+        for index, name in enumerate(self.items):
+            if name is None:
+                continue
+            height, width = self._icons[name].shape[:2]
+            left = x1 + 8 + index * pitch
+            top = y1 + (y2 - y1 - height) // 2
+            if left + width > x2:
+                break
+            slots.append((index, name, (left, top, left + width, top + height)))
+        return slots
+
+    # ---------- 标注样本 ----------
+
+    def pose(self, screen, rng):
+        """
+        把模拟器摆到指定画面的一个随机状态，用于生成画面分类的标注样本
+        :param screen: lobby、in_game、result、town、archive、archive_result
+        :param rng: random.Random，决定对局时间、商店与弹窗等状态
+        """
+        with self._lock:
+            self._reset_round()
+            now = self._now()
+            if screen == "lobby":
+                self.screen = "lobby"
+            elif screen in ("in_game", "result"):
+                self.screen = "ingame"
+                self.started_at = now - rng.uniform(0, self.game_seconds_total - 1) / self.speed
+                self.next_item = self.game_seconds() + self.item_interval
+                self.store_open = rng.random() < 0.5
+                self.next_store_open = self.game_seconds() + self.store_interval
+                self.items = [rng.choice(ITEM_TEMPLATES) for _ in range(rng.randint(0, ITEM_SLOTS))]
+                panel = rng.random()
+                if panel < 0.25:
+                    self.skill_panel = rng.sample(SKILL_NAMES, 3)
+                elif panel < 0.5:
+                    self.choice = rng.choice([name for name, choice in ITEM_CHOICES.items() if choice is not None])
+                if screen == "result":
+                    self.ended_at = now
+                    self.started_at = now - self.game_seconds_total / self.speed - 0.5
+                    self.defeated = rng.random() < self.defeat_rate
+                    self.screen = "result"
+                    self.skill_panel = self.choice = None
+            elif screen == "town":
+                self.screen = "town"
+                self.menu_open = rng.random() < 0.5
+                if self.menu_open and rng.random() < 0.5:
+                    self.dialog = rng.choice(["archive", "restart"])
+            elif screen in ("archive", "archive_result"):
+                self.screen = "archive"
+                if screen == "archive_result":
+                    elapsed = self.archive_seconds + 1
+                else:
+                    elapsed = rng.uniform(0, self.archive_seconds - 1)
+                self.archive_started = now - elapsed / self.speed
+            else:
+                raise ValueError(f"未知画面: {screen}")
+
+    # ---------- 输入 ----------
+
+    def handle_input(self, event):
+        """
+        处理一个解码后的输入动作
+        :param event: decode_inputs 的单项，如 ("move", x, y)、("left_down", 0)、("key_down", 虚拟键码)
+        """
+        with self._lock:
+            self._advance()
+            action = event[0]
+            if action == "move":
+                self.cursor = (event[1], event[2])
+            elif action == "left_down":
+                self.stats["clicks"] += 1
+                self._on_click(*self.cursor)
+            elif action == "right_down":
+                self.stats["clicks"] += 1
+            elif action == "key_down":
+                self.stats["keys"] += 1
+                self._on_key(self._keys.get(event[1], ""))
+
+    def _hit_point(self, name, x, y):
+        tolerance = CLICK_TOLERANCE * max(self.layout.scale_x, self.layout.scale_y)
+        px, py = self.layout.point(name)
+        return abs(px - x) <= tolerance and abs(py - y) <= tolerance
+
+    @staticmethod
+    def _inside(rect, x, y):
+        x1, y1, x2, y2 = rect
+        return x1 <= x < x2 and y1 <= y < y2
+
+    def _label_at(self, x, y):
+        for text, rect in self._labels():
+            if self._inside(rect, x, y):
+                return text
+        return None
+
+    def _on_click(self, x, y):
+        label = self._label_at(x, y)
+        if self.screen == "lobby":
+            if label == "开始游戏":
+                self._start_game()
+        elif self.screen == "ingame":
+            self._on_ingame_click(label, x, y)
+        elif self.screen == "result":
+            if label == "收起":
+                self._finish_game()
+        elif self.screen == "town":
+            self._on_menu_click(x, y)
+        elif self.screen == "archive":
+            if label == "确定" and self._archive_done():
+                self.stats["archives"] += 1
+                self.screen = "town"
+
+    def _on_ingame_click(self, label, x, y):
+        if self.choice is not None:
+            region_name, text = ITEM_CHOICES[self.choice]
+            if label == text or self._hit_point("item.default_choice", x, y):
+                self.stats["items"] += 1
+                self.choice = None
+            return
+        if self.skill_panel is not None:
+            if label == "刷新":
+                self._roll_skills()
+            elif label in self.skill_panel or self._hit_point("runtime.default_skill", x, y):
+                self.stats["skills"] += 1
+                self.skill_panel = None
+            else:
+                self.skill_panel = None
+            return
+        for index, name, rect in self._item_slots():
+            if self._inside(rect, x, y):
+                self.items[index] = None
+                if ITEM_CHOICES[name] is None:
+                    self.stats["items"] += 1
+                else:
+                    self.choice = name
+                return
+        if label == "升级物品":
+            self.store_open = True
+        elif self._hit_point("runtime.close_store", x, y):
+            # 商店按钮：打开时关闭，关闭时重新打开
+            self.store_open = not self.store_open
+            self.next_store_open = self.game_seconds() + self.store_interval
+        elif self._hit_point("runtime.skill_upgrade_button", x, y):
+            self._roll_skills()
+
+    def _on_menu_click(self, x, y):
+        if self.dialog == "archive":
+            if self._hit_point("archive.confirm_enter", x, y):
+                self.dialog = None
+                self.menu_open = False
+                self.screen = "archive"
+                self.archive_started = self._now()
+        elif self.dialog == "restart":
+            if self._hit_point("restart.confirm", x, y):
+                self._reset_round()
+                self.screen = "lobby"
+        elif self.menu_open:
+            if self._hit_point("archive.enter", x, y):
+                self.dialog = "archive"
+            elif self._hit_point("restart.restart_button", x, y):
+                self.dialog = "restart"
+
+    def _on_key(self, key):
+        if key == "f2" and self.screen == "town" and self.dialog is None:
+            self.menu_open = not self.menu_open
+
+    def _roll_skills(self):
+        self.skill_panel = self.random.sample(SKILL_NAMES, 3)
+
+    def _archive_done(self):
+        return (self.archive_started is not None
+                and (self._now() - self.archive_started) * self.speed >= self.archive_seconds)
+
+    def _start_game(self):
+        self._reset_round()
+        self.screen = "ingame"
+        self.started_at = self._now()
+        self._wall_started = time.perf_counter()
+        self.stats["games_started"] += 1
+        logger.debug(f"[模拟器] 第 {self.stats['games_started']} 局开始")
+
+    def _finish_game(self):
+        self.stats["games_finished"] += 1
+        self.stats["defeats"] += self.defeated
+        self.game_times.append(self._now() - self.started_at)
+        self.game_wall_times.append(time.perf_counter() - self._wall_started)
+        self.collapse_latencies.append(self._now() - self.started_at - self.game_seconds_total / self.speed)
+        self.screen = "town"
+        logger.info(f"[模拟器] 第 {self.stats['games_finished']} 局结束，用时 {self.game_times[-1]:.1f}s"
+                    f"（真实时间 {self.game_wall_times[-1]:.1f}s）")
@@ -0,0 +1,83 @@
+# simulator/labels.py
+"""
+色块文字标签
+模拟器不渲染真实字体，而是把每段文字画成一个纯色块，RGB 三个通道共同编码文字序号。
+每个通道只使用高 5 位，OCR 缓存丢弃像素低位后不同文字仍能区分；R/G 通道只取高值，
+色块亮度明显高于背景，区域签名能感知标签的出现和消失。
+SimulatedOCR 按同一张编码表把色块解码回文字，识别结果的位置、框与真实 OCR 一致。
+"""
+import threading
+
+import numpy as np
+
+# 标签色块 R、G 通道的下限；模拟画面的背景亮度不超过 200，不会与之冲突
+LABEL_MIN_RED = 216
+LABEL_MIN_GREEN = 128
+# 可编码的文字数量：R 5 级 x G 16 级 x B 32 级，序号 0 留空
+LABEL_CAPACITY = 5 * 16 * 32 - 1
+
+
+class LabelCodec:
+    """文字与色块颜色的双向编码表，模拟器与模拟 OCR 共用同一个实例"""
+
+    def __init__(self, texts=()):
+        """:param texts: 按序号预先登记的文字，用于还原保存下来的编码表"""
+        self._ids = {}
+        self._texts = []
+        self._lock = threading.Lock()
+        for text in texts:
+            self.color_of(text)
+
+    @property
+    def texts(self):
+        """:return: 按序号排列的已登记文字"""
+        with self._lock:
+            return list(self._texts)
+
+    def color_of(self, text):
+        """:return: 文字对应的 RGB 颜色"""
+        with self._lock:
+            index = self._ids.get(text)
+            if index is None:
+                if len(self._texts) >= LABEL_CAPACITY:
+                    raise ValueError(f"标签编码已满（{LABEL_CAPACITY} 个文字）")
+                index = self._ids[text] = len(self._texts)
+                self._texts.append(text)
+        index += 1  # 序号 0 留空
+        return ((LABEL_MIN_RED >> 3) + (index >> 9)) << 3, \
+            ((LABEL_MIN_GREEN >> 3) + (index >> 5 & 0xF)) << 3, \
+            (index & 0x1F) << 3
+
+    def text_of(self, red, green, blue):
+        """:return: 颜色对应的文字，未知颜色返回 None"""
+        high = (int(red) >> 3) - (LABEL_MIN_RED >> 3)
+        middle = (int(green) >> 3) - (LABEL_MIN_GREEN >> 3)
+        if high < 0 or not 0 <= middle < 16:
+            return None
+        index = (high << 9 | middle << 5 | int(blue) >> 3) - 1
+        with self._lock:
+            return self._texts[index] if 0 <= index < len(self._texts) else None
+
+
+def label_mask(image):
+    """:return: 可能属于标签色块的像素掩码"""
+    return (image[..., 0] >= LABEL_MIN_RED) & (image[..., 1] >= LABEL_MIN_GREEN)
+
+
+def label_rect(text, region, char_width=14, height=22):
+    """
+    标签色块在区域内居中的位置
+    :return: (x1, y1, x2, y2)
+    """
+    x1, y1, x2, y2 = region
+    width = min(x2 - x1 - 4, char_width * len(text) + 10)
+    height = min(y2 - y1 - 4, height)
+    left = x1 + (x2 - x1 - width) // 2
+    top = y1 + (y2 - y1 - height) // 2
+    return left, top, left + width, top + height
+
+
+def draw_label(canvas, codec, text, rect):
+    """在画布上绘制标签色块"""
+    x1, y1, x2, y2 = rect
+    canvas[y1:y2, x1:x2] = np.array(codec.color_of(text), dtype=np.uint8)
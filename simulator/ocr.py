@@ -0,0 +1,54 @@
+# simulator/ocr.py
+import numpy as np
+
+from simulator.labels import label_mask
+from utils.lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+
+
+class SimulatedOCR:
+    """
+    模拟 OCR 引擎，接口与 PaddleOCR.ocr 一致
+    在图像中查找标签色块并解码为文字；det=False 时与仅识别模式一样把整张图当作一行返回
+    """
+
+    # 小于该像素数的色块视为噪点（如模板图标中的偶然像素）
+    MIN_AREA = 16
+
+    def __init__(self, codec, confidence=0.99):
+        self.codec = codec
+        self.confidence = confidence
+        self.calls = 0
+
+    def _find_labels(self, image):
+        """:return: [(x1, y1, x2, y2, 文字)]，按从上到下、从左到右排序"""
+        image = np.asarray(image)
+        mask = label_mask(image).astype(np.uint8)
+        if not mask.any():
+            return []
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=4)
+        found = []
+        for index in range(1, count):
+            x, y, w, h, area = stats[index]
+            if area < self.MIN_AREA:
+                continue
+            # 取色块中心的颜色，缩放后边缘的插值像素不参与解码
+            cx, cy = (int(round(v)) for v in centroids[index])
+            text = self.codec.text_of(*image[cy, cx])
+            if text is not None:
+                found.append((x, y, x + w, y + h, text))
+        return sorted(found, key=lambda item: (item[1], item[0]))
+
+    def ocr(self, image, det=True, rec=True, cls=False):
+        self.calls += 1
+        found = self._find_labels(image)
+        if not det:
+            text = " ".join(item[4] for item in found)
+            return [[(text, self.confidence if text else 0.0)]]
+        if not found:
+            return [None]
+        return [[
+            [[[x1, y1], [x2, y1], [x2, y2], [x1, y2]], (text, self.confidence)]
+            for x1, y1, x2, y2, text in found
+        ]]
@@ -0,0 +1,70 @@
+# simulator/platform.py
+import tempfile
+
+from simulator.ocr import SimulatedOCR
+from utils.clock_reader import ClockReader
+from utils.frame_source import FrameSource
+from utils.km_controller import decode_inputs
+from utils.platform_backend import PlatformBackend
+from utils.screen_classifier import ScreenClassifier
+
+
+class SimulatedInputBackend:
+    """把 KMController 提交的输入解码后交给模拟器处理"""
+
+    def __init__(self, game):
+        self.game = game
+        self.calls = 0
+
+    def screen_size(self):
+        return self.game.layout.width, self.game.layout.height
+
+    def send(self, inputs, start, count):
+        if not count:
+            return
+        self.calls += 1
+        for event in decode_inputs(inputs[start:start + count], self.screen_size()):
+            self.game.handle_input(event)
+
+
+class SimulatedFrameSource(FrameSource):
+    """从模拟器渲染画面的帧源"""
+
+    def __init__(self, game):
+        super().__init__((0, 0, game.layout.width, game.layout.height))
+        self.game = game
+
+    def _capture(self):
+        return self.game.render()
+
+    def grab(self, x1, y1, x2, y2):
+        return self.game.render((x1, y1, x2, y2))
+
+
+class SimulatorPlatform(PlatformBackend):
+    """
+    模拟器平台：输入注入到 SimulatedGame，截图取自其渲染结果，OCR 解码色块标签
+    时钟以单个色块渲染，字形读取器无法切分字符，读数总是回退到模拟 OCR；字形目录使用空的临时目录
+    """
+
+    name = "simulator"
+
+    def __init__(self, game, clock=None):
+        """
+        :param clock: 安装到 utils.clock 的时钟，如 VirtualClock；None 表示使用真实时间
+        """
+        self.game = game
+        self.clock = clock
+        self.ocr_engine = SimulatedOCR(game.codec)
+        self.clock_reader = ClockReader(glyph_dir=tempfile.mkdtemp(prefix="sim_glyphs_"), save_learned=False)
+        # 画面参考帧只在内存中学习，不写入实机的参考帧文件
+        self.screen_classifier = ScreenClassifier(reference_path=None)
+
+    def game_rect(self, window_title=None):
+        return 0, 0, self.game.layout.width, self.game.layout.height
+
+    def create_input(self):
+        return SimulatedInputBackend(self.game)
+
+    def create_frame_source(self):
+        return SimulatedFrameSource(self.game)
@@ -0,0 +1,139 @@
+# simulator/run.py
+"""
+在模拟器上端到端运行自动化流程
+SimulatedGame 代替游戏画面、SimulatorPlatform 代替 SendInput/ImageGrab/PaddleOCR，
+GameAutomation 的主循环与实机完全相同。跑完指定局数后统计每小时局数、每局耗时、
+动作响应延迟与 OCR 调用次数，用于在没有游戏的机器上比较各项优化的端到端效果。
+默认安装虚拟时钟：所有等待都只推进虚拟时间，一局 20 分钟的游戏几秒内跑完，
+统计的每局耗时与每小时局数按虚拟时间计算，即实机上应有的数值。
+--real-time 改用真实时间，此时可用 --speed 加快游戏时钟。
+
+用法:
+    python -m simulator.run [--games N] [--game-minutes M] [--seed S] [--output report.json]
+    python -m simulator.run --real-time --speed 20 --trace logs/traces
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from loguru import logger
+
+from game_components.game_automation import GameAutomation
+from simulator.game import SimulatedGame
+from simulator.platform import SimulatorPlatform
+from utils import clock, layout, tracer
+from utils.clock import RealClock, VirtualClock
+
+
+# 模拟画面的分辨率
+RESOLUTION = (1920, 1080)
+
+
+def run(games=3, speed=1.0, game_minutes=20, seed=0, defeat_rate=0.2, config=None, timeout=None,
+        resolution=RESOLUTION, real_time=False):
+    """
+    :param games: 运行局数
+    :param speed: 游戏时钟倍速
+    :param config: 覆盖 GameAutomation 的默认配置
+    :param timeout: 最长运行的真实秒数，默认按局数估算
+    :param real_time: 使用真实时间而不是虚拟时钟
+    :return: 统计结果 dict
+    """
+    layout.configure(resolution)
+    game = SimulatedGame(speed=speed, game_minutes=game_minutes, defeat_rate=defeat_rate, seed=seed)
+    platform = SimulatorPlatform(game, clock=RealClock() if real_time else VirtualClock())
+    # 模拟运行默认不写入实机的运行指标库，需要时用 metrics_db 指定文件
+    automation_config = {"difficulty": 6, "use_gold": True, "ocr_workers": 0,
+                         "metrics_db": None}
+    automation_config.update(config or {})
+    automation = GameAutomation(automation_config, platform=platform)
+
+    def main_loop():
+        # 主线程在第一次等待之前就登记，避免虚拟时间在它运行时被其他线程推进
+        clock.current().attach()
+        automation.main_loop()
+
+    worker = threading.Thread(target=main_loop, name="automation")
+    started = time.perf_counter()
+    clock_started = clock.now()
+    worker.start()
+    if timeout is None:
+        timeout = games * (600 if not real_time else game_minutes * 60 / speed + 300)
+    deadline = started + timeout
+    while game.stats["games_finished"] < games and time.perf_counter() < deadline and worker.is_alive():
+        time.sleep(0.2)
+    elapsed = time.perf_counter() - started
+    clock_elapsed = clock.now() - clock_started
+    automation.stop()
+    stop_started = time.perf_counter()
+    worker.join(timeout=10)
+    stop_latency = time.perf_counter() - stop_started
+    if worker.is_alive():
+        logger.warning("自动化线程未在 10 秒内停止")
+
+    finished = game.stats["games_finished"]
+    game_times = game.game_times[:finished]
+    report = {
+        "games": finished,
+        "clock": clock.current().name,
+        "elapsed_s": elapsed,
+        "clock_s": clock_elapsed,
+        "speedup": clock_elapsed / elapsed if elapsed else 0.0,
+        "games_per_hour": finished / clock_elapsed * 3600 if clock_elapsed else 0.0,
+        "mean_game_s": statistics.mean(game_times) if game_times else 0.0,
+        "game_s": game_times,
+        "game_wall_s": game.game_wall_times[:finished],
+        "collapse_latency_s": game.collapse_latencies[:finished],
+        "speed": speed,
+        "game_minutes": game_minutes,
+        "simulator": dict(game.stats),
+        "ocr_calls": platform.ocr_engine.calls,
+        "ocr_cache": automation.vision.ocr_cache_stats(),
+        "actions": automation.km_controller.latency.stats(),
+        "item_passes": automation.phases["收起"].item_mgr.stats,
+        "stop_latency_s": stop_latency,
+    }
+    if finished < games:
+        logger.warning(f"模拟运行未完成: {finished}/{games} 局，当前画面 {game.screen}")
+    tracer.dump()  # 写出未完成的最后一局
+    automation.cleanup()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在模拟器上端到端运行自动化流程")
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--speed", type=float, default=1.0, help="游戏时钟倍速")
+    parser.add_argument("--real-time", action="store_true", help="使用真实时间而不是虚拟时钟")
+    parser.add_argument("--game-minutes", type=float, default=20)
+    parser.add_argument("--defeat-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--resolution", default="1920x1080", help="模拟画面分辨率，如 2560x1440")
+    parser.add_argument("--output", help="把统计结果写入 JSON 文件")
+    parser.add_argument("--trace", metavar="DIR", help="每局写出 Chrome Trace 时间线到该目录")
+    parser.add_argument("--metrics-db", help="把每局指标写入该 SQLite 文件")
+    parser.add_argument("--serial-runtime", action="store_true", help="资源收集阶段使用串行流程，用于对比流水线")
+    args = parser.parse_args()
+
+    resolution = tuple(int(v) for v in args.resolution.lower().split("x"))
+    config = {"metrics_db": args.metrics_db, "pipelined_runtime": not args.serial_runtime}
+    if args.trace:
+        config.update(trace=True, trace_dir=args.trace)
+    report = run(args.games, args.speed, args.game_minutes, args.seed, args.defeat_rate, config=config,
+                 resolution=resolution, real_time=args.real_time)
+    logger.info(f"完成 {report['games']} 局，{report['clock']} 时钟 {report['clock_s']:.1f}s"
+                f"（真实时间 {report['elapsed_s']:.1f}s，加速 {report['speedup']:.1f} 倍），"
+                f"每小时 {report['games_per_hour']:.1f} 局，平均每局 {report['mean_game_s']:.1f}s，"
+                f"OCR 调用 {report['ocr_calls']} 次")
+    if report["collapse_latency_s"]:
+        logger.info(f"对局结束到点击收起: 平均 {statistics.mean(report['collapse_latency_s']):.2f}s，"
+                    f"最长 {max(report['collapse_latency_s']):.2f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
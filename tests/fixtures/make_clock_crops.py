@@ -0,0 +1,60 @@
+# tests/fixtures/make_clock_crops.py
+"""
+生成时钟识别测试用的标注截图
+游戏时钟为深色背景上的浅色等宽数字；这里按 1920x1080 下时钟区域的尺寸渲染同样形式的图片，
+并加入背景纹理、亮度变化与 1 像素以内的位置抖动。文件名即标注（冒号写作 '-'），
+与 utils.clock_reader.evaluate 的约定一致。train/ 覆盖 0~9 全部数字，用于学习字形；test/ 用于评估。
+实机截取的时钟图片可按同样的命名直接放入 test/。
+
+用法:
+    python -m tests.fixtures.make_clock_crops
+"""
+import os
+import random
+
+import cv2
+import numpy as np
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clock")
+# 1920x1080 下 common.clock 区域的尺寸
+CROP_SIZE = (118, 27)
+# 数字与冒号的字符宽度（像素）
+DIGIT_ADVANCE = 18
+COLON_ADVANCE = 10
+
+TRAIN_TIMES = ["01:23", "04:56", "07:59", "10:00", "23:47", "38:16", "09:05"]
+TEST_TIMES = ["00:00", "00:59", "01:07", "02:30", "03:14", "05:55", "06:42", "08:08", "09:19", "11:11",
+              "12:34", "13:57", "14:26", "15:03", "16:48", "17:21", "18:39", "19:50", "20:00", "24:12"]
+
+
+def render(text, rng):
+    """:return: RGB 时钟图片"""
+    width, height = CROP_SIZE
+    background = rng.randint(10, 40)
+    image = np.random.default_rng(rng.randint(0, 2 ** 31)).integers(
+        background, background + 15, (height, width, 3)).astype(np.uint8)
+    color = (rng.randint(200, 255),) * 3
+    # 等宽排列：每个字符占固定宽度，冒号较窄，与游戏时钟一致
+    advances = [DIGIT_ADVANCE if char != ":" else COLON_ADVANCE for char in text]
+    x = (width - sum(advances)) // 2 + rng.randint(-1, 1)
+    y = height - 5 + rng.randint(-1, 0)
+    for char, advance in zip(text, advances):
+        (char_width, _), _ = cv2.getTextSize(char, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        cv2.putText(image, char, (x + (advance - char_width) // 2, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2,
+                    cv2.LINE_AA)
+        x += advance
+    return image
+
+
+def main(seed=0):
+    rng = random.Random(seed)
+    for subset, times in (("train", TRAIN_TIMES), ("test", TEST_TIMES)):
+        directory = os.path.join(FIXTURE_DIR, subset)
+        os.makedirs(directory, exist_ok=True)
+        for index, text in enumerate(times):
+            path = os.path.join(directory, f"{text.replace(':', '-')}_{index:02d}.png")
+            cv2.imwrite(path, cv2.cvtColor(render(text, rng), cv2.COLOR_RGB2BGR))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# tests/test_clock_reader.py
+"""时钟字形读取器：从标注截图学习字形后，在评估集上检查准确率与单次读取耗时"""
+import os
+
+from tests.fixtures.make_clock_crops import FIXTURE_DIR
+from utils.clock_reader import ClockReader, _labelled_crops, evaluate
+
+TRAIN_DIR = os.path.join(FIXTURE_DIR, "train")
+TEST_DIR = os.path.join(FIXTURE_DIR, "test")
+
+
+def test_evaluate_accuracy_and_latency(tmp_path):
+    reader = ClockReader(glyph_dir=str(tmp_path))
+    stats = evaluate(TEST_DIR, reader, train_dir=TRAIN_DIR)
+    assert reader.ready
+    assert stats["total"] >= 20
+    assert stats["wrong"] == 0
+    assert stats["accuracy"] >= 0.95
+    assert stats["p95_ms"] < 2.0
+
+
+def test_no_read_before_glyph_set_is_complete(tmp_path):
+    reader = ClockReader(glyph_dir=str(tmp_path))
+    _, label, image = _labelled_crops(TRAIN_DIR)[0]
+    reader.learn(image, label, 1.0)
+    assert not reader.ready
+    assert reader.read(image) == (None, 0, 0.0)
+
+
+def test_learns_only_from_confident_well_formed_reads(tmp_path):
+    reader = ClockReader(glyph_dir=str(tmp_path))
+    _, label, image = _labelled_crops(TRAIN_DIR)[0]
+    assert reader.learn(image, label, 0.5) == ""
+    assert reader.learn(image, "01:73", 1.0) == ""
+    assert reader.learn(image, label, 1.0)
+    # 默认不写入字形目录
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,13 @@
+# tests/test_vision_bench.py
+"""视觉基准：在模拟器语料上回放，全部人工标注的场景都应识别正确"""
+from benchmarks.make_sim_corpus import SIM_CORPUS_DIR
+from benchmarks.vision_bench import run
+
+
+def test_simulated_corpus_matches_labels():
+    report = run(SIM_CORPUS_DIR, repeat=1, simulated_ocr=True)
+    labelled = 0
+    for key, stats in report.items():
+        assert stats["fp"] == stats["fn"] == stats["mismatch"] == 0, key
+        labelled += stats["tp"] + stats["tn"] + stats["match"]
+    assert labelled >= 100
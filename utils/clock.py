@@ -0,0 +1,147 @@
+# utils/clock.py
+"""
+可替换的时钟
+自动化流程中所有的等待与计时都经由当前时钟：实机使用 RealClock（直接转发到 time 模块），
+模拟与回放时安装 VirtualClock，时间只在所有参与线程都在等待时跳到下一个唤醒时刻，
+一局 20 分钟的游戏几秒内即可跑完，各线程的先后顺序只由虚拟时间决定。
+用法:
+    from utils import clock
+    clock.sleep(5)
+    deadline = clock.now() + timeout
+"""
+import threading
+import time
+
+# 等待事件时重新检查的真实时间间隔：事件可能由不经过时钟的线程（如界面线程）设置
+_EVENT_POLL = 0.05
+
+
+class RealClock:
+    """真实时钟"""
+
+    name = "real"
+
+    def now(self):
+        """:return: 单调时间（秒）"""
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def sleep_until(self, deadline):
+        """睡眠到 now() 的指定时刻，最后 2 毫秒自旋等待以保证精度"""
+        remaining = deadline - time.perf_counter()
+        if remaining > 0.002:
+            time.sleep(remaining - 0.002)
+        while time.perf_counter() < deadline:
+            pass
+
+    def wait(self, event, timeout=None):
+        """
+        等待 threading.Event
+        :return: 事件是否已设置
+        """
+        return event.wait(timeout)
+
+    def attach(self):
+        """把当前线程登记为参与线程，真实时钟下无需登记"""
+
+
+class VirtualClock:
+    """
+    虚拟时钟
+    参与线程都阻塞在 sleep/wait 上时，时间直接跳到最早的唤醒时刻并唤醒对应线程；
+    只要还有参与线程在运行，时间就不推进。线程第一次调用 sleep/wait 时自动登记，
+    也可以在线程开始时调用 attach() 提前登记；线程结束后自动退出。
+    """
+
+    name = "virtual"
+
+    def __init__(self, start=0.0):
+        self._now = start
+        self._cond = threading.Condition()
+        self._threads = set()
+        # 正在等待的线程 -> (唤醒时刻或 None, 事件或 None)
+        self._sleepers = {}
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        self._block(self._now + max(0.0, seconds), None)
+
+    def sleep_until(self, deadline):
+        self._block(deadline, None)
+
+    def wait(self, event, timeout=None):
+        if event.is_set():
+            return True
+        self._block(None if timeout is None else self._now + timeout, event)
+        return event.is_set()
+
+    def attach(self):
+        with self._cond:
+            self._threads.add(threading.current_thread())
+
+    def _block(self, deadline, event):
+        me = threading.current_thread()
+        with self._cond:
+            self._threads.add(me)
+            self._sleepers[me] = (deadline, event)
+            self._advance()
+            while me in self._sleepers:
+                self._cond.wait(_EVENT_POLL)
+                if me in self._sleepers:
+                    self._advance()
+
+    def _advance(self):
+        """唤醒已满足条件的线程；所有参与线程都在等待时把时间推进到最早的唤醒时刻"""
+        if not self._wake():
+            self._threads = {thread for thread in self._threads if thread.is_alive()}
+            if any(thread not in self._sleepers for thread in self._threads):
+                return
+            deadlines = [deadline for deadline, _ in self._sleepers.values() if deadline is not None]
+            if not deadlines:
+                return
+            self._now = max(self._now, min(deadlines))
+            self._wake()
+        self._cond.notify_all()
+
+    def _wake(self):
+        """:return: 是否唤醒了线程"""
+        ready = [thread for thread, (deadline, event) in self._sleepers.items()
+                 if (deadline is not None and deadline <= self._now) or (event is not None and event.is_set())]
+        for thread in ready:
+            del self._sleepers[thread]
+        return bool(ready)
+
+
+_current = RealClock()
+
+
+def install(clock):
+    """设置当前时钟，启动时调用一次；:return: clock"""
+    global _current
+    _current = clock
+    return clock
+
+
+def current():
+    return _current
+
+
+def now():
+    return _current.now()
+
+
+def sleep(seconds):
+    _current.sleep(seconds)
+
+
+def sleep_until(deadline):
+    _current.sleep_until(deadline)
+
+
+def wait(event, timeout=None):
+    return _current.wait(event, timeout)
@@ -0,0 +1,250 @@
+# utils/clock_reader.py
+import glob
+import os
+import re
+import sys
+import time
+
+import numpy as np
+from loguru import logger
+
+from utils.lazy_import import lazy_module
+from utils.template_registry import IMAGES_DIR
+
+cv2 = lazy_module("cv2")
+
+# 数字字形模板目录，文件名为 0.png ~ 9.png
+GLYPH_DIR = os.path.join(IMAGES_DIR, "clock_glyphs")
+# 字形归一化尺寸 (宽, 高)
+GLYPH_SIZE = (10, 16)
+# 可用于学习字形的时钟文本：分钟 1~2 位，秒 00~59
+CLOCK_PATTERN = re.compile(r"^\d{1,2}:[0-5]\d$")
+
+
+class ClockReader:
+    """
+    游戏时钟快速读取器
+    对时钟区域二值化后按列投影切分字符，每个数字缩放到固定尺寸后与 0~9 的字形模板
+    做归一化相关匹配。全部字形齐备时单次读取耗时远低于 1 毫秒。
+    字形模板可预先放在 images/clock_glyphs/，也可以在运行中由 PaddleOCR 的高置信度识别结果学习。
+    字形未齐备时不做识别：未掌握的数字会被硬匹配到最相近的字形，得到看似可信的错误时间。
+    """
+
+    def __init__(self, glyph_dir=GLYPH_DIR, min_confidence=0.8, save_learned=False, learn_confidence=0.9):
+        """
+        :param glyph_dir: 字形模板目录
+        :param min_confidence: 低于该置信度时视为无法识别，由调用方回退到 OCR
+        :param save_learned: 学到新字形时是否写入字形目录；默认只在本次运行中使用
+        :param learn_confidence: 只用 OCR 置信度不低于该值的结果学习字形
+        """
+        self.glyph_dir = glyph_dir
+        self.min_confidence = min_confidence
+        self.save_learned = save_learned
+        self.learn_confidence = learn_confidence
+        self._glyphs = {}
+        self._matrix = None
+        self._labels = []
+        self.load_glyphs()
+
+    def load_glyphs(self):
+        """从字形目录加载模板"""
+        for path in sorted(glob.glob(os.path.join(self.glyph_dir, "*.png"))):
+            label = os.path.splitext(os.path.basename(path))[0]
+            if len(label) != 1 or not label.isdigit():
+                continue
+            glyph = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if glyph is not None:
+                self._glyphs[label] = self._normalize(glyph > 127)
+        self._rebuild()
+        if self._glyphs:
+            logger.info(f"时钟字形已加载: {''.join(sorted(self._glyphs))}")
+
+    @property
+    def ready(self):
+        """0~9 全部字形是否齐备"""
+        return len(self._glyphs) == 10
+
+    def read(self, image):
+        """
+        读取时钟
+        :param image: 时钟区域 RGB 图像
+        :return: (时间文本, 总秒数, 置信度)；字形未齐备或任一字符低于 min_confidence 时返回 (None, 0, 0.0)
+        """
+        if not self.ready:
+            return None, 0, 0.0
+        cells = self._segment(image)
+        if cells is None:
+            return None, 0, 0.0
+
+        text = ""
+        confidence = 1.0
+        for cell in cells:
+            if cell is None:
+                text += ":"
+                continue
+            scores = self._matrix @ self._normalize(cell)
+            best = int(np.argmax(scores))
+            if scores[best] < self.min_confidence:
+                return None, 0, 0.0
+            text += self._labels[best]
+            confidence = min(confidence, float(scores[best]))
+
+        seconds = self._to_seconds(text)
+        if seconds is None:
+            return None, 0, 0.0
+        return text, seconds, confidence
+
+    def learn(self, image, text, confidence):
+        """
+        用已确认的识别结果（如 PaddleOCR 读出的 "12:34"）学习尚未掌握的数字字形
+        只接受置信度不低于 learn_confidence、格式合法的结果
+        :param confidence: OCR 给出的置信度
+        :return: 新学到的数字
+        """
+        if confidence < self.learn_confidence or not CLOCK_PATTERN.match(text):
+            return ""
+        cells = self._segment(image)
+        if cells is None or len(cells) != len(text):
+            return ""
+        for cell, char in zip(cells, text):
+            if (cell is None) != (char == ":"):
+                return ""
+        learned = ""
+        for cell, char in zip(cells, text):
+            if cell is None or char in self._glyphs:
+                continue
+            self._glyphs[char] = self._normalize(cell)
+            learned += char
+            if self.save_learned:
+                self._save_glyph(char, cell)
+        if learned:
+            self._rebuild()
+            logger.info(f"学到时钟字形: {learned}，已掌握 {''.join(sorted(self._glyphs))}")
+        return learned
+
+    def _save_glyph(self, char, cell):
+        try:
+            os.makedirs(self.glyph_dir, exist_ok=True)
+            cv2.imwrite(os.path.join(self.glyph_dir, f"{char}.png"), cell.astype(np.uint8) * 255)
+        except OSError as e:
+            logger.warning(f"保存时钟字形失败: {e}")
+
+    def _rebuild(self):
+        self._labels = sorted(self._glyphs)
+        self._matrix = np.stack([self._glyphs[k] for k in self._labels]) if self._labels else None
+
+    @staticmethod
+    def _normalize(cell):
+        """缩放到固定尺寸并做零均值、单位范数，使点积即为相关系数"""
+        glyph = cv2.resize(cell.astype(np.float32), GLYPH_SIZE, interpolation=cv2.INTER_AREA).ravel()
+        glyph -= glyph.mean()
+        norm = np.linalg.norm(glyph)
+        return glyph / norm if norm > 0 else glyph
+
+    @staticmethod
+    def _segment(image):
+        """
+        二值化并切分字符
+        :return: 字符二值图列表，冒号位置为 None；切分失败返回 None
+        """
+        gray = cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY)
+        _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        # 时钟为深色背景上的浅色文字，前景占多数时说明阈值方向反了
+        if binary.mean() > 0.5:
+            binary = 1 - binary
+
+        columns = binary.any(axis=0)
+        spans = []
+        start = None
+        for i, filled in enumerate(columns):
+            if filled and start is None:
+                start = i
+            elif not filled and start is not None:
+                spans.append((start, i))
+                start = None
+        if start is not None:
+            spans.append((start, len(columns)))
+        if len(spans) < 3:
+            return None
+
+        max_width = max(right - left for left, right in spans)
+        cells = []
+        for left, right in spans:
+            cell = binary[:, left:right]
+            rows = np.flatnonzero(cell.any(axis=1))
+            cell = cell[rows[0]:rows[-1] + 1]
+            # 冒号：窄且纵向中间断开的两个点
+            if right - left < 0.6 * max_width and not cell.any(axis=1).all():
+                cells.append(None)
+            else:
+                cells.append(cell)
+        if all(cell is not None for cell in cells) or cells[0] is None or cells[-1] is None:
+            return None
+        return cells
+
+    @staticmethod
+    def _to_seconds(text):
+        parts = text.split(":")
+        if not all(part.isdigit() for part in parts):
+            return None
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + int(part)
+        return seconds
+
+
+def _labelled_crops(crop_dir):
+    """
+    :return: [(路径, 标注, RGB 图像)]
+    图片文件名即标注，冒号写作 '-'，'_' 之后为任意后缀，例如 12-34.png、03-05_a.png
+    """
+    crops = []
+    for path in sorted(glob.glob(os.path.join(crop_dir, "*.png"))):
+        label = os.path.splitext(os.path.basename(path))[0].split("_")[0].replace("-", ":")
+        crops.append((path, label, cv2.cvtColor(cv2.imread(path, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)))
+    return crops
+
+
+def evaluate(crop_dir, reader=None, train_dir=None):
+    """
+    用截取的时钟图片评估准确率与耗时，命名规则见 _labelled_crops
+    :param train_dir: 先用该目录中的标注图片学习字形（视为置信度 1 的识别结果）；
+                      字形目录中已有全部字形时可省略，否则字形不齐备，全部读取都会回退
+    :return: 统计结果 dict
+    """
+    reader = reader if reader is not None else ClockReader()
+    if train_dir is not None:
+        for _, label, image in _labelled_crops(train_dir):
+            reader.learn(image, label, 1.0)
+    crops = _labelled_crops(crop_dir)
+    correct = fallback = 0
+    latencies = []
+    for path, expected, image in crops:
+        start = time.perf_counter()
+        text, _, confidence = reader.read(image)
+        latencies.append(time.perf_counter() - start)
+        if text is None or confidence < reader.min_confidence:
+            fallback += 1
+        elif text == expected:
+            correct += 1
+        else:
+            logger.warning(f"识别错误: {path} 识别为 {text}（置信度 {confidence:.2f}）")
+
+    latencies.sort()
+    total = len(crops)
+    stats = {
+        "total": total,
+        "correct": correct,
+        "fallback": fallback,
+        "wrong": total - correct - fallback,
+        "accuracy": correct / total if total else 0.0,
+        "mean_ms": sum(latencies) / total * 1000 if total else 0.0,
+        "p95_ms": latencies[min(total - 1, int(total * 0.95))] * 1000 if total else 0.0,
+    }
+    logger.info(f"时钟识别评估: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    # python -m utils.clock_reader <时钟截图目录> [学习字形用的截图目录]
+    evaluate(sys.argv[1], train_dir=sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,183 @@
+# utils/frame_source.py
+import glob
+import os
+import threading
+
+import numpy as np
+from loguru import logger
+
+from utils import clock, layout, tracer
+
+
+def region_signature(region, step=4):
+    """
+    区域的廉价签名：隔 step 个像素采样后的灰度图
+    :param region: RGB 图像或视图
+    :return: int16 数组，用于 signature_distance 比较
+    """
+    sampled = region[::step, ::step].astype(np.int16)
+    # 整数近似灰度 (R*2 + G*5 + B) / 8
+    return (sampled[..., 0] * 2 + sampled[..., 1] * 5 + sampled[..., 2]) >> 3
+
+
+def signature_distance(a, b):
+    """两个签名的平均绝对差（0~255），尺寸不同视为完全不同"""
+    if a is None or b is None or a.shape != b.shape:
+        return 255.0
+    return float(np.abs(a - b).mean())
+
+
+class FrameSource:
+    """
+    帧源基类
+    refresh() 抓取一整帧游戏画面，crop() 返回该帧中指定区域的零拷贝 NumPy 视图。
+    帧的刷新时机完全由调用方决定。grab() 只截取一个区域，不影响当前帧，供只关心少数区域的后台监测使用。
+    """
+
+    def __init__(self, bbox):
+        self.bbox = tuple(bbox)
+        self._frame = None
+        self._frame_id = 0
+        self._frame_time = 0.0
+        self._lock = threading.Lock()
+
+    def _capture(self):
+        """抓取一帧 RGB 图像，由子类实现"""
+        raise NotImplementedError
+
+    def refresh(self):
+        """
+        抓取新的一帧并设为当前帧
+        :return: 新帧（H x W x 3 的 RGB 数组）
+        """
+        with tracer.span("capture", "vision"):
+            frame = np.asarray(self._capture())
+        with self._lock:
+            self._frame = frame
+            self._frame_id += 1
+            self._frame_time = clock.now()
+        return frame
+
+    def grab(self, x1, y1, x2, y2):
+        """
+        只截取指定屏幕区域，不更新当前帧
+        默认抓取整帧后裁剪，能直接截取区域的子类应覆盖此方法
+        :return: RGB 图像
+        """
+        ox, oy = self.bbox[0], self.bbox[1]
+        return np.asarray(self._capture())[y1 - oy:y2 - oy, x1 - ox:x2 - ox]
+
+    @property
+    def frame(self):
+        """当前帧，尚未抓取时自动抓取一次"""
+        with self._lock:
+            frame = self._frame
+        if frame is None:
+            frame = self.refresh()
+        return frame
+
+    @property
+    def frame_id(self):
+        """当前帧序号，每次 refresh() 加一"""
+        return self._frame_id
+
+    @property
+    def frame_age(self):
+        """当前帧距今的秒数"""
+        return clock.now() - self._frame_time
+
+    def crop(self, x1, y1, x2, y2, frame=None):
+        """
+        返回指定屏幕区域的视图（不复制像素）
+        :param x1: 区域左上角的 x 坐标（屏幕坐标）
+        :param y1: 区域左上角的 y 坐标
+        :param x2: 区域右下角的 x 坐标
+        :param y2: 区域右下角的 y 坐标
+        :param frame: 指定帧，默认使用当前帧
+        :return: frame[y1:y2, x1:x2] 视图
+        """
+        if frame is None:
+            frame = self.frame
+        ox, oy = self.bbox[0], self.bbox[1]
+        left, top, right, bottom = x1 - ox, y1 - oy, x2 - ox, y2 - oy
+        height, width = frame.shape[:2]
+        if not (0 <= left < right <= width and 0 <= top < bottom <= height):
+            raise ValueError(f"区域 ({x1}, {y1}, {x2}, {y2}) 超出游戏画面 {self.bbox}")
+        return frame[top:bottom, left:right]
+
+
+class ScreenFrameSource(FrameSource):
+    """通过 ImageGrab 截取桌面游戏区域"""
+
+    def __init__(self, bbox=None):
+        """
+        :param bbox: 截取范围，默认为布局中的整个游戏画面
+        """
+        super().__init__(bbox if bbox is not None else layout.current().region("game_area"))
+        from PIL import ImageGrab
+        self._grab = ImageGrab.grab
+
+    def _capture(self):
+        return np.asarray(self._grab(bbox=self.bbox))
+
+    def grab(self, x1, y1, x2, y2):
+        return np.asarray(self._grab(bbox=(x1, y1, x2, y2)))
+
+
+class FileFrameSource(FrameSource):
+    """
+    文件回放帧源，按顺序读取保存的截图（PNG/BMP）
+    用于在没有游戏的 Linux 机器上测试视觉模块
+    """
+
+    def __init__(self, paths, loop=True, preload=False):
+        """
+        :param paths: 截图目录、单个文件路径或文件路径列表
+        :param loop: 播放到最后一帧后是否从头开始，否则停留在最后一帧
+        :param preload: 是否一次性解码全部截图到内存
+        """
+        if isinstance(paths, str):
+            if os.path.isdir(paths):
+                paths = sorted(
+                    p for ext in ("png", "bmp", "jpg")
+                    for p in glob.glob(os.path.join(paths, f"*.{ext}"))
+                )
+            else:
+                paths = [paths]
+        self.paths = list(paths)
+        if not self.paths:
+            raise ValueError("回放帧源没有可用的截图文件")
+        self.loop = loop
+        self._index = 0
+        self._cache = {}
+        if preload:
+            for path in self.paths:
+                self._cache[path] = self._load(path)
+
+        height, width = self._load(self.paths[0]).shape[:2]
+        super().__init__((0, 0, width, height))
+        logger.debug(f"回放帧源已加载 {len(self.paths)} 张截图，尺寸 {width}x{height}")
+
+    def _load(self, path):
+        frame = self._cache.get(path)
+        if frame is None:
+            from PIL import Image
+            with Image.open(path) as img:
+                frame = np.asarray(img.convert("RGB"))
+        return frame
+
+    @property
+    def current_path(self):
+        """最近一次 refresh() 读取的文件"""
+        return self.paths[(self._index - 1) % len(self.paths)]
+
+    def seek(self, index):
+        """跳到指定序号，下一次 refresh() 将读取该文件"""
+        self._index = index % len(self.paths)
+
+    def _capture(self):
+        if self._index >= len(self.paths):
+            self._index = 0 if self.loop else len(self.paths) - 1
+        path = self.paths[self._index]
+        self._index += 1
+        return self._load(path)
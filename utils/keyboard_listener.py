@@ -1,8 +1,13 @@
 from pynput import keyboard
 
 class KeyboardListener:
-    def __init__(self, toggle_pause_callback):
+    def __init__(self, toggle_pause_callback, stop_callback=None):
+        """
+        :param toggle_pause_callback: F11 暂停/恢复
+        :param stop_callback: F12 停止自动化流程
+        """
         self.toggle_pause_callback = toggle_pause_callback
+        self.stop_callback = stop_callback
         self.listener = keyboard.Listener(
             on_press=self.on_key_press)
 
@@ -11,6 +16,8 @@ class KeyboardListener:
         try:
             if key == keyboard.Key.f11:
                 self.toggle_pause_callback()
+            elif key == keyboard.Key.f12 and self.stop_callback is not None:
+                self.stop_callback()
         except AttributeError:
             pass
 
@@ -18,4 +25,4 @@ class KeyboardListener:
         self.listener.start()
 
     def stop(self):
-        self.listener.stop()
\ No newline at end of file
+        self.listener.stop()
@@ -1,12 +1,13 @@
 import ctypes
-import time
 from loguru import logger
 
 
+from utils import clock, layout, tracer
+from utils.postconditions import ActionLatencyLog
 from utils.state_manager import StateManager
 
-# Windows API 常量和结构定义
-user32 = ctypes.windll.user32
+# Windows API 常量和结构定义；非 Windows 平台上没有 user32，只能使用记录后端
+user32 = ctypes.windll.user32 if hasattr(ctypes, "windll") else None
 
 INPUT_MOUSE = 0
 INPUT_KEYBOARD = 1
@@ -22,6 +23,56 @@ MOUSEEVENTF_WHEEL = 0x0800
 KEYEVENTF_KEYDOWN = 0x0000
 KEYEVENTF_KEYUP = 0x0002
 
+# 按下到弹起之间的保持时间，游戏需要看到按键处于按下状态
+PRESS_DURATION = 0.02
+
+# 虚拟键码表
+VK_CODES = {
+    # 字母
+    'a': 0x41, 'b': 0x42, 'c': 0x43, 'd': 0x44, 'e': 0x45,
+    'f': 0x46, 'g': 0x47, 'h': 0x48, 'i': 0x49, 'j': 0x4A,
+    'k': 0x4B, 'l': 0x4C, 'm': 0x4D, 'n': 0x4E, 'o': 0x4F,
+    'p': 0x50, 'q': 0x51, 'r': 0x52, 's': 0x53, 't': 0x54,
+    'u': 0x55, 'v': 0x56, 'w': 0x57, 'x': 0x58, 'y': 0x59, 'z': 0x5A,
+
+    # 数字
+    '0': 0x30, '1': 0x31, '2': 0x32, '3': 0x33, '4': 0x34,
+    '5': 0x35, '6': 0x36, '7': 0x37, '8': 0x38, '9': 0x39,
+
+    # 功能键
+    'f1': 0x70, 'f2': 0x71, 'f3': 0x72, 'f4': 0x73, 'f5': 0x74,
+    'f6': 0x75, 'f7': 0x76, 'f8': 0x77, 'f9': 0x78, 'f10': 0x79,
+    'f11': 0x7A, 'f12': 0x7B,
+
+    # 控制键
+    'ctrl': 0x11, 'shift': 0x10, 'alt': 0x12,
+    'enter': 0x0D, 'esc': 0x1B, 'tab': 0x09, 'space': 0x20,
+    'backspace': 0x08,
+
+    # 方向键
+    'left': 0x25, 'up': 0x26, 'right': 0x27, 'down': 0x28,
+
+    # 其他键
+    'insert': 0x2D, 'delete': 0x2E, 'home': 0x24, 'end': 0x23,
+    'pageup': 0x21, 'pagedown': 0x22, 'capslock': 0x14,
+    'numlock': 0x90, 'scrolllock': 0x91, 'pause': 0x13,
+    'printscreen': 0x2C,
+}
+
+# 鼠标按下标志 -> 对应的弹起标志
+_MOUSE_RELEASES = {
+    MOUSEEVENTF_LEFTDOWN: MOUSEEVENTF_LEFTUP,
+    MOUSEEVENTF_RIGHTDOWN: MOUSEEVENTF_RIGHTUP,
+}
+
+_MOUSE_FLAG_NAMES = {
+    MOUSEEVENTF_LEFTDOWN: "left_down",
+    MOUSEEVENTF_LEFTUP: "left_up",
+    MOUSEEVENTF_RIGHTDOWN: "right_down",
+    MOUSEEVENTF_RIGHTUP: "right_up",
+    MOUSEEVENTF_WHEEL: "wheel",
+}
+
 
 class MOUSEINPUT(ctypes.Structure):
     _fields_ = [
@@ -67,195 +118,446 @@ class INPUT(ctypes.Structure):
     ]
 
 
-class KMController:
-    """键盘鼠标操作控制器，使用ctypes直接调用Windows API"""
+def _get_virtual_key_code(key: str) -> int:
+    code = VK_CODES.get(key.lower())
+    if code is None:
+        logger.error(f"无法识别按键: {key}")
+        raise ValueError(f"未定义的按键映射: {key}")
+    return code
+
+
+def decode_inputs(inputs, screen_size):
+    """
+    把 INPUT 结构解码为可读的动作
+    :return: [(动作, 参数...)]，如 ("move", x, y)、("left_down", 0)、("key_down", 虚拟键码)；鼠标坐标换算回屏幕像素
+    """
+    width, height = screen_size
+    events = []
+    for item in inputs:
+        if item.type == INPUT_KEYBOARD:
+            action = "key_up" if item.union.ki.dwFlags & KEYEVENTF_KEYUP else "key_down"
+            events.append((action, item.union.ki.wVk))
+        elif item.union.mi.dwFlags & MOUSEEVENTF_MOVE:
+            events.append(("move", round(item.union.mi.dx * width / 65535), round(item.union.mi.dy * height / 65535)))
+        else:
+            action = _MOUSE_FLAG_NAMES.get(item.union.mi.dwFlags, hex(item.union.mi.dwFlags))
+            events.append((action, ctypes.c_long(item.union.mi.mouseData).value))
+    return events
+
+
+class InputSequence:
+    """
+    输入序列构建器
+    按顺序记录鼠标、键盘动作和动作之间的精确等待时间，compile() 后一次性生成 INPUT 数组。
+    各方法返回自身，可以链式调用。
+    """
 
     def __init__(self):
+        self.steps = []
+
+    def _add(self, step):
+        self.steps.append(step)
+        return self
+
+    def move(self, x, y):
+        return self._add(("move", x, y))
+
+    def left_down(self):
+        return self._add(("mouse", MOUSEEVENTF_LEFTDOWN, 0))
+
+    def left_up(self):
+        return self._add(("mouse", MOUSEEVENTF_LEFTUP, 0))
+
+    def right_down(self):
+        return self._add(("mouse", MOUSEEVENTF_RIGHTDOWN, 0))
+
+    def right_up(self):
+        return self._add(("mouse", MOUSEEVENTF_RIGHTUP, 0))
+
+    def wheel(self, amount):
+        return self._add(("mouse", MOUSEEVENTF_WHEEL, amount * 120))  # WHEEL_DELTA=120是标准值
+
+    def key_down(self, key):
+        return self._add(("key", _get_virtual_key_code(key), KEYEVENTF_KEYDOWN))
+
+    def key_up(self, key):
+        return self._add(("key", _get_virtual_key_code(key), KEYEVENTF_KEYUP))
+
+    def wait(self, seconds):
+        if seconds > 0:
+            self._add(("wait", seconds))
+        return self
+
+    def click(self, x, y, clicks=1, interval=0.2):
+        """在 (x, y) 左键点击 clicks 次，每次点击后等待 interval 秒"""
+        for _ in range(clicks):
+            self.move(x, y).left_down().wait(PRESS_DURATION).left_up().wait(interval)
+        return self
+
+    def right_click(self, x, y):
+        return self.move(x, y).wait(0.01).right_down().wait(PRESS_DURATION).right_up()
+
+    def key(self, key, presses=1, interval=0.5):
+        """按键 presses 次，每次按键后等待 interval 秒"""
+        for _ in range(presses):
+            self.key_down(key).wait(PRESS_DURATION).key_up(key).wait(interval)
+        return self
+
+    def drag(self, x1, y1, x2, y2):
+        return self.move(x1, y1).left_down().wait(PRESS_DURATION).move(x2, y2).left_up()
+
+    def compile(self, screen_width, screen_height):
+        """
+        生成预分配的 INPUT 数组
+        相邻且中间没有等待的动作合并为同一批，由一次 SendInput 提交
+        同时记录每批提交后仍处于按下状态的键和鼠标按钮，执行被打断时据此补发弹起
+        :return: CompiledSequence
+        """
+        events = []
+        batches = []  # [起始下标, 数量, 之后的等待秒数]
+        held = []  # 每批之后需要补发的弹起动作
+        pressed = {}  # 按下动作 -> 对应的弹起动作，按按下顺序保存
+        for step in self.steps:
+            kind = step[0]
+            if kind == "wait":
+                if batches:
+                    batches[-1][2] += step[1]
+                else:
+                    batches.append([0, 0, step[1]])
+                    held.append(())
+                continue
+            if not batches or batches[-1][2] > 0:
+                batches.append([len(events), 0, 0.0])
+                held.append(())
+            batches[-1][1] += 1
+            events.append(step)
+            _track_pressed(pressed, step)
+            held[-1] = tuple(reversed(pressed.values()))
+
+        inputs = (INPUT * len(events))()
+        for item, step in zip(inputs, events):
+            if step[0] == "move":
+                item.type = INPUT_MOUSE
+                item.union.mi.dx = int((step[1] / screen_width) * 65535)
+                item.union.mi.dy = int((step[2] / screen_height) * 65535)
+                item.union.mi.dwFlags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE
+            elif step[0] == "mouse":
+                item.type = INPUT_MOUSE
+                item.union.mi.dwFlags = step[1]
+                item.union.mi.mouseData = step[2] & 0xFFFFFFFF
+            else:
+                item.type = INPUT_KEYBOARD
+                item.union.ki.wVk = step[1]
+                item.union.ki.dwFlags = step[2]
+        return CompiledSequence(inputs, [tuple(b) for b in batches], held)
+
+
+def _track_pressed(pressed, step):
+    """根据一个动作更新按下状态表"""
+    if step[0] == "mouse":
+        if step[1] in _MOUSE_RELEASES:
+            pressed[step[1]] = ("mouse", _MOUSE_RELEASES[step[1]], 0)
+        else:
+            for down, up in _MOUSE_RELEASES.items():
+                if step[1] == up:
+                    pressed.pop(down, None)
+    elif step[0] == "key":
+        if step[2] & KEYEVENTF_KEYUP:
+            pressed.pop(step[1], None)
+        else:
+            pressed[step[1]] = ("key", step[1], KEYEVENTF_KEYUP)
+
+
+class CompiledSequence:
+    """
+    编译好的输入序列：INPUT 数组与 (起始下标, 数量, 之后的等待秒数) 批次表
+    held[i] 为第 i 批提交后仍按下的键与按钮对应的弹起动作
+    """
+
+    def __init__(self, inputs, batches, held=None):
+        self.inputs = inputs
+        self.batches = batches
+        self.held = held if held is not None else [()] * len(batches)
+        self.duration = sum(delay for _, _, delay in batches)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def __repr__(self):
+        return f"CompiledSequence(events={len(self)}, calls={len(self.batches)}, duration={self.duration:.2f}s)"
+
+
+class Win32InputBackend:
+    """通过 user32.SendInput 提交输入"""
+
+    def screen_size(self):
+        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+
+    def send(self, inputs, start, count):
+        if count:
+            user32.SendInput(count, ctypes.byref(inputs, start * ctypes.sizeof(INPUT)), ctypes.sizeof(INPUT))
+
+
+class RecordingInputBackend:
+    """
+    记录后端：不发送任何输入，只记录每次提交的事件，用于在 Linux 上检查输入序列
+    events 中每项为 (相对开始的秒数, 动作, 参数...)，鼠标坐标已换算回屏幕像素
+    """
+
+    def __init__(self, screen_size=None):
+        if screen_size is None:
+            screen = layout.current()
+            screen_size = (screen.width, screen.height)
+        self._screen_size = tuple(screen_size)
+        self.events = []
+        self.calls = 0
+        self._started = clock.now()
+
+    def screen_size(self):
+        return self._screen_size
+
+    def send(self, inputs, start, count):
+        if not count:
+            return
+        self.calls += 1
+        at = clock.now() - self._started
+        for event in decode_inputs(inputs[start:start + count], self._screen_size):
+            self.events.append((at,) + event)
+
+    def clear(self):
+        self.events = []
+        self.calls = 0
+        self._started = clock.now()
+
+
+def default_input_backend():
+    """Windows 上使用 SendInput，其他平台使用记录后端"""
+    return Win32InputBackend() if user32 is not None else RecordingInputBackend()
+
+
+class KMController:
+    """键盘鼠标操作控制器，动作先编译成输入序列，再按批次调用 SendInput 提交"""
+
+    def __init__(self, backend=None, move_delay=0.05, click_padding=0.5, key_padding=0.5):
+        """
+        :param backend: 输入后端，默认 Windows 上使用 SendInput，其他平台使用记录后端
+        :param move_delay: 点击前移动鼠标后的等待秒数
+        :param click_padding: move_and_click 完成后的额外等待秒数
+        :param key_padding: press_key 完成后的额外等待秒数
+        """
         logger.info("初始化键鼠控制器(ctypes版)")
         self.state_mgr = StateManager()
         logger.debug(f"状态管理器已注入: {type(self.state_mgr).__name__}")
 
-        self.screen_width = user32.GetSystemMetrics(0)
-        self.screen_height = user32.GetSystemMetrics(1)
+        self.backend = backend if backend is not None else default_input_backend()
+        self.move_delay = move_delay
+        self.click_padding = click_padding
+        self.key_padding = key_padding
+        self._sequences = {}
+        self.latency = ActionLatencyLog()
+
+        self.screen_width, self.screen_height = self.backend.screen_size()
         logger.info(f"检测到屏幕分辨率: {self.screen_width}x{self.screen_height}")
 
-    def move_and_click(self, x: int, y: int, clicks: int = 1, interval: float = 0.2) -> None:
-        logger.debug(f"准备移动到 ({x}, {y}) 点击 {clicks} 次")
+    def compile(self, sequence: InputSequence) -> CompiledSequence:
+        return sequence.compile(self.screen_width, self.screen_height)
+
+    def compiled(self, key, build):
+        """
+        按键缓存编译好的序列，重复执行的固定操作只编译一次
+        :param key: 缓存键，如 ("move_to_position", 坐标...)
+        :param build: 返回 InputSequence 的函数，仅在缓存未命中时调用
+        """
+        sequence = self._sequences.get(key)
+        if sequence is None:
+            sequence = self._sequences[key] = self.compile(build())
+        return sequence
+
+    def run(self, sequence) -> None:
+        """
+        执行输入序列
+        每批动作用一次 SendInput 提交，批次按相对开始时间精确调度，SendInput 本身的耗时不会累积成误差
+        暂停、停止或异常打断执行时，先弹起本序列仍按下的键和鼠标按钮，不会让输入一直保持按下
+        :param sequence: InputSequence 或 CompiledSequence
+        """
+        if isinstance(sequence, InputSequence):
+            sequence = self.compile(sequence)
         self.state_mgr.wait_until_resumed()
 
+        held = ()
+        try:
+            deadline = clock.now()
+            for (start, count, delay), pressed in zip(sequence.batches, sequence.held):
+                if self.state_mgr.is_paused() or self.state_mgr.stop_requested:
+                    self._release(held)
+                    held = ()
+                    self.state_mgr.wait_until_resumed()
+                    deadline = clock.now()
+                with tracer.span("send", "input"):
+                    self.backend.send(sequence.inputs, start, count)
+                held = pressed
+                deadline += delay
+                with tracer.span("sleep", "input"):
+                    # 暂停或停止时立即醒来，由下一批次之前的检查处理
+                    self.state_mgr.sleep_until(deadline)
+            # 正常执行完毕时保留序列自身的按键状态
+            held = ()
+        finally:
+            self._release(held)
+
+    def _release(self, releases):
+        """补发弹起动作"""
+        if not releases:
+            return
+        sequence = InputSequence()
+        sequence.steps = list(releases)
+        compiled = self.compile(sequence)
+        logger.debug(f"输入被打断，补发 {len(compiled)} 个弹起动作")
+        self.backend.send(compiled.inputs, 0, len(compiled))
+
+    def _click_steps(self, sequence, x, y, clicks=1, interval=0.2, padding=None):
+        """向序列追加 move_and_click 的完整动作"""
+        padding = self.click_padding if padding is None else padding
+        return sequence.move(x, y).wait(self.move_delay).click(x, y, clicks, interval).wait(padding)
+
+    def _key_steps(self, sequence, key, presses=1, interval=0.5, padding=None):
+        """向序列追加 press_key 的完整动作"""
+        padding = self.key_padding if padding is None else padding
+        return sequence.key(key, presses, interval).wait(padding)
+
+    @tracer.traced("input")
+    def run_verified(self, sequence, expect, timeout=2.0, retries=0, padding=0.0):
+        """
+        执行输入序列并等待视觉后置条件，条件一满足立即返回，超时则重试
+        :param expect: Postcondition
+        :param timeout: 每次执行后等待条件的最长秒数
+        :param retries: 超时后重新执行的次数
+        :param padding: 不使用后置条件时原本的固定等待，仅用于延迟统计对比
+        :return: 条件是否满足
+        """
+        if isinstance(sequence, InputSequence):
+            sequence = self.compile(sequence)
+        for attempt in range(1, retries + 2):
+            expect.arm()
+            self.run(sequence)
+            started = clock.now()
+            with tracer.span("verify", "input", action=expect.description):
+                satisfied = expect.wait(timeout)
+            latency = clock.now() - started
+            if satisfied or attempt > retries:
+                self.latency.record(expect.description, latency, satisfied, attempt, padding)
+                if not satisfied:
+                    logger.warning(f"[{expect.description}] {attempt} 次执行后仍未满足，已超时")
+                return satisfied
+            logger.debug(f"[{expect.description}] 第 {attempt} 次执行 {timeout}s 内未满足，重试")
+
+    @tracer.traced("input")
+    def move_and_click(self, x: int, y: int, clicks: int = 1, interval: float = 0.2,
+                       expect=None, timeout: float = 2.0, retries: int = 0):
+        """
+        :param expect: 可选的视觉后置条件（Postcondition）；提供时不再固定等待 click_padding，
+                       画面响应后立即返回，超时按 retries 重试
+        :return: 提供 expect 时返回条件是否满足，否则返回 None
+        """
+        logger.debug(f"准备移动到 ({x}, {y}) 点击 {clicks} 次")
+
         if not (0 <= x <= self.screen_width and 0 <= y <= self.screen_height):
             logger.warning(f"无效坐标: ({x}, {y})")
-            return
+            return False if expect is not None else None
 
         try:
-            self._mouse_move(x, y)
-            time.sleep(0.05)
-            for _ in range(clicks):
-                self._mouse_click(x, y)
-                time.sleep(interval)
-            time.sleep(0.5)
+            if expect is None:
+                self.run(self._click_steps(InputSequence(), x, y, clicks, interval))
+                return None
+            sequence = self._click_steps(InputSequence(), x, y, clicks, interval, padding=0)
+            return self.run_verified(sequence, expect, timeout, retries, padding=self.move_delay + self.click_padding)
         except Exception as e:
             logger.error(f"点击操作异常: {str(e)}")
             raise
+
+    @tracer.traced("input")
+    def click_path(self, name, points, pause=0.5):
+        """
+        依次点击一组固定位置（如转世队列），整条路径编译为一个序列并缓存
+        :param name: 缓存名称
+        :param points: [(x, y), ...]
+        :param pause: 每次点击前的等待秒数
+        """
+        def build():
+            sequence = InputSequence()
+            for x, y in points:
+                self._click_steps(sequence.wait(pause), x, y)
+            return sequence
+
+        self.run(self.compiled(("click_path", name, tuple(points)), build))
+
+    @tracer.traced("input")
     def return_to_initial_position(self):
-        self.move_a_to_target_position(93,935,884,457)
+        (x1, y1), (x2, y2) = layout.current().path("common.initial_position")
+        self.move_a_to_target_position(x1, y1, x2, y2)
 
+    @tracer.traced("input")
     def move_a_to_target_position(self,  x1: int, y1: int, x2: int, y2: int):
-        self.press_key('f1',3)
-        if x1 !=0:
-            self.move_and_click(x1, y1)
-        self.press_key('a')
-        self.move_and_click(x2, y2)
+        def build():
+            sequence = self._key_steps(InputSequence(), 'f1', 3)
+            if x1 != 0:
+                self._click_steps(sequence, x1, y1)
+            self._key_steps(sequence, 'a')
+            return self._click_steps(sequence, x2, y2)
 
+        self.run(self.compiled(("move_a_to_target_position", x1, y1, x2, y2), build))
 
+    @tracer.traced("input")
     def right_click(self, x: int, y: int, wait: float = 0) -> None:
         logger.debug(f"准备右键点击 ({x}, {y})")
-        self.state_mgr.wait_until_resumed()
 
         try:
-            self._mouse_move(x, y)
-            self._mouse_right_click(x, y)
-            time.sleep(wait)
+            self.run(InputSequence().right_click(x, y).wait(wait))
         except Exception as e:
             logger.error(f"右键点击异常: {str(e)}")
             raise
 
-    def press_key(self, key: str, presses: int = 1, interval: float = 0.5) -> None:
+    @tracer.traced("input")
+    def press_key(self, key: str, presses: int = 1, interval: float = 0.5,
+                  expect=None, timeout: float = 2.0, retries: int = 0):
+        """
+        :param expect: 可选的视觉后置条件；提供时最后一次按键后不再等待 interval 与 key_padding
+        :return: 提供 expect 时返回条件是否满足，否则返回 None
+        """
         logger.debug(f"准备按键 {key} {presses} 次")
-        self.state_mgr.wait_until_resumed()
-
-        key_code = self._get_virtual_key_code(key.lower())
 
         try:
-            for _ in range(presses):
-                self._key_press(key_code)
-                time.sleep(interval)
-            time.sleep(0.5)
+            if expect is None:
+                self.run(self._key_steps(InputSequence(), key, presses, interval))
+                return None
+            sequence = InputSequence().key(key, presses - 1, interval).key(key, 1, 0)
+            return self.run_verified(sequence, expect, timeout, retries, padding=interval + self.key_padding)
         except Exception as e:
             logger.error(f"按键操作异常: {str(e)}")
             raise
 
+    @tracer.traced("input")
     def move_to_position(self, sm_x: int, sm_y: int, bg_x: int, bg_y: int) -> None:
         logger.debug(f"开始地图跳转: 小图({sm_x}, {sm_y}) → 主图({bg_x}, {bg_y})")
-        self.state_mgr.wait_until_resumed()
+
+        def build():
+            sequence = self._click_steps(InputSequence(), sm_x, sm_y, 2, 1).wait(1)
+            self._click_steps(sequence, bg_x, bg_y, 1, 1)
+            self._key_steps(sequence, 'f1', 1, 0.1)
+            self._key_steps(sequence, 'a')
+            self._click_steps(sequence, bg_x, bg_y, 1, 1).wait(1)
+            return self._key_steps(sequence, 'd', 5, interval=1)
 
         try:
-            self.move_and_click(sm_x, sm_y, 2, 1)
-            time.sleep(1)
-            self.move_and_click(bg_x, bg_y, 1, 1)
-            self.press_key('f1', 1, 0.1)
-            self.press_key('a')
-            self.move_and_click(bg_x, bg_y, 1, 1)
-            time.sleep(1)
-            self.press_key('d', 5, interval=1)
+            self.run(self.compiled(("move_to_position", sm_x, sm_y, bg_x, bg_y), build))
         except Exception as e:
             logger.error(f"地图跳转失败: {str(e)}")
             raise
 
+    @tracer.traced("input")
     def mouse_drag(self,x1,y1,x2,y2):
-        self._mouse_move(x1,y1)
-        self._mouse_down()
-        self._mouse_move(x2,y2)
-        self._mouse_up()
-
-
-    def _mouse_move(self, x: int, y: int) -> None:
-        x = int((x / self.screen_width) * 65535)
-        y = int((y / self.screen_height) * 65535)
-
-        input_move = INPUT(type=INPUT_MOUSE)
-        input_move.union.mi.dx = x
-        input_move.union.mi.dy = y
-        input_move.union.mi.dwFlags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE
-
-        self._send_input(input_move)
+        self.run(InputSequence().drag(x1, y1, x2, y2))
 
+    @tracer.traced("input")
     def mouse_scroll(self,scroll_amount: int):
-        input_struct = INPUT(type=INPUT_MOUSE)
-        input_struct.union.mi.dwFlags = MOUSEEVENTF_WHEEL
-        input_struct.union.mi.mouseData = scroll_amount * 120  # WHEEL_DELTA=120是标准值
-
-        # 发送输入
-        self._send_input(input_struct)
-
-        time.sleep(0.05)
-    def _mouse_right_click(self, x: int, y: int) -> None:
-        self._mouse_move(x, y)
-        time.sleep(0.01)
-
-        input_down = INPUT(type=INPUT_MOUSE)
-        input_down.union.mi.dwFlags = MOUSEEVENTF_RIGHTDOWN
-        input_up = INPUT(type=INPUT_MOUSE)
-        input_up.union.mi.dwFlags = MOUSEEVENTF_RIGHTUP
-
-        self._send_input(input_down)
-        time.sleep(0.02)
-        self._send_input(input_up)
-
-    def _key_press(self, key_code: int) -> None:
-        extra = ctypes.c_ulong(0)
-        ii_keydown = KEYBDINPUT(key_code, 0, 0, 0, ctypes.pointer(extra))
-        ii_keyup = KEYBDINPUT(key_code, 0, KEYEVENTF_KEYUP, 0, ctypes.pointer(extra))
-
-        self._send_input(INPUT(type=INPUT_KEYBOARD, union=INPUT_union(ki=ii_keydown)))
-        time.sleep(0.02)
-        self._send_input(INPUT(type=INPUT_KEYBOARD, union=INPUT_union(ki=ii_keyup)))
-
-    def _send_input(self, input_obj: INPUT) -> None:
-        user32.SendInput(1, ctypes.byref(input_obj), ctypes.sizeof(INPUT))
-    def _mouse_down(self) -> None:
-        """模拟鼠标按下动作"""
-        input_down = INPUT(type=INPUT_MOUSE)
-        input_down.union.mi.dwFlags = MOUSEEVENTF_LEFTDOWN
-        self._send_input(input_down)
-        time.sleep(0.02)
-
-    def _mouse_up(self) -> None:
-        """模拟鼠标弹起动作"""
-        input_up = INPUT(type=INPUT_MOUSE)
-        input_up.union.mi.dwFlags = MOUSEEVENTF_LEFTUP
-        self._send_input(input_up)
-
-    def _mouse_click(self, x: int, y: int) -> None:
-        """完整的鼠标点击操作（移动+按下+弹起）"""
-        self._mouse_move(x, y)
-        self._mouse_down()
-        self._mouse_up()
-    def _get_virtual_key_code(self, key: str) -> int:
-        key_mapping = {
-            # 字母
-            'a': 0x41, 'b': 0x42, 'c': 0x43, 'd': 0x44, 'e': 0x45,
-            'f': 0x46, 'g': 0x47, 'h': 0x48, 'i': 0x49, 'j': 0x4A,
-            'k': 0x4B, 'l': 0x4C, 'm': 0x4D, 'n': 0x4E, 'o': 0x4F,
-            'p': 0x50, 'q': 0x51, 'r': 0x52, 's': 0x53, 't': 0x54,
-            'u': 0x55, 'v': 0x56, 'w': 0x57, 'x': 0x58, 'y': 0x59, 'z': 0x5A,
-
-            # 数字
-            '0': 0x30, '1': 0x31, '2': 0x32, '3': 0x33, '4': 0x34,
-            '5': 0x35, '6': 0x36, '7': 0x37, '8': 0x38, '9': 0x39,
-
-            # 功能键
-            'f1': 0x70, 'f2': 0x71, 'f3': 0x72, 'f4': 0x73, 'f5': 0x74,
-            'f6': 0x75, 'f7': 0x76, 'f8': 0x77, 'f9': 0x78, 'f10': 0x79,
-            'f11': 0x7A, 'f12': 0x7B,
-
-            # 控制键
-            'ctrl': 0x11, 'shift': 0x10, 'alt': 0x12,
-            'enter': 0x0D, 'esc': 0x1B, 'tab': 0x09, 'space': 0x20,
-            'backspace': 0x08,
-
-            # 方向键
-            'left': 0x25, 'up': 0x26, 'right': 0x27, 'down': 0x28,
-
-            # 其他键
-            'insert': 0x2D, 'delete': 0x2E, 'home': 0x24, 'end': 0x23,
-            'pageup': 0x21, 'pagedown': 0x22, 'capslock': 0x14,
-            'numlock': 0x90, 'scrolllock': 0x91, 'pause': 0x13,
-            'printscreen': 0x2C,
-        }
-
-        code = key_mapping.get(key)
-        if code is None:
-            logger.error(f"无法识别按键: {key}")
-            raise ValueError(f"未定义的按键映射: {key}")
-        return code
+        self.run(InputSequence().wheel(scroll_amount).wait(0.05))
@@ -0,0 +1,159 @@
+# utils/layout.py
+import json
+import os
+
+from loguru import logger
+
+from utils.lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# 界面布局文件：全部点击位置与识别区域，坐标按游戏画面宽高归一化到 0~1，原点为游戏画面左上角
+LAYOUT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "layout.json")
+
+_current = None
+
+
+def detect_resolution():
+    """
+    检测屏幕分辨率，平台后端找不到游戏窗口时按全屏/无边框窗口处理
+    :return: (宽, 高)，无法检测时返回 None
+    """
+    try:
+        import ctypes
+        user32 = ctypes.windll.user32
+        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+    except (AttributeError, OSError):
+        pass
+    try:
+        from PIL import ImageGrab
+        return ImageGrab.grab().size
+    except Exception:
+        return None
+
+
+class Layout:
+    """
+    界面布局注册表
+    从布局文件读取归一化坐标，按游戏画面的实际尺寸与屏幕位置一次性换算成屏幕像素坐标，之后按名称直接取用
+    """
+
+    def __init__(self, width, height, path=LAYOUT_FILE, origin=(0, 0)):
+        """
+        :param width: 游戏画面（窗口客户区）宽度
+        :param height: 游戏画面高度
+        :param origin: 游戏画面左上角的屏幕坐标，窗口模式下为客户区位置
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        base_width, base_height = data["base_resolution"]
+        self.width = width
+        self.height = height
+        self.left, self.top = origin
+        # 模板图片按基准分辨率截取，缩放比例用于同步缩放模板
+        self.scale_x = width / base_width
+        self.scale_y = height / base_height
+        self._points = {name: self._to_pixels(value) for name, value in data["points"].items()}
+        self._regions = {name: self._to_pixels(value) for name, value in data["regions"].items()}
+        self._paths = {name: tuple(self._to_pixels(p) for p in value) for name, value in data["paths"].items()}
+        # 位移不加原点、不取整，由调用方乘以倍数后再取整，避免取整误差随倍数放大
+        self._offsets = {name: (dx * width, dy * height) for name, (dx, dy) in data.get("offsets", {}).items()}
+        logger.info(f"界面布局已加载: {width}x{height}，位于 ({self.left}, {self.top})，"
+                    f"缩放比例 ({self.scale_x:.3f}, {self.scale_y:.3f})，"
+                    f"{len(self._points)} 个点击位置，{len(self._regions)} 个识别区域，{len(self._paths)} 条路径")
+
+    def _to_pixels(self, values):
+        """归一化坐标 (x, y, x, y, ...) 换算为屏幕像素坐标"""
+        return tuple(round(v * self.width) + self.left if i % 2 == 0 else round(v * self.height) + self.top
+                     for i, v in enumerate(values))
+
+    @property
+    def is_native(self):
+        """是否为基准分辨率，此时模板无需缩放"""
+        return self.scale_x == 1 and self.scale_y == 1
+
+    def point(self, name):
+        """:return: 点击位置 (x, y)"""
+        try:
+            return self._points[name]
+        except KeyError:
+            raise KeyError(f"布局中未定义的点击位置: {name}") from None
+
+    def region(self, name):
+        """:return: 识别区域 (x1, y1, x2, y2)"""
+        try:
+            return self._regions[name]
+        except KeyError:
+            raise KeyError(f"布局中未定义的识别区域: {name}") from None
+
+    def path(self, name):
+        """:return: 按顺序点击的一组位置 ((x, y), ...)"""
+        try:
+            return self._paths[name]
+        except KeyError:
+            raise KeyError(f"布局中未定义的路径: {name}") from None
+
+    def offset(self, name):
+        """:return: 位移 (dx, dy)，未取整的像素值"""
+        try:
+            return self._offsets[name]
+        except KeyError:
+            raise KeyError(f"布局中未定义的位移: {name}") from None
+
+    def scale_image(self, image):
+        """把按基准分辨率截取的模板图片缩放到当前分辨率"""
+        if self.is_native:
+            return image
+        height, width = image.shape[:2]
+        size = (max(1, round(width * self.scale_x)), max(1, round(height * self.scale_y)))
+        interpolation = cv2.INTER_AREA if self.scale_x * self.scale_y < 1 else cv2.INTER_LINEAR
+        return cv2.resize(image, size, interpolation=interpolation)
+
+
+def configure(resolution=None, path=LAYOUT_FILE, origin=(0, 0)):
+    """
+    按游戏画面尺寸与位置加载布局并设为当前布局，启动时调用一次
+    :param resolution: (宽, 高)，默认检测屏幕分辨率，检测失败时使用基准分辨率
+    :param origin: 游戏画面左上角的屏幕坐标
+    :return: Layout
+    """
+    global _current
+    if resolution is None:
+        resolution = detect_resolution()
+    if resolution is None:
+        with open(path, "r", encoding="utf-8") as f:
+            resolution = json.load(f)["base_resolution"]
+        logger.warning(f"无法检测屏幕分辨率，使用基准分辨率 {resolution[0]}x{resolution[1]}")
+    _current = Layout(*resolution, path=path, origin=origin)
+    return _current
+
+
+def current():
+    """当前布局，尚未配置时按检测到的分辨率自动配置"""
+    if _current is None:
+        return configure()
+    return _current
+
+
+class _LayoutEntry:
+    """类属性描述符：访问时从当前布局取出已换算的像素坐标"""
+
+    kind = None
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return getattr(current(), self.kind)(self.name)
+
+
+class LayoutPoint(_LayoutEntry):
+    kind = "point"
+
+
+class LayoutRegion(_LayoutEntry):
+    kind = "region"
+
+
+class LayoutPath(_LayoutEntry):
+    kind = "path"
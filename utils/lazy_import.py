@@ -0,0 +1,30 @@
+# utils/lazy_import.py
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    延迟导入的模块代理
+    首次访问属性时才真正导入，用于 cv2、paddleocr 等导入耗时较长的依赖
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """立即导入并返回真实模块"""
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        module = self._module if self._module is not None else self.load()
+        return getattr(module, attr)
+
+
+def lazy_module(name):
+    return LazyModule(name)
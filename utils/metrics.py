@@ -0,0 +1,231 @@
+# utils/metrics.py
+"""
+运行指标库
+每局结束后记录各阶段的开始偏移与耗时、OCR 查询与推理次数、胜负、难度和是否使用金币，
+写入本地 SQLite 数据库（默认 logs/metrics.db），便于跨多次运行比较吞吐量与胜率。
+自动化线程只把记录放进队列，由后台写库线程按批提交；界面从内存中的累计值读取实时统计。
+查询示例:
+    sqlite3 logs/metrics.db "select difficulty, avg(duration), avg(success) from games group by difficulty"
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from loguru import logger
+
+from utils import clock
+
+METRICS_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "metrics.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at REAL,
+    platform TEXT,
+    clock TEXT,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS games (
+    run_id TEXT,
+    game_index INTEGER,
+    started_at REAL,
+    duration REAL,
+    success INTEGER,
+    difficulty INTEGER,
+    use_gold INTEGER,
+    ocr_queries INTEGER,
+    ocr_inferences INTEGER,
+    ocr_hit_rate REAL,
+    PRIMARY KEY (run_id, game_index)
+);
+CREATE TABLE IF NOT EXISTS phases (
+    run_id TEXT,
+    game_index INTEGER,
+    phase TEXT,
+    start_offset REAL,
+    duration REAL
+);
+"""
+
+
+class GameRecord:
+    """一局的指标，由主循环边执行边填写"""
+
+    def __init__(self, index):
+        self.index = index
+        self.started_at = time.time()
+        self._started = clock.now()
+        self.duration = 0.0
+        self.success = None
+        self.phases = []
+        self.ocr_hits = 0
+        self.ocr_misses = 0
+
+    def phase(self, name):
+        """
+        记录一个阶段的耗时
+        用法:
+            with record.phase("收起"):
+                ...
+        """
+        return _PhaseTimer(self, name)
+
+    def finish(self, success, ocr_stats):
+        """
+        :param success: 胜负，本局未执行收起阶段时为 None
+        :param ocr_stats: VisionProcess.ocr_cache_stats() 的返回值
+        """
+        self.duration = clock.now() - self._started
+        self.success = success
+        self.ocr_hits = ocr_stats["hits"]
+        self.ocr_misses = ocr_stats["misses"]
+
+
+class _PhaseTimer:
+    __slots__ = ("record", "name", "started")
+
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = clock.now()
+        return self
+
+    def __exit__(self, *exc):
+        now = clock.now()
+        self.record.phases.append((self.name, self.started - self.record._started, now - self.started))
+        return False
+
+
+class MetricsStore(threading.Thread):
+    """
+    指标写库线程
+    record_game() 只入队，写库线程取出后与队列中已有的记录合并为一个事务提交
+    单个事务失败时丢弃该批记录并继续运行；数据库无法打开时标记为失败，之后的记录不再入队
+    """
+
+    def __init__(self, path=METRICS_DB, config=None, platform="", batch_size=50):
+        """
+        :param path: SQLite 文件路径
+        :param config: 本次运行的配置，记录难度与是否使用金币
+        :param platform: 平台后端名称，区分实机与模拟器的记录
+        :param batch_size: 单个事务最多写入的记录数
+        """
+        super().__init__(name="metrics-writer", daemon=True)
+        self.path = path
+        self.config = dict(config or {})
+        self.platform = platform
+        self.batch_size = batch_size
+        self.run_id = uuid.uuid4().hex[:12]
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._run_started = None
+        self._live = {"games": 0, "decided": 0, "successes": 0, "total_duration": 0.0}
+        self.batches_written = 0
+        self.batches_failed = 0
+        self.failed = None  # 数据库无法打开或初始化时的异常
+
+    def start_run(self):
+        """自动化流程开始运行时调用，作为每小时局数的计时起点"""
+        self._run_started = clock.now()
+        self._queue.put(("run", (self.run_id, time.time(), self.platform, clock.current().name,
+                                 json.dumps(self.config, ensure_ascii=False))))
+
+    def record_game(self, record):
+        """登记一局已结束的记录；只入队，不阻塞自动化线程。写库线程已失败时只更新实时统计"""
+        with self._lock:
+            self._live["games"] += 1
+            self._live["total_duration"] += record.duration
+            if record.success is not None:
+                self._live["decided"] += 1
+                self._live["successes"] += bool(record.success)
+        if self.failed is not None:
+            logger.debug(f"运行指标库不可用，第 {record.index} 局不写入: {self.failed}")
+            return
+
+        queries = record.ocr_hits + record.ocr_misses
+        self._queue.put(("game", (
+            self.run_id, record.index, record.started_at, record.duration,
+            None if record.success is None else int(record.success),
+            self.config.get("difficulty"), int(bool(self.config.get("use_gold", True))),
+            queries, record.ocr_misses, record.ocr_hits / queries if queries else 0.0,
+        )))
+        for phase, offset, duration in record.phases:
+            self._queue.put(("phase", (self.run_id, record.index, phase, offset, duration)))
+
+    def live_stats(self):
+        """
+        本次运行的实时统计
+        :return: {games, games_per_hour, avg_game_s, success_rate}
+        """
+        with self._lock:
+            live = dict(self._live)
+        elapsed = clock.now() - self._run_started if self._run_started is not None else 0.0
+        return {
+            "games": live["games"],
+            "games_per_hour": live["games"] / elapsed * 3600 if elapsed > 0 else 0.0,
+            "avg_game_s": live["total_duration"] / live["games"] if live["games"] else 0.0,
+            "success_rate": live["successes"] / live["decided"] if live["decided"] else 0.0,
+        }
+
+    def close(self):
+        """写完队列中剩余的记录后退出"""
+        self._queue.put(None)
+        if self.is_alive():
+            self.join(timeout=5)
+        if self.failed is not None:
+            logger.warning(f"运行指标未能写入 {self.path}: {self.failed}")
+        elif self.batches_failed:
+            logger.warning(f"运行指标已写入 {self.path}（{self.batches_written} 个事务），"
+                           f"{self.batches_failed} 个事务失败，其中的记录已丢弃")
+        else:
+            logger.info(f"运行指标已写入 {self.path}（{self.batches_written} 个事务）")
+
+    def run(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            self.failed = e
+            logger.error(f"无法打开运行指标库 {self.path}: {e}")
+            return
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    stopping = True
+                    batch = [item for item in batch if item is not None]
+                if batch:
+                    try:
+                        self._write(connection, batch)
+                    except sqlite3.Error as e:
+                        self.batches_failed += 1
+                        logger.error(f"写入运行指标失败，丢弃 {len(batch)} 条记录: {e}")
+        finally:
+            connection.close()
+
+    def _write(self, connection, batch):
+        statements = {
+            "run": "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+            "game": "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            "phase": "INSERT INTO phases VALUES (?, ?, ?, ?, ?)",
+        }
+        with connection:
+            for kind, sql in statements.items():
+                rows = [row for item_kind, row in batch if item_kind == kind]
+                if rows:
+                    connection.executemany(sql, rows)
+        self.batches_written += 1
@@ -0,0 +1,77 @@
+# utils/ocr_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class OCRResultCache:
+    """
+    OCR 结果 LRU 缓存
+    键为查询（区域坐标、识别模式）加上区域像素的指纹。像素先丢弃低位再哈希，
+    因此完全相同或仅有轻微噪声的画面会命中同一条缓存，直接复用上次的识别结果。
+    """
+
+    def __init__(self, max_entries=128, quantize_bits=3):
+        """
+        :param max_entries: 最多缓存的结果条数，超出后淘汰最久未使用的
+        :param quantize_bits: 哈希前丢弃的像素低位数，越大越能容忍噪声
+        """
+        self.max_entries = max_entries
+        self.quantize_bits = quantize_bits
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, image):
+        """计算区域像素指纹"""
+        pixels = np.ascontiguousarray(image)
+        if self.quantize_bits:
+            pixels = pixels >> self.quantize_bits
+        digest = hashlib.blake2b(pixels.tobytes(), digest_size=16).digest()
+        return pixels.shape, digest
+
+    def make_key(self, query, image):
+        return query, self.fingerprint(image)
+
+    def get(self, key):
+        """
+        查找缓存
+        :return: (是否命中, 缓存的结果)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """命中统计：hits、misses、hit_rate、size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
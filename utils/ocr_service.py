@@ -0,0 +1,222 @@
+# utils/ocr_service.py
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+from loguru import logger
+
+# 单个共享内存槽的默认大小：一帧 1920x1080 RGB
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3
+
+
+def _attach_shared_memory(name):
+    """子进程中打开共享内存；Python 3.13 起可关闭资源跟踪，避免子进程退出时误删"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(worker_id, requests, results, slot_names, engine_kwargs):
+    """
+    OCR 工作进程入口
+    图像通过共享内存槽传入，请求队列中只传递槽号、尺寸和类型，不序列化图像数据
+    """
+    from paddleocr import PaddleOCR
+
+    slots = [_attach_shared_memory(name) for name in slot_names]
+    try:
+        engine = PaddleOCR(**engine_kwargs)
+        engine.ocr(np.zeros((48, 160, 3), dtype=np.uint8), cls=True)
+    except Exception as e:
+        results.put(("failed", worker_id, repr(e)))
+        return
+    results.put(("ready", worker_id, None))
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, slot, shape, dtype, kwargs = request
+        image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=slots[slot].buf)
+        try:
+            results.put(("done", request_id, (slot, engine.ocr(image, **kwargs), None)))
+        except Exception as e:
+            results.put(("done", request_id, (slot, None, repr(e))))
+        finally:
+            del image
+
+    for shm in slots:
+        shm.close()
+
+
+class OCRServiceError(RuntimeError):
+    """OCR 服务已失败或已关闭，不再接受请求"""
+
+
+class OCRService:
+    """
+    多进程 OCR 服务
+    PaddleOCR 运行在独立的工作进程中，不与 Qt 界面、日志线程和键盘监听争抢解释器。
+    图像写入预先分配的共享内存槽后提交，结果以 Future 返回，截图与推理可以流水线并行。
+    ocr() 与 PaddleOCR.ocr() 接口一致，可直接替换进程内引擎。
+    """
+
+    def __init__(self, workers=1, slot_bytes=DEFAULT_SLOT_BYTES, slots_per_worker=2, engine_kwargs=None):
+        """
+        :param workers: 工作进程数
+        :param slot_bytes: 每个共享内存槽的字节数，需能容纳最大的单张输入图像
+        :param slots_per_worker: 每个工作进程对应的槽数，决定最多同时在途的请求数
+        :param engine_kwargs: 传给 PaddleOCR 的参数
+        """
+        engine_kwargs = engine_kwargs or {"use_angle_cls": True, "lang": "ch"}
+        self.workers = workers
+        self.slot_bytes = slot_bytes
+        self.ready = Future()
+
+        context = multiprocessing.get_context("spawn")
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._slots = [shared_memory.SharedMemory(create=True, size=slot_bytes)
+                       for _ in range(workers * slots_per_worker)]
+        self._free_slots = queue.Queue()
+        for index in range(len(self._slots)):
+            self._free_slots.put(index)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._ready_workers = 0
+        self._closed = False
+        self._failed = None  # 工作进程退出或初始化失败时的异常
+
+        slot_names = [shm.name for shm in self._slots]
+        self._processes = [
+            context.Process(target=_worker_main, name=f"ocr-worker-{i}", daemon=True,
+                            args=(i, self._requests, self._results, slot_names, engine_kwargs))
+            for i in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+        self._collector = threading.Thread(target=self._collect, name="ocr-collector", daemon=True)
+        self._collector.start()
+        logger.info(f"OCR 服务已启动 {workers} 个工作进程，共享内存槽 {len(self._slots)} 个")
+
+    def submit(self, image, **kwargs):
+        """
+        提交一次 OCR 请求
+        :param image: RGB 图像
+        :param kwargs: 传给 PaddleOCR.ocr 的参数（cls、det 等）
+        :return: Future，结果与 PaddleOCR.ocr 的返回值相同
+        """
+        self._check_available()
+        image = np.ascontiguousarray(image)
+        if image.nbytes > self.slot_bytes:
+            raise ValueError(f"图像 {image.shape} 超出共享内存槽大小 {self.slot_bytes}")
+
+        # 工作进程退出后槽不会再被归还，定时醒来检查服务状态，避免一直阻塞
+        while True:
+            try:
+                slot = self._free_slots.get(timeout=1)
+                break
+            except queue.Empty:
+                self._check_available()
+        buffer = np.ndarray(image.shape, dtype=image.dtype, buffer=self._slots[slot].buf)
+        buffer[...] = image
+        del buffer
+
+        future = Future()
+        request_id = next(self._ids)
+        with self._pending_lock:
+            # 与 _fail_all 在同一把锁内检查，失败之后登记的请求不会被遗漏
+            if self._failed is not None or self._closed:
+                self._free_slots.put(slot)
+                self._check_available()
+            self._pending[request_id] = future
+        self._requests.put((request_id, slot, image.shape, image.dtype.str, kwargs))
+        return future
+
+    @property
+    def failed(self):
+        """:return: 服务失败的原因，正常时为 None"""
+        return self._failed
+
+    def _check_available(self):
+        if self._failed is not None:
+            raise OCRServiceError(f"OCR 服务已失败: {self._failed}")
+        if self._closed:
+            raise OCRServiceError("OCR 服务已关闭")
+
+    def ocr(self, image, **kwargs):
+        """同步调用，接口与 PaddleOCR.ocr 一致"""
+        return self.submit(image, **kwargs).result()
+
+    def _collect(self):
+        """收集工作进程的结果并完成对应的 Future，同时监控工作进程存活"""
+        while not self._closed:
+            try:
+                kind, key, payload = self._results.get(timeout=1)
+            except queue.Empty:
+                if any(not process.is_alive() for process in self._processes):
+                    self._fail_all(RuntimeError("OCR 工作进程意外退出"))
+                    return
+                continue
+            except (EOFError, OSError) as e:
+                if not self._closed:
+                    self._fail_all(RuntimeError(f"OCR 结果队列已断开: {e}"))
+                return
+
+            if kind == "ready":
+                self._ready_workers += 1
+                if self._ready_workers == self.workers:
+                    logger.info("OCR 服务全部工作进程已就绪")
+                    self.ready.set_result(self)
+            elif kind == "failed":
+                self._fail_all(RuntimeError(f"OCR 工作进程 {key} 初始化失败: {payload}"))
+                return
+            else:
+                slot, result, error = payload
+                self._free_slots.put(slot)
+                with self._pending_lock:
+                    future = self._pending.pop(key, None)
+                if future is None:
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(f"OCR 推理失败: {error}"))
+
+    def _fail_all(self, error):
+        """标记服务失败并让所有在途请求以异常结束；之后的 submit() 直接抛出 OCRServiceError"""
+        logger.error(str(error))
+        if not self.ready.done():
+            self.ready.set_exception(error)
+        with self._pending_lock:
+            if self._failed is None:
+                self._failed = error
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(error)
+
+    def close(self):
+        """停止工作进程并释放共享内存"""
+        if self._closed:
+            return
+        self._closed = True
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(OCRServiceError("OCR 服务已关闭"))
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+        logger.info("OCR 服务已关闭")
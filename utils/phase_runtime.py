@@ -0,0 +1,302 @@
+# utils/phase_runtime.py
+"""
+阶段流水线运行时
+感知与动作分别在两个线程中进行：PerceptionLoop 在后台连续抓帧并分析，只保留最新一次完成的结果；
+InputQueue 在输入线程中按提交顺序逐个执行键鼠动作。阶段线程在动作执行（及其中的等待）期间，
+下一帧的截图与 OCR 已经在进行，决策总是基于最新完成的感知结果。
+感知线程发现必须立即处理的画面（如对局结束的收起按钮）时，可以用 InputQueue.preempt()
+丢弃排队中的动作并插入优先动作，不必等待阶段线程走完当前一轮操作。
+两者未启动时都退化为在调用线程中同步执行，即原来的串行流程。
+所有等待都经由 utils.clock，虚拟时钟下同样可用。
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from loguru import logger
+
+from utils import clock, tracer
+
+# KMController 中会发出输入的方法，经 InputQueue.controller 调用时进入输入队列
+INPUT_METHODS = frozenset((
+    "run", "run_verified", "move_and_click", "click_path", "return_to_initial_position",
+    "move_a_to_target_position", "right_click", "press_key", "move_to_position", "mouse_drag", "mouse_scroll",
+))
+
+
+class ActionCancelled(BaseException):
+    """
+    输入队列已被抢占，动作未执行
+    与 StopRequested 一样继承 BaseException，不会被各动作中 except Exception 的容错处理吞掉
+    """
+
+
+class QueuedController:
+    """KMController 的代理：输入方法提交到输入队列并等待完成，其余属性直接转发"""
+
+    def __init__(self, queue):
+        self._queue = queue
+
+    def __getattr__(self, name):
+        attribute = getattr(self._queue.km, name)
+        if name not in INPUT_METHODS:
+            return attribute
+
+        def queued(*args, **kwargs):
+            return self._queue.call(attribute, *args, **kwargs)
+        return queued
+
+
+class InputQueue:
+    """
+    串行输入队列
+    start() 后，经 controller 发出的键鼠动作都在同一个输入线程中按提交顺序执行，多个线程同时提交也不会交错；
+    未启动时动作直接在调用线程中执行。输入线程内部再经 controller 调用时同样直接执行。
+    """
+
+    def __init__(self, km):
+        """
+        :param km: KMController
+        """
+        self.km = km
+        self.controller = QueuedController(self)
+        self._jobs = deque()
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread = None
+        self._exited = threading.Event()
+        self._closing = False
+        self._preempted = False
+        self.stats = {"actions": 0, "cancelled": 0, "preemptions": 0}
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """启动输入线程；上一次 preempt() 之后被拒绝的提交重新放行"""
+        if self._thread is not None:
+            return
+        self._closing = False
+        self._preempted = False
+        self._exited.clear()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="input-queue", daemon=True)
+        self._thread.start()
+        # 等输入线程登记到时钟后再返回，虚拟时钟下时间不会在它启动前推进
+        started.wait()
+
+    def stop(self):
+        """取消排队中的动作并停止输入线程，正在执行的动作完成后退出"""
+        thread = self._thread
+        if thread is None:
+            return
+        with self._lock:
+            self._closing = True
+            self._cancel_pending()
+        self._pending.set()
+        if thread is not threading.current_thread():
+            # 经由时钟等待：虚拟时钟下直接 join 会让时间停止推进
+            clock.wait(self._exited, 2)
+        self._thread = None
+
+    def submit(self, func, *args, **kwargs):
+        """
+        提交一个动作
+        :return: Future；队列已被抢占或已停止时 Future 带 ActionCancelled 异常
+        """
+        future = Future()
+        if not self.running or threading.current_thread() is self._thread:
+            self._execute(future, func, args, kwargs)
+            return future
+        with self._lock:
+            if self._preempted or self._closing:
+                self.stats["cancelled"] += 1
+                future.set_exception(ActionCancelled())
+                return future
+            self._jobs.append((future, func, args, kwargs))
+        self._pending.set()
+        return future
+
+    def call(self, func, *args, **kwargs):
+        """提交一个动作并等待完成；:return: 动作的返回值"""
+        return self.wait(self.submit(func, *args, **kwargs))
+
+    def preempt(self, func, *args, **kwargs):
+        """
+        丢弃排队中的动作，把 func 作为下一个动作执行；之后的提交都以 ActionCancelled 拒绝，直到下一次 start()
+        正在执行的动作不会被打断（KMController 的动作都在毫秒到秒级内完成）
+        :return: Future
+        """
+        if not self.running or threading.current_thread() is self._thread:
+            return self.submit(func, *args, **kwargs)
+        future = Future()
+        with self._lock:
+            self.stats["preemptions"] += 1
+            self._preempted = True
+            self._cancel_pending()
+            self._jobs.append((future, func, args, kwargs))
+        self._pending.set()
+        return future
+
+    @staticmethod
+    def wait(future):
+        """经由时钟等待 Future 完成；:return: 结果，动作中的异常在调用线程中重新抛出"""
+        if not future.done():
+            done = threading.Event()
+            future.add_done_callback(lambda _: done.set())
+            clock.wait(done)
+        return future.result()
+
+    def _cancel_pending(self):
+        """在 _lock 内调用"""
+        while self._jobs:
+            future, _, _, _ = self._jobs.popleft()
+            self.stats["cancelled"] += 1
+            future.set_exception(ActionCancelled())
+
+    def _execute(self, future, func, args, kwargs):
+        self.stats["actions"] += 1
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            # StopRequested 等交给等待方重新抛出
+            future.set_exception(e)
+
+    def _run(self, started):
+        clock.current().attach()
+        started.set()
+        try:
+            while True:
+                with self._lock:
+                    job = self._jobs.popleft() if self._jobs else None
+                    if job is None:
+                        if self._closing:
+                            return
+                        self._pending.clear()
+                if job is None:
+                    clock.wait(self._pending)
+                    continue
+                self._execute(*job)
+        finally:
+            self._exited.set()
+
+
+class PerceptionLoop:
+    """
+    后台感知线程
+    反复调用 perceive() 分析最新画面，只保留最近一次完成的结果；结果为 dict，附加 seq（递增序号）
+    与 captured_at（开始感知的时刻）。on_result 在感知所在的线程中对每个结果调用，用于需要立即响应的画面。
+    暂停期间不做感知。未启动时 next() 在调用线程中同步感知。
+    """
+
+    def __init__(self, perceive, state_manager, interval=1.0, on_result=None, name="perception"):
+        """
+        :param perceive: () -> dict，在感知线程中调用
+        :param interval: 两次感知开始之间的最短间隔（秒），wake() 可提前开始下一次
+        :param on_result: (result) -> None
+        """
+        self.perceive = perceive
+        self.state_manager = state_manager
+        self.interval = interval
+        self.on_result = on_result
+        self.name = name
+        self._lock = threading.Lock()
+        self._latest = None
+        self._seq = 0
+        self._published = threading.Event()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._exited = threading.Event()
+        self._thread = None
+        self.stats = {"perceptions": 0, "failures": 0, "cpu_seconds": 0.0}
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._exited.clear()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), name=self.name, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        self._wake.set()
+        clock.wait(self._exited, 2)
+        self._thread = None
+
+    def wake(self):
+        """立即开始下一次感知（如画面监测发现相关区域变化），可在任意线程调用"""
+        self._wake.set()
+
+    def latest(self):
+        """:return: 最近一次完成的结果，尚无结果时为 None"""
+        return self._latest
+
+    def next(self, after=0, timeout=None):
+        """
+        取得序号大于 after 的最新结果，没有时等待；暂停与停止可打断等待
+        :param timeout: 最长等待秒数，超时仍没有新结果时在调用线程中感知一次
+        :return: 结果 dict
+        """
+        if self._thread is None:
+            return self._perceive_once()
+        deadline = None if timeout is None else clock.now() + timeout
+        while True:
+            with self._lock:
+                result = self._latest
+                if result is not None and result["seq"] > after:
+                    return result
+                self._published.clear()
+            remaining = None if deadline is None else deadline - clock.now()
+            if remaining is not None and remaining <= 0:
+                logger.debug(f"[{self.name}] {timeout}s 内没有新的感知结果，同步感知一次")
+                return self._perceive_once()
+            self.state_manager.wait(self._published, remaining)
+
+    def _perceive_once(self):
+        captured_at = clock.now()
+        cpu_started = time.thread_time()
+        with tracer.span(self.name, "perception"):
+            result = self.perceive()
+        with self._lock:
+            self._seq += 1
+            result["seq"] = self._seq
+            result["captured_at"] = captured_at
+            self.stats["perceptions"] += 1
+            self.stats["cpu_seconds"] += time.thread_time() - cpu_started
+            # 较早开始、较晚完成的同步感知不覆盖更新的结果
+            if self._latest is None or self._latest["captured_at"] <= captured_at:
+                self._latest = result
+        self._published.set()
+        if self.on_result is not None:
+            self.on_result(result)
+        return result
+
+    def _run(self, started):
+        clock.current().attach()
+        started.set()
+        logger.debug(f"[{self.name}] 感知线程启动，间隔 {self.interval:.2f}s")
+        try:
+            while not self._stop_event.is_set():
+                began = clock.now()
+                self._wake.clear()
+                if not self.state_manager.is_paused() and not self.state_manager.stop_requested:
+                    try:
+                        self._perceive_once()
+                    except Exception as e:
+                        self.stats["failures"] += 1
+                        logger.error(f"[{self.name}] 感知失败: {e}")
+                clock.wait(self._wake, max(0.0, self.interval - (clock.now() - began)))
+        finally:
+            self._exited.set()
@@ -0,0 +1,102 @@
+# utils/platform_backend.py
+import ctypes
+
+from loguru import logger
+
+
+class PlatformBackend:
+    """
+    平台后端
+    把自动化流程依赖的平台能力（输入注入、截图、提示音、热键监听）集中到一处，
+    GameAutomation 只通过后端取用，便于在没有游戏的机器上换成模拟器
+    """
+
+    name = "base"
+    # 可选：替换 OCR 引擎、时钟读取器与画面分类器（模拟器使用）
+    ocr_engine = None
+    clock_reader = None
+    screen_classifier = None
+    # 可选：替换全局时钟（utils.clock），模拟器使用虚拟时钟
+    clock = None
+
+    def game_rect(self, window_title=None):
+        """
+        游戏画面在屏幕上的位置与尺寸（窗口模式下为客户区，不含标题栏和边框）
+        :param window_title: 游戏窗口标题
+        :return: (左, 上, 宽, 高)，None 表示由界面布局按全屏检测
+        """
+        return None
+
+    def create_input(self):
+        """:return: KMController 使用的输入后端"""
+        raise NotImplementedError
+
+    def create_frame_source(self):
+        """:return: VisionProcess 使用的帧源"""
+        raise NotImplementedError
+
+    def create_keyboard_listener(self, on_toggle_pause, on_stop=None):
+        """:return: 带 start()/stop() 的热键监听器"""
+        return NullKeyboardListener()
+
+    def beep(self, frequency, duration_ms):
+        """暂停/恢复时的提示音，由 StateManager 在独立线程中调用"""
+
+
+class NullKeyboardListener:
+    """不监听任何按键"""
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class WindowsPlatform(PlatformBackend):
+    """实机环境：SendInput 注入、ImageGrab 截图、winsound 提示音、pynput 热键"""
+
+    name = "windows"
+
+    def game_rect(self, window_title=None):
+        if not window_title:
+            return None
+        try:
+            from ctypes import wintypes
+            user32 = ctypes.windll.user32
+        except (AttributeError, OSError):
+            return None
+        hwnd = user32.FindWindowW(None, window_title)
+        if not hwnd:
+            logger.warning(f"未找到游戏窗口: {window_title}，按全屏处理")
+            return None
+        rect = wintypes.RECT()
+        origin = wintypes.POINT(0, 0)
+        if not user32.GetClientRect(hwnd, ctypes.byref(rect)) or not user32.ClientToScreen(hwnd, ctypes.byref(origin)):
+            logger.warning(f"无法读取游戏窗口客户区: {window_title}，按全屏处理")
+            return None
+        return origin.x, origin.y, rect.right - rect.left, rect.bottom - rect.top
+
+    def create_input(self):
+        from utils.km_controller import Win32InputBackend
+        return Win32InputBackend()
+
+    def create_frame_source(self):
+        from utils.frame_source import ScreenFrameSource
+        return ScreenFrameSource()
+
+    def create_keyboard_listener(self, on_toggle_pause, on_stop=None):
+        from utils.keyboard_listener import KeyboardListener
+        return KeyboardListener(on_toggle_pause, on_stop)
+
+    def beep(self, frequency, duration_ms):
+        try:
+            import winsound
+        except ImportError:
+            logger.debug("当前平台不支持提示音")
+            return
+        winsound.Beep(frequency, duration_ms)
+
+
+def default_platform():
+    return WindowsPlatform()
@@ -0,0 +1,109 @@
+# utils/postconditions.py
+import threading
+
+from loguru import logger
+
+
+class Postcondition:
+    """
+    动作的视觉后置条件
+    动作执行前调用 arm() 记录基准，执行后调用 wait() 等待条件满足
+    """
+
+    def __init__(self, description):
+        self.description = description
+        self.result = None
+
+    def arm(self):
+        """动作执行前调用，记录判断所需的基准画面"""
+
+    def wait(self, timeout):
+        """
+        :param timeout: 最长等待秒数
+        :return: 是否在超时前满足
+        """
+        raise NotImplementedError
+
+
+class RegionChanges(Postcondition):
+    """区域画面相对动作前发生变化，如点击关闭后商店面板消失"""
+
+    def __init__(self, vision, region, description=None):
+        super().__init__(description or f"区域变化 {tuple(region)}")
+        self.vision = vision
+        self.region = tuple(region)
+        self._baseline = None
+
+    def arm(self):
+        self._baseline = self.vision.capture_signature(*self.region)
+
+    def wait(self, timeout):
+        return self.vision.wait_for_region_change(*self.region, timeout=timeout, baseline=self._baseline)
+
+
+class TextAppears(Postcondition):
+    """指定文本出现在区域内；满足后 result 为 find_text 的返回值 (x, y, 置信度)"""
+
+    def __init__(self, vision, text, region, rec_only=False, description=None):
+        super().__init__(description or f"出现文本 {text}")
+        self.vision = vision
+        self.text = text
+        self.region = tuple(region)
+        self.rec_only = rec_only
+
+    def wait(self, timeout):
+        self.result = self.vision.wait_for_text(self.text, *self.region, timeout=timeout, rec_only=self.rec_only)
+        return self.result[0] > 0
+
+
+class ActionLatencyLog:
+    """
+    动作响应延迟记录
+    记录每个带后置条件的动作从输入提交到画面响应的实际耗时，与原先固定等待的时长对比
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def record(self, action, latency, satisfied, attempts, padding):
+        """
+        :param action: 动作名称（后置条件描述）
+        :param latency: 输入提交到条件满足（或超时）的秒数
+        :param satisfied: 条件是否满足
+        :param attempts: 执行次数（含重试）
+        :param padding: 不使用后置条件时原本会固定等待的秒数
+        """
+        with self._lock:
+            self._records.setdefault(action, []).append((latency, satisfied, attempts, padding))
+
+    def stats(self):
+        """
+        :return: {动作: {count, timeouts, retries, mean_ms, p95_ms, max_ms, padding_ms}}，延迟只统计满足的记录
+        """
+        with self._lock:
+            records = {action: list(items) for action, items in self._records.items()}
+        stats = {}
+        for action, items in records.items():
+            latencies = sorted(latency for latency, satisfied, _, _ in items if satisfied)
+            stats[action] = {
+                "count": len(items),
+                "timeouts": sum(1 for _, satisfied, _, _ in items if not satisfied),
+                "retries": sum(attempts - 1 for _, _, attempts, _ in items),
+                "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0,
+                "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+                "padding_ms": items[-1][3] * 1000,
+            }
+        return stats
+
+    def report(self):
+        """把统计结果写入日志"""
+        for action, item in self.stats().items():
+            logger.info(f"动作响应 [{action}] {item['count']} 次, 超时 {item['timeouts']} 次, 重试 {item['retries']} 次, "
+                        f"平均 {item['mean_ms']:.0f}ms, p95 {item['p95_ms']:.0f}ms, 最大 {item['max_ms']:.0f}ms "
+                        f"(原固定等待 {item['padding_ms']:.0f}ms)")
+
+    def reset(self):
+        with self._lock:
+            self._records = {}
@@ -0,0 +1,205 @@
+# utils/screen_classifier.py
+"""
+画面快速分类器
+把整帧缩成 32x18 的缩略图，再把开始游戏、收起、确定三个按钮区域各缩成 16x8，
+拼成特征向量后与参考帧做最近邻比较，单次分类在 CPU 上约 1 毫秒，不需要 OCR。
+置信度取最近的参考帧与最近的其他画面参考帧之间的距离差，低于阈值时由调用方回退到 OCR；
+OCR 确认的画面可以在运行中学习为新的参考帧，也可以用 benchmarks.screen_classifier 从标注语料生成。
+"""
+import os
+import time
+
+import numpy as np
+from loguru import logger
+
+from utils import layout
+from utils.lazy_import import lazy_module
+from utils.template_registry import IMAGES_DIR
+
+cv2 = lazy_module("cv2")
+
+# 参考帧特征文件
+REFERENCE_PATH = os.path.join(IMAGES_DIR, "screen_references.npz")
+# 整帧缩略图尺寸 (宽, 高)
+THUMB_SIZE = (32, 18)
+# 探测区域缩略图尺寸
+REGION_SIZE = (16, 8)
+# 与各阶段 OCR 探测一致的按钮区域；时钟每秒变化，只会增加同一画面内的差异，不参与分类
+PROBE_REGIONS = ("common.start_game_button", "runtime.collapse_button", "archive.confirm_button")
+
+
+def _thumbnail(image, size):
+    # 先隔行隔列抽样再用区域插值缩小，整帧缩放的耗时与分辨率基本无关
+    step = max(1, min(image.shape[1] // (size[0] * 4), image.shape[0] // (size[1] * 4)))
+    sampled = np.ascontiguousarray(image[::step, ::step])
+    return cv2.resize(sampled, size, interpolation=cv2.INTER_AREA).astype(np.float32).ravel() / 255
+
+
+def extract_features(frame, crop=None):
+    """
+    :param frame: 整帧 RGB 图像
+    :param crop: (x1, y1, x2, y2, frame=) -> 区域视图，默认按屏幕坐标直接切片；传入 FrameSource.crop 以处理画面偏移
+    :return: 特征向量
+    """
+    if crop is None:
+        def crop(x1, y1, x2, y2, frame):
+            return frame[y1:y2, x1:x2]
+    positions = layout.current()
+    blocks = [_thumbnail(frame, THUMB_SIZE)]
+    for name in PROBE_REGIONS:
+        blocks.append(_thumbnail(crop(*positions.region(name), frame=frame), REGION_SIZE))
+    return np.concatenate(blocks)
+
+
+def _block_matrix():
+    """
+    特征 -> 特征块的求均值矩阵
+    距离为各块均方根差的平均值（0~1）：均方根不会把按钮这类小面积的变化平均掉
+    """
+    sizes = [THUMB_SIZE[0] * THUMB_SIZE[1] * 3] + [REGION_SIZE[0] * REGION_SIZE[1] * 3] * len(PROBE_REGIONS)
+    matrix = np.zeros((sum(sizes), len(sizes)), dtype=np.float32)
+    start = 0
+    for block, size in enumerate(sizes):
+        matrix[start:start + size, block] = 1.0 / size
+        start += size
+    return matrix
+
+
+class ScreenClassifier:
+    """
+    参考帧最近邻分类器
+    参考帧可预先用 benchmarks.screen_classifier fit 从人工标注的语料生成到 images/screen_references.npz，
+    也可以在运行中由 OCR 确认的画面学习；学到的参考帧默认只保存在内存中，单次 OCR 的误判不会写入参考帧文件。
+    """
+
+    def __init__(self, reference_path=REFERENCE_PATH, min_confidence=0.5, max_distance=0.15,
+                 max_per_label=30, save_learned=False):
+        """
+        :param reference_path: 参考帧特征文件，None 时只在内存中学习
+        :param min_confidence: 低于该置信度时视为无法分类，由调用方回退到 OCR
+        :param max_distance: 与最近参考帧的距离超过该值时置信度为 0（从未见过的画面）
+        :param max_per_label: 每个画面最多保留的参考帧数，超出时丢弃最早的
+        :param save_learned: 学到新参考帧时是否写入参考帧文件
+        """
+        self.reference_path = reference_path
+        self.min_confidence = min_confidence
+        self.max_distance = max_distance
+        self.max_per_label = max_per_label
+        self.save_learned = save_learned
+        self._blocks = _block_matrix()
+        self._features = np.zeros((0, self._blocks.shape[0]), dtype=np.float32)
+        self._labels = np.zeros(0, dtype=object)
+        self.load()
+
+    def load(self):
+        """从参考帧文件加载"""
+        if not self.reference_path or not os.path.exists(self.reference_path):
+            return
+        data = np.load(self.reference_path, allow_pickle=False)
+        if data["features"].shape[1] != self._blocks.shape[0]:
+            logger.warning(f"参考帧特征尺寸不匹配，已忽略: {self.reference_path}")
+            return
+        self._features = data["features"].astype(np.float32)
+        self._labels = data["labels"].astype(object)
+        logger.info(f"画面参考帧已加载: {self.counts()}")
+
+    def save(self, path=None):
+        path = path or self.reference_path
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            np.savez_compressed(path, features=self._features, labels=self._labels.astype(str))
+        except OSError as e:
+            logger.warning(f"保存画面参考帧失败: {e}")
+
+    @property
+    def ready(self):
+        """至少有两种画面的参考帧"""
+        return len(set(self._labels)) >= 2
+
+    def counts(self):
+        """:return: {画面: 参考帧数}"""
+        labels, counts = np.unique(self._labels.astype(str), return_counts=True)
+        return dict(zip(labels.tolist(), counts.tolist()))
+
+    def classify(self, features):
+        """
+        :param features: extract_features() 的结果
+        :return: (画面, 置信度)；参考帧不足时返回 (None, 0.0)
+        """
+        if not self.ready:
+            return None, 0.0
+        distances = np.sqrt(np.square(self._features - features) @ self._blocks).mean(axis=1)
+        nearest = int(np.argmin(distances))
+        label = self._labels[nearest]
+        best = float(distances[nearest])
+        other = float(distances[self._labels != label].min())
+        if best > self.max_distance or other <= 0:
+            return label, 0.0
+        return label, (other - best) / other
+
+    def learn(self, features, label):
+        """
+        加入一帧已确认画面的参考帧；当前已能以足够置信度正确分类时不重复加入
+        :return: 是否加入
+        """
+        predicted, confidence = self.classify(features)
+        if predicted == label and confidence >= self.min_confidence:
+            return False
+        self.add(features, label)
+        if self.save_learned and self.reference_path:
+            self.save()
+        logger.info(f"学到画面参考帧: {label}，当前 {self.counts()}")
+        return True
+
+    def add(self, features, label):
+        """不做检查直接加入参考帧"""
+        same = np.flatnonzero(self._labels == label)
+        if len(same) >= self.max_per_label:
+            keep = np.ones(len(self._labels), dtype=bool)
+            keep[same[0]] = False
+            self._features = self._features[keep]
+            self._labels = self._labels[keep]
+        self._features = np.vstack([self._features, np.asarray(features, dtype=np.float32)[None]])
+        self._labels = np.append(self._labels, np.array([label], dtype=object))
+
+
+def evaluate(classifier, samples):
+    """
+    在标注样本上评估分类器
+    :param samples: [(特征, 画面)]
+    :return: 统计结果 dict：整体与各画面的准确率、回退率、混淆矩阵与分类耗时
+    """
+    labels = sorted({label for _, label in samples})
+    confusion = {expected: {} for expected in labels}
+    per_label = {label: {"total": 0, "correct": 0, "fallback": 0, "wrong": 0} for label in labels}
+    latencies = []
+    for features, expected in samples:
+        start = time.perf_counter()
+        predicted, confidence = classifier.classify(features)
+        latencies.append((time.perf_counter() - start) * 1000)
+        stats = per_label[expected]
+        stats["total"] += 1
+        if confidence < classifier.min_confidence:
+            stats["fallback"] += 1
+            predicted = "fallback"
+        elif predicted == expected:
+            stats["correct"] += 1
+        else:
+            stats["wrong"] += 1
+        confusion[expected][predicted] = confusion[expected].get(predicted, 0) + 1
+
+    latencies.sort()
+    total = len(samples)
+    totals = {key: sum(stats[key] for stats in per_label.values()) for key in ("correct", "fallback", "wrong")}
+    classified = total - totals["fallback"]
+    return {
+        "total": total,
+        **totals,
+        # 分类器给出结果时的准确率；回退部分由 OCR 判断
+        "precision": totals["correct"] / classified if classified else 0.0,
+        "coverage": classified / total if total else 0.0,
+        "per_label": per_label,
+        "confusion": confusion,
+        "classify_p50_ms": latencies[total // 2] if total else 0.0,
+        "classify_p95_ms": latencies[min(total - 1, int(total * 0.95))] if total else 0.0,
+    }
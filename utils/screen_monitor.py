@@ -0,0 +1,195 @@
+# utils/screen_monitor.py
+import queue
+import threading
+import time
+
+from loguru import logger
+
+from utils import clock
+from utils.frame_source import region_signature, signature_distance
+
+# 事件类型
+REGION_CHANGED = "changed"
+REGION_STABLE = "stable"
+
+
+class ScreenEvent:
+    """区域画面事件"""
+
+    __slots__ = ("name", "kind", "timestamp", "frame_id", "distance")
+
+    def __init__(self, name, kind, timestamp, frame_id, distance):
+        self.name = name
+        self.kind = kind
+        self.timestamp = timestamp
+        self.frame_id = frame_id
+        self.distance = distance
+
+    def __repr__(self):
+        return f"ScreenEvent({self.name!r}, {self.kind!r}, frame={self.frame_id}, dist={self.distance:.1f})"
+
+
+class _Region:
+    def __init__(self, roi):
+        self.roi = tuple(roi)
+        self.signature = None
+        self.last_change = clock.now()
+        self.stable = True
+
+
+class ScreenMonitor(threading.Thread):
+    """
+    后台画面变化监测线程
+    按固定频率只截取登记区域的外接矩形（不抓整帧、不更新共享的当前帧），为每个区域维护廉价签名（隔点采样灰度图），
+    区域发生变化时发布 "changed" 事件，变化后保持 stable_time 秒不变时发布 "stable" 事件。
+    订阅者可以注册回调，或取得一个线程安全队列；阶段代码用 wait_for() 阻塞等待事件，不再猜测睡眠时长。
+    """
+
+    def __init__(self, frame_source, rate=2, change_threshold=2.0, stable_time=0.5):
+        """
+        :param frame_source: 帧源（与 VisionProcess 共用）
+        :param rate: 采样频率（帧/秒）
+        :param change_threshold: 判定区域变化的平均灰度差（0~255）
+        :param stable_time: 变化后多少秒不再变化视为稳定
+        """
+        super().__init__(name="screen-monitor", daemon=True)
+        self.frame_source = frame_source
+        self.interval = 1.0 / rate
+        self.change_threshold = change_threshold
+        self.stable_time = stable_time
+        self._regions = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.frames_sampled = 0
+        self.events_fired = 0
+        self.cpu_time = 0.0
+
+    def watch(self, name, roi):
+        """登记需要监测的区域 (x1, y1, x2, y2)"""
+        with self._lock:
+            self._regions[name] = _Region(roi)
+
+    def unwatch(self, name):
+        with self._lock:
+            self._regions.pop(name, None)
+
+    def subscribe(self, callback=None, names=None, kinds=None):
+        """
+        订阅事件
+        :param callback: 回调函数，在监测线程中调用；为 None 时返回一个 queue.Queue 接收事件
+        :param names: 只接收这些区域的事件，None 表示全部
+        :param kinds: 只接收这些类型的事件，None 表示全部
+        :return: 订阅句柄（回调函数或队列），用于 unsubscribe
+        """
+        target = callback if callback is not None else queue.Queue()
+        subscriber = (target, set(names) if names else None, set(kinds) if kinds else None)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return target
+
+    def unsubscribe(self, handle):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[0] is not handle]
+
+    def wait_for(self, name, kind=REGION_CHANGED, timeout=None, wait=None):
+        """
+        阻塞等待指定区域的下一个事件
+        :param wait: 等待函数 (event, timeout)，默认 clock.wait；传入 StateManager.wait 可被暂停与停止打断
+        :return: ScreenEvent，超时返回 None
+        """
+        received = []
+        arrived = threading.Event()
+
+        def on_event(event):
+            if not received:
+                received.append(event)
+                arrived.set()
+
+        self.subscribe(on_event, names=[name], kinds=[kind])
+        try:
+            (wait or clock.wait)(arrived, timeout)
+        finally:
+            self.unsubscribe(on_event)
+        return received[0] if received else None
+
+    def is_stable(self, name):
+        """区域当前是否处于稳定状态"""
+        with self._lock:
+            region = self._regions.get(name)
+            return region is not None and region.stable
+
+    def stats(self):
+        """采样帧数、事件数与监测线程占用的 CPU 时间"""
+        return {
+            "frames_sampled": self.frames_sampled,
+            "events_fired": self.events_fired,
+            "cpu_seconds": self.cpu_time,
+        }
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=2)
+        logger.info(f"画面监测线程已停止: {self.stats()}")
+
+    def run(self):
+        logger.info(f"画面监测线程启动，采样间隔 {self.interval:.3f}s")
+        while not self._stop_event.is_set():
+            started = clock.now()
+            cpu_started = time.thread_time()
+            try:
+                self._sample()
+            except Exception as e:
+                logger.error(f"画面监测采样失败: {e}")
+            self.cpu_time += time.thread_time() - cpu_started
+            clock.wait(self._stop_event, max(0.0, self.interval - (clock.now() - started)))
+
+    def _sample(self):
+        with self._lock:
+            regions = list(self._regions.items())
+        if not regions:
+            return
+        # 所有区域的外接矩形只截取一次
+        left = min(region.roi[0] for _, region in regions)
+        top = min(region.roi[1] for _, region in regions)
+        right = max(region.roi[2] for _, region in regions)
+        bottom = max(region.roi[3] for _, region in regions)
+        image = self.frame_source.grab(left, top, right, bottom)
+        now = clock.now()
+        self.frames_sampled += 1
+        frame_id = self.frames_sampled
+
+        events = []
+        for name, region in regions:
+            x1, y1, x2, y2 = region.roi
+            signature = region_signature(image[y1 - top:y2 - top, x1 - left:x2 - left])
+            distance = signature_distance(signature, region.signature)
+            if region.signature is None:
+                region.signature = signature
+            elif distance > self.change_threshold:
+                region.signature = signature
+                region.last_change = now
+                region.stable = False
+                events.append(ScreenEvent(name, REGION_CHANGED, now, frame_id, distance))
+            elif not region.stable and now - region.last_change >= self.stable_time:
+                region.stable = True
+                events.append(ScreenEvent(name, REGION_STABLE, now, frame_id, distance))
+
+        for event in events:
+            self._publish(event)
+
+    def _publish(self, event):
+        self.events_fired += 1
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for target, names, kinds in subscribers:
+            if (names is not None and event.name not in names) or (kinds is not None and event.kind not in kinds):
+                continue
+            if isinstance(target, queue.Queue):
+                target.put(event)
+            else:
+                try:
+                    target(event)
+                except Exception as e:
+                    logger.error(f"画面事件回调异常: {e}")
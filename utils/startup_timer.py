@@ -0,0 +1,37 @@
+# utils/startup_timer.py
+import threading
+import time
+
+from loguru import logger
+
+# 进程启动基准时间，在导入本模块时记录（main.py 第一时间导入）
+_START = time.perf_counter()
+_marks = {}
+_lock = threading.Lock()
+
+# 启动报告中的关键节点及其显示名称
+MILESTONES = {
+    "dialog": "显示配置窗口",
+    "automation": "自动化系统初始化完成",
+    "ocr_ready": "OCR 引擎加载完成",
+    "first_inference": "首次推理完成",
+}
+
+
+def mark(name):
+    """记录某个启动节点距进程启动的秒数，只记录第一次"""
+    with _lock:
+        if name not in _marks:
+            _marks[name] = time.perf_counter() - _START
+        return _marks[name]
+
+
+def elapsed(name):
+    return _marks.get(name)
+
+
+def report():
+    """输出启动耗时报告"""
+    with _lock:
+        parts = [f"{label} {_marks[key]:.2f}s" for key, label in MILESTONES.items() if key in _marks]
+    logger.info(f"启动耗时: {' | '.join(parts)}")
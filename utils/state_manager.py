@@ -1,10 +1,29 @@
 # state_manager.py
+"""
+运行状态管理
+暂停、恢复与停止都基于 threading.Event：等待中的线程在状态切换的同时被唤醒，不再按秒轮询。
+各模块通过 sleep()/sleep_until()/wait() 等待，暂停时阻塞到恢复，停止时抛出 StopRequested，
+由主循环捕获后正常退出并清理资源。
+"""
 import threading
-import time
+from contextlib import contextmanager
 
-import winsound
 from loguru import logger
 
+from utils import clock
+from utils.platform_backend import default_platform
+
+# sleep_until 最后一段交给时钟精确等待，不再响应中断
+_SPIN_MARGIN = 0.002
+
+
+class StopRequested(BaseException):
+    """
+    收到停止请求，由主循环捕获后退出
+    继承 BaseException：各动作中 except Exception 的容错处理不会把停止请求吞掉
+    """
+
+
 class StateManager:
     _instance = None  # 类变量存储单例
     _lock = threading.Lock()  # 类级线程锁
@@ -21,26 +40,123 @@ class StateManager:
         """初始化仅执行一次"""
         if not self._initialized:
             self._paused = False
-            self._init_lock = threading.Lock()  # 实例级锁
+            self._init_lock = threading.Lock()  # 实例级锁，只保护状态切换
+            self._resumed = threading.Event()  # 运行中或已停止时置位，暂停时清除
+            self._interrupt = threading.Event()  # 暂停或停止时置位
+            self._stopped = threading.Event()
+            self._linked = set()  # 暂停或停止时需要一并置位的等待事件
+            self._resumed.set()
+            self.beeper = default_platform().beep  # 提示音，可替换为其他平台后端的实现
             self._initialized = True
 
+    def reset(self) -> None:
+        """恢复到初始的运行状态，新建自动化流程时调用"""
+        with self._init_lock:
+            self._paused = False
+            self._stopped.clear()
+            self._interrupt.clear()
+            self._resumed.set()
+
     def toggle_pause(self) -> bool:
-        """切换暂停状态（线程安全）"""
+        """切换暂停状态（线程安全），提示音在锁外的独立线程中播放"""
         with self._init_lock:
             self._paused = not self._paused
-            status = "已暂停" if self._paused else "已恢复"
-            winsound.Beep(2000 if self._paused else 1000, 500)
-            logger.info(f"脚本状态: {status}")
-            return self._paused
+            paused = self._paused
+            if paused:
+                self._resumed.clear()
+                self._signal_interrupt()
+            else:
+                self._resumed.set()
+                if not self._stopped.is_set():
+                    self._interrupt.clear()
+        logger.info(f"脚本状态: {'已暂停' if paused else '已恢复'}")
+        self._beep(2000 if paused else 1000, 500)
+        return paused
 
-    def is_paused(self) -> bool:
-        """获取当前状态（线程安全）"""
+    def stop(self) -> None:
+        """请求停止：所有等待立即返回，下一次检查时抛出 StopRequested"""
         with self._init_lock:
-            return self._paused
+            if self._stopped.is_set():
+                return
+            self._stopped.set()
+            self._resumed.set()
+            self._signal_interrupt()
+        logger.info("收到停止请求")
+
+    def _signal_interrupt(self):
+        """在 _init_lock 内调用"""
+        self._interrupt.set()
+        for event in self._linked:
+            event.set()
+
+    def _beep(self, frequency, duration):
+        threading.Thread(target=self.beeper, args=(frequency, duration), name="beeper", daemon=True).start()
+
+    def is_paused(self) -> bool:
+        """获取当前状态（无锁读取）"""
+        return self._paused
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stopped.is_set()
+
+    def check(self) -> None:
+        """已停止时抛出 StopRequested"""
+        if self._stopped.is_set():
+            raise StopRequested()
 
     def wait_until_resumed(self) -> None:
-        """阻塞直到脚本恢复（每10秒提示）"""
-        while self.is_paused():
-            if int(time.time()) % 10 == 0:
-                logger.info("脚本暂停中")
-            time.sleep(1)
\ No newline at end of file
+        """阻塞直到脚本恢复（每10秒提示）；已停止时抛出 StopRequested"""
+        while not self._resumed.is_set():
+            logger.info("脚本暂停中")
+            clock.wait(self._resumed, 10)
+        self.check()
+
+    @contextmanager
+    def interruptible(self, event):
+        """
+        块内暂停或停止时置位 event，使等待该事件的线程立即醒来
+        用法:
+            with state_manager.interruptible(arrived):
+                clock.wait(arrived, timeout)
+        """
+        with self._init_lock:
+            self._linked.add(event)
+            if self._interrupt.is_set():
+                event.set()
+        try:
+            yield event
+        finally:
+            with self._init_lock:
+                self._linked.discard(event)
+
+    def wait(self, event, timeout=None) -> bool:
+        """
+        等待事件，暂停或停止时立即中断
+        被暂停打断时阻塞到恢复后返回，被停止打断时抛出 StopRequested
+        :return: 事件是否已置位（被暂停打断时也为 True，调用方应以自己的结果为准）
+        """
+        with self.interruptible(event):
+            result = clock.wait(event, timeout)
+        if self._interrupt.is_set():
+            self.wait_until_resumed()
+        return result
+
+    def sleep(self, seconds) -> None:
+        """可中断的睡眠：暂停时提前结束并阻塞到恢复，停止时抛出 StopRequested"""
+        self.wait(threading.Event(), seconds)
+
+    def sleep_until(self, deadline) -> bool:
+        """
+        睡眠到 clock.now() 的指定时刻
+        :return: 是否睡满；暂停或停止时立即返回 False，由调用方处理
+        """
+        remaining = deadline - clock.now() - _SPIN_MARGIN
+        if remaining > 0:
+            interrupted = threading.Event()
+            with self.interruptible(interrupted):
+                clock.wait(interrupted, remaining)
+            if interrupted.is_set():
+                return False
+        clock.sleep_until(deadline)
+        return True
@@ -0,0 +1,114 @@
+# utils/template_registry.py
+import glob
+import os
+
+from loguru import logger
+
+from utils import layout
+from utils.lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# 模板图片目录
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images")
+
+# 灰度金字塔的最大层数，以及缩小后模板的最小边长（再小就没有足够的纹理做粗匹配）
+PYRAMID_LEVELS = 3
+PYRAMID_MIN_SIZE = 12
+
+
+def build_pyramid(gray, levels=PYRAMID_LEVELS, min_size=0):
+    """
+    构建灰度图像金字塔
+    :param gray: 第 0 层（原始分辨率）灰度图
+    :param levels: 最多额外缩小的层数，每层长宽减半
+    :param min_size: 缩小后最短边不得小于此值
+    :return: [第 0 层, 第 1 层, ...]
+    """
+    pyramid = [gray]
+    for _ in range(levels):
+        height, width = pyramid[-1].shape[:2]
+        if min(height, width) // 2 < max(min_size, 1):
+            break
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+class Template:
+    """预处理好的模板图像，加载时预先计算灰度金字塔供粗到细匹配使用"""
+
+    def __init__(self, name, path, bgr):
+        self.name = name
+        self.path = path
+        self.bgr = bgr
+        self.gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        self.height, self.width = bgr.shape[:2]
+        self.pyramid = build_pyramid(self.gray, min_size=PYRAMID_MIN_SIZE)
+
+
+class TemplateRegistry:
+    """
+    模板注册表
+    启动时一次性从 images/ 目录加载全部模板并预先转换，之后按名称取用，不再读盘。
+    模板按基准分辨率截取，加载时按界面布局的缩放比例缩放到当前分辨率
+    """
+
+    EXTENSIONS = ("bmp", "png")
+
+    def __init__(self, images_dir=IMAGES_DIR, screen_layout=None):
+        """
+        :param images_dir: 模板图片目录
+        :param screen_layout: 界面布局，默认使用当前布局
+        """
+        self.images_dir = images_dir
+        self.screen_layout = screen_layout if screen_layout is not None else layout.current()
+        self._templates = {}
+        self.load_all()
+
+    @staticmethod
+    def key_of(name_or_path):
+        """'images/shengji.bmp'、'shengji.bmp'、'shengji' 都对应同一个键 'shengji'"""
+        return os.path.splitext(os.path.basename(name_or_path))[0]
+
+    def load_all(self):
+        """加载目录下的全部模板"""
+        if not os.path.isdir(self.images_dir):
+            logger.warning(f"模板目录不存在: {self.images_dir}")
+            return
+        for ext in self.EXTENSIONS:
+            for path in sorted(glob.glob(os.path.join(self.images_dir, f"*.{ext}"))):
+                self.add(path)
+        logger.info(f"模板注册表已加载 {len(self._templates)} 个模板: {sorted(self._templates)}")
+
+    def add(self, path, name=None):
+        """
+        加载单个模板
+        :param path: 模板图像的文件路径
+        :param name: 注册名称，默认取文件名（不含扩展名）
+        :return: Template
+        """
+        bgr = cv2.imread(path, cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise FileNotFoundError(f"无法读取模板图像: {path}")
+        bgr = self.screen_layout.scale_image(bgr)
+        template = Template(name or self.key_of(path), path, bgr)
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name_or_path):
+        """
+        按名称或路径获取模板；未注册但文件存在时加载并缓存
+        :return: Template
+        """
+        template = self._templates.get(self.key_of(name_or_path))
+        if template is None:
+            if not os.path.exists(name_or_path):
+                raise KeyError(f"未注册的模板: {name_or_path}")
+            template = self.add(name_or_path)
+        return template
+
+    def names(self):
+        return list(self._templates)
+
+    def __contains__(self, name_or_path):
+        return self.key_of(name_or_path) in self._templates
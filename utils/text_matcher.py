@@ -0,0 +1,143 @@
+# utils/text_matcher.py
+from collections import deque
+from functools import lru_cache
+
+
+class TextMatch:
+    """一个模式在 OCR 结果中的最佳命中"""
+
+    __slots__ = ("pattern", "priority", "text", "x", "y", "confidence", "distance")
+
+    def __init__(self, pattern, priority, text, x, y, confidence, distance):
+        self.pattern = pattern
+        self.priority = priority
+        self.text = text
+        self.x = x
+        self.y = y
+        self.confidence = confidence
+        self.distance = distance
+
+    @property
+    def score(self):
+        """综合得分：识别置信度按编辑距离折算"""
+        return self.confidence * (1 - self.distance / len(self.pattern))
+
+    def __repr__(self):
+        return (f"TextMatch({self.pattern!r}, text={self.text!r}, pos=({self.x}, {self.y}), "
+                f"conf={self.confidence:.2f}, dist={self.distance})")
+
+
+class TextMatcher:
+    """
+    多模式模糊文本匹配器
+    预先把一组查询文本编译成 Aho-Corasick 自动机，对每条 OCR 文本只扫描一遍即可找出
+    所有精确包含的模式；未精确命中的模式再用有界编辑距离容忍 OCR 识别错字。
+    模式的先后顺序即优先级（越靠前越优先），但精确命中总是排在模糊命中之前。
+    """
+
+    def __init__(self, patterns, max_distance=1):
+        """
+        :param patterns: 按优先级排列的查询文本
+        :param max_distance: 允许的最大编辑距离；短模式自动收紧，三个字及以下的模式只接受精确命中，
+                             避免如“黄金甲”与“黄金剑”这类只差一个字的名称互相误配
+        """
+        self.patterns = list(dict.fromkeys(patterns))
+        self.max_distance = max_distance
+        self._allowed = [0 if len(p) <= 3 else min(max_distance, (len(p) - 1) // 2) for p in self.patterns]
+        self._build()
+
+    def _build(self):
+        """构建 Aho-Corasick 自动机：goto 表、失配指针与输出集合"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node].add(index)
+
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                pending.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] |= self._output[self._fail[child]]
+
+    def exact_hits(self, text):
+        """一遍扫描返回 text 中精确出现的所有模式序号"""
+        hits = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            hits |= self._output[node]
+        return hits
+
+    @staticmethod
+    def substring_distance(pattern, text, limit):
+        """
+        pattern 与 text 中任意子串的最小编辑距离（Sellers 算法），超过 limit 时返回 limit + 1
+        """
+        previous = list(range(len(pattern) + 1))
+        best = previous[-1]
+        for char in text:
+            current = [0]
+            for i, p_char in enumerate(pattern, 1):
+                current.append(min(previous[i] + 1, current[i - 1] + 1,
+                                   previous[i - 1] + (p_char != char)))
+            best = min(best, current[-1])
+            previous = current
+        return best if best <= limit else limit + 1
+
+    def match(self, items, threshold=0.0):
+        """
+        在一组 OCR 结果中为每个模式找出最佳命中
+        :param items: [(x, y, 文本, 置信度), ...]
+        :param threshold: 最低识别置信度
+        :return: {模式: TextMatch}，未命中的模式不出现
+        """
+        best = {}
+        for x, y, text, confidence in items:
+            if confidence < threshold:
+                continue
+            hits = self.exact_hits(text)
+            for index, pattern in enumerate(self.patterns):
+                if index in hits:
+                    distance = 0
+                elif self._allowed[index]:
+                    distance = self.substring_distance(pattern, text, self._allowed[index])
+                    if distance > self._allowed[index]:
+                        continue
+                else:
+                    continue
+                candidate = TextMatch(pattern, index, text, x, y, confidence, distance)
+                current = best.get(pattern)
+                if current is None or candidate.score > current.score:
+                    best[pattern] = candidate
+        return best
+
+    def best(self, items, threshold=0.0):
+        """
+        :return: 有精确命中时取其中优先级最高的，否则取模糊命中中优先级最高的 TextMatch；全部未命中返回 None
+        """
+        matches = self.match(items, threshold)
+        if not matches:
+            return None
+        return min(matches.values(), key=lambda m: (m.distance > 0, m.priority, -m.score))
+
+
+@lru_cache(maxsize=64)
+def compile_matcher(patterns, max_distance=1):
+    """按模式元组缓存编译好的匹配器"""
+    return TextMatcher(patterns, max_distance)
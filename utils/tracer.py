@@ -0,0 +1,205 @@
+# utils/tracer.py
+"""
+时间线追踪
+记录截图、OCR 推理、模板匹配、SendInput、等待以及各阶段/管理器方法的耗时区间，
+每局写出一个 Chrome Trace 格式的 JSON 文件，可直接拖入 https://ui.perfetto.dev 或 chrome://tracing 查看。
+默认关闭：关闭时 span() 返回共享的空对象，traced() 装饰的方法只多一次全局变量判断。
+时间取自 utils.clock；安装虚拟时钟时只有等待会占用时间，计算耗时显示为 0。
+用法:
+    tracer.enable()                         # 启动时开启
+    with tracer.span("ocr", "vision"):
+        ...
+    @tracer.traced("phase")
+    def execute(self): ...
+    tracer.dump()                           # 每局结束写出一个文件
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+from loguru import logger
+
+from utils import clock
+
+TRACE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "traces")
+
+_tracer = None
+
+
+class _NullSpan:
+    """追踪关闭时使用的空区间"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.category, self.start, self.tracer.now(), self.args)
+        return False
+
+    def set(self, **args):
+        """在区间结束前补充参数，如识别结果"""
+        self.args.update(args)
+
+
+class Tracer:
+    """收集一局内的追踪事件，dump() 时写出并清空"""
+
+    def __init__(self, output_dir=TRACE_DIR, time_source=None):
+        """
+        :param output_dir: 追踪文件目录
+        :param time_source: 返回秒数的时间函数，默认 utils.clock.now
+        """
+        self.output_dir = output_dir
+        self.now = time_source if time_source is not None else clock.now
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._session = time.strftime("%Y%m%d_%H%M%S")
+        self._dumps = 0
+
+    def span(self, name, category, args=None):
+        return _Span(self, name, category, args if args is not None else {})
+
+    def complete(self, name, category, start, end, args=None):
+        """记录一个已结束的区间（Chrome Trace 的 "X" 事件）"""
+        event = {"name": name, "cat": category, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6,
+                 "pid": self._pid, "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        self._append(event)
+
+    def instant(self, name, category, args=None):
+        """记录一个瞬时事件（"i" 事件）"""
+        event = {"name": name, "cat": category, "ph": "i", "s": "t", "ts": self.now() * 1e6,
+                 "pid": self._pid, "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        self._append(event)
+
+    def _append(self, event):
+        with self._lock:
+            if event["tid"] not in self._threads:
+                self._threads[event["tid"]] = threading.current_thread().name
+            self._events.append(event)
+
+    def summary(self, events, top=8):
+        """:return: [(区间名, 总毫秒数, 次数)]，按总耗时降序，嵌套区间会重复计入父区间"""
+        totals = {}
+        for event in events:
+            if event["ph"] == "X":
+                total, count = totals.get(event["name"], (0.0, 0))
+                totals[event["name"]] = (total + event["dur"] / 1000, count + 1)
+        ranked = sorted(totals.items(), key=lambda item: -item[1][0])[:top]
+        return [(name, total, count) for name, (total, count) in ranked]
+
+    def dump(self, label=None):
+        """
+        写出当前收集的事件并清空
+        :param label: 文件名后缀，默认按序号
+        :return: 文件路径，没有事件时返回 None
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            threads = dict(self._threads)
+        if not events:
+            return None
+        self._dumps += 1
+        metadata = [{"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": "game_automation"}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                     for tid, name in threads.items()]
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"trace_{self._session}_{label or f'{self._dumps:03d}'}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        logger.info(f"时间线已写出: {path}（{len(events)} 个事件）")
+        for name, total, count in self.summary(events):
+            logger.info(f"  {name}: {total:.0f}ms / {count} 次")
+        return path
+
+
+def enable(output_dir=TRACE_DIR, time_source=None):
+    """开启追踪；:return: Tracer"""
+    global _tracer
+    _tracer = Tracer(output_dir, time_source)
+    logger.info(f"时间线追踪已开启，输出目录: {output_dir}")
+    return _tracer
+
+
+def disable():
+    global _tracer
+    _tracer = None
+
+
+def current():
+    """当前追踪器，未开启时为 None"""
+    return _tracer
+
+
+def span(name, category="", **args):
+    """
+    追踪一个区间，用作上下文管理器
+    :param args: 附加到事件上的参数，仅在开启时保存
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, args)
+
+
+def instant(name, category="", **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.instant(name, category, args)
+
+
+def traced(category, name=None):
+    """
+    方法装饰器：每次调用记录一个区间，区间名默认为 类名.方法名
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def dump(label=None):
+    """写出本局追踪文件，未开启时不做任何事"""
+    tracer = _tracer
+    return tracer.dump(label) if tracer is not None else None
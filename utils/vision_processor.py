@@ -1,11 +1,62 @@
+import threading
 import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 
-from paddleocr import PaddleOCR
 import numpy as np
-from PIL import ImageGrab,Image
-import cv2
+from PIL import Image
 from loguru import logger
 
+from utils import clock, layout, startup_timer, tracer
+from utils.clock_reader import ClockReader
+from utils.frame_source import ScreenFrameSource, region_signature, signature_distance
+from utils.lazy_import import lazy_module
+from utils.ocr_cache import OCRResultCache
+from utils.ocr_service import OCRService, OCRServiceError
+from utils.state_manager import StateManager
+from utils.template_registry import TemplateRegistry, build_pyramid
+from utils.text_matcher import compile_matcher
+
+cv2 = lazy_module("cv2")
+
+
+def _load_ocr(workers, future):
+    """
+    加载 OCR 引擎并做一次空推理，完成后设置就绪 Future
+    多进程模式下引擎为 OCRService，空推理由各工作进程自行完成
+    """
+    try:
+        if workers > 0:
+            # OpenCV 导入过程中会临时改写 sys.path，先等其导入完成再创建子进程，
+            # 否则子进程可能继承被改写的 sys.path
+            cv2.load()
+            ocr = OCRService(workers=workers).ready.result()
+            startup_timer.mark("ocr_ready")
+        else:
+            from paddleocr import PaddleOCR
+            ocr = PaddleOCR(use_angle_cls=True, lang="ch")
+            startup_timer.mark("ocr_ready")
+            ocr.ocr(np.zeros((48, 160, 3), dtype=np.uint8), cls=True)
+        logger.info("OCR引擎初始化完成")
+        startup_timer.mark("first_inference")
+        startup_timer.report()
+        future.set_result(ocr)
+    except Exception as e:
+        logger.exception(f"OCR引擎初始化失败: {e}")
+        future.set_exception(e)
+
+
+def start_ocr_warm_up(workers=1):
+    """
+    在后台线程中加载 OCR 引擎，可在创建 VisionProcess 之前调用（如显示配置窗口前），
+    把返回的 Future 作为 ocr_engine 传入
+    :param workers: OCR 工作进程数，0 表示在本进程内加载
+    :return: 引擎就绪后完成的 Future
+    """
+    future = Future()
+    threading.Thread(target=_load_ocr, args=(workers, future), name="ocr-warmup", daemon=True).start()
+    return future
+
 
 class SingletonMeta(type):
     """
@@ -20,12 +71,187 @@ class SingletonMeta(type):
 
 
 class VisionProcess(metaclass=SingletonMeta):
-    def __init__(self):
-        # 初始化OCR引擎
-        self.ocr = PaddleOCR(use_angle_cls=True, lang="ch")
-        logger.info("OCR引擎初始化完成")
+    # 批量 OCR 时拼块之间的黑色间隔（像素）
+    TILE_GAP = 16
+    # 仅识别模式下直接采信识别结果的最低置信度
+    REC_ONLY_MIN_CONFIDENCE = 0.8
+    # 金字塔匹配：粗匹配保留的候选数、粗匹配分数相对阈值的放宽量、精匹配时候选周围额外搜索的像素
+    PYRAMID_CANDIDATES = 3
+    PYRAMID_COARSE_SLACK = 0.25
+    PYRAMID_MARGIN = 2
+    # OCR 工作进程意外退出后最多重建的次数，超过后把失败抛给调用方
+    OCR_MAX_RESTARTS = 2
+
+    def __init__(self, frame_source=None, settle_delay=0.5, template_registry=None, ocr_cache=None,
+                 clock_reader=None, poll_interval=0.1, change_threshold=2.0, ocr_workers=1,
+                 pyramid_match=True, ocr_engine=None):
+        """
+        :param frame_source: 帧源，默认截取桌面游戏区域；测试时可传入 FileFrameSource
+        :param settle_delay: 未锁定帧时，每次查询前等待画面稳定的秒数
+        :param template_registry: 模板注册表，默认加载 images/ 下全部模板
+        :param ocr_cache: OCR 结果缓存，画面未变化的区域直接复用上次结果
+        :param clock_reader: 游戏时钟快速读取器，置信度不足时才回退到 OCR
+        :param poll_interval: wait_for_* 系列方法的采样间隔（秒）
+        :param change_threshold: 判定区域变化的平均灰度差（0~255）
+        :param ocr_workers: OCR 工作进程数；为 0 时在本进程内运行 PaddleOCR
+        :param pyramid_match: 模板匹配先在灰度金字塔上粗匹配再局部精匹配；False 时全分辨率彩色匹配
+        :param ocr_engine: 直接使用的 OCR 引擎（接口同 PaddleOCR.ocr，如模拟器引擎），或 start_ocr_warm_up
+                           返回的 Future；提供时不再另行加载 PaddleOCR
+        """
+        # 在后台初始化OCR引擎，首次需要 OCR 时才等待就绪
+        self.ocr_workers = ocr_workers
+        self._ocr_restart_lock = threading.Lock()
+        self._ocr_restarts = 0
+        if isinstance(ocr_engine, Future):
+            self._ocr_future = ocr_engine
+        elif ocr_engine is not None:
+            self._ocr_future = Future()
+            self._ocr_future.set_result(ocr_engine)
+        else:
+            self._ocr_future = start_ocr_warm_up(ocr_workers)
+        self.frame_source = frame_source if frame_source is not None else ScreenFrameSource()
+        self.settle_delay = settle_delay
+        self._engine_lock = threading.Lock()  # 进程内引擎不支持多线程同时推理
+        self._local = threading.local()  # snapshot() 锁定的帧按线程保存，感知线程与动作线程互不影响
+        self.templates = template_registry if template_registry is not None else TemplateRegistry()
+        self.ocr_cache = ocr_cache if ocr_cache is not None else OCRResultCache()
+        self.clock_reader = clock_reader if clock_reader is not None else ClockReader()
+        self.poll_interval = poll_interval
+        self.change_threshold = change_threshold
+        self.state_mgr = StateManager()  # wait_for_* 的采样间隔可被暂停与停止打断
+        self.pyramid_match = pyramid_match
+
+    @property
+    def _held_frame(self):
+        return getattr(self._local, "frame", None)
+
+    @_held_frame.setter
+    def _held_frame(self, frame):
+        self._local.frame = frame
+
+    @property
+    def ocr_ready(self):
+        """OCR 引擎是否已就绪"""
+        return self._ocr_future.done()
+
+    @property
+    def ocr(self):
+        """OCR 引擎，尚未就绪时阻塞等待后台加载完成；工作进程已失败时重建进程池"""
+        if not self._ocr_future.done():
+            logger.info("等待 OCR 引擎就绪...")
+        engine = self._ocr_future.result()
+        if isinstance(engine, OCRService) and engine.failed is not None:
+            engine = self._restart_ocr(engine)
+        return engine
+
+    def _restart_ocr(self, failed_engine):
+        """
+        关闭失败的 OCRService 并在调用线程中重建，其他线程同时发现失败时只重建一次
+        超过 OCR_MAX_RESTARTS 次后抛出 OCRServiceError，不再无限重试
+        """
+        with self._ocr_restart_lock:
+            if self._ocr_future.done() and self._ocr_future.exception() is None \
+                    and self._ocr_future.result() is not failed_engine:
+                return self._ocr_future.result()
+            if self._ocr_restarts >= self.OCR_MAX_RESTARTS:
+                raise OCRServiceError(f"OCR 服务已重建 {self._ocr_restarts} 次仍失败: {failed_engine.failed}")
+            self._ocr_restarts += 1
+            logger.warning(f"OCR 工作进程失败（{failed_engine.failed}），第 {self._ocr_restarts} 次重建")
+            failed_engine.close()
+            self._ocr_future = Future()
+            _load_ocr(self.ocr_workers, self._ocr_future)
+            return self._ocr_future.result()
+
+    def submit_ocr(self, image, **kwargs):
+        """
+        异步提交 OCR，返回 Future；可在推理进行时继续截图，实现截图与推理流水线
+        进程内引擎没有异步接口，此时同步执行并返回已完成的 Future
+        """
+        engine = self.ocr
+        if isinstance(engine, OCRService):
+            return engine.submit(image, **kwargs)
+        future = Future()
+        with self._engine_lock:
+            future.set_result(engine.ocr(np.ascontiguousarray(image), **kwargs))
+        return future
+
+    def close(self):
+        """释放 OCR 工作进程"""
+        if self._ocr_future.done() and self._ocr_future.exception() is None:
+            engine = self._ocr_future.result()
+            if isinstance(engine, OCRService):
+                engine.close()
+
+    def _run_ocr(self, image, query, **kwargs):
+        """
+        执行 OCR，区域像素与上次相同时直接返回缓存结果
+        :param image: RGB 图像
+        :param query: 查询标识（通常为区域坐标），与像素指纹共同组成缓存键
+        """
+        key = self.ocr_cache.make_key((query, tuple(sorted(kwargs.items()))), image)
+        hit, result = self.ocr_cache.get(key)
+        if hit:
+            logger.debug(f"OCR 缓存命中: {query}")
+            tracer.instant("ocr.cache_hit", "vision")
+            return result
+        engine = self.ocr
+        with tracer.span("ocr.rec" if kwargs.get("det", True) is False else "ocr", "vision"):
+            if isinstance(engine, OCRService):
+                result = engine.ocr(np.ascontiguousarray(image), **kwargs)
+            else:
+                with self._engine_lock:
+                    result = engine.ocr(np.ascontiguousarray(image), **kwargs)
+        self.ocr_cache.put(key, result)
+        return result
+
+    def ocr_cache_stats(self):
+        """OCR 缓存命中统计，可用于评估每局节省的推理次数"""
+        return self.ocr_cache.stats()
+
+    def refresh_frame(self):
+        """
+        立即抓取新的一帧；若当前处于 snapshot() 中，则锁定帧同时更新为新帧
+        :return: 新帧
+        """
+        frame = self.frame_source.refresh()
+        if self._held_frame is not None:
+            self._held_frame = frame
+        return frame
 
-    def find_text(self, text, x1, y1, x2, y2, threshold=0.6,save=False):
+    @contextmanager
+    def snapshot(self):
+        """
+        抓取一帧并在 with 块内锁定，块内所有查询共用这一帧，不再单独截图和等待
+        用法:
+            with vision.snapshot():
+                vision.get_run_time()
+                vision.find_text(...)
+        """
+        previous = self._held_frame
+        self._held_frame = self.frame_source.refresh()
+        try:
+            yield self._held_frame
+        finally:
+            self._held_frame = previous
+
+    def _current_frame(self, settle=True):
+        """锁定帧时返回锁定帧；否则等待画面稳定后抓取新帧"""
+        if self._held_frame is not None:
+            return self._held_frame
+        if settle and self.settle_delay > 0:
+            with tracer.span("settle", "vision"):
+                clock.sleep(self.settle_delay)
+        return self.frame_source.refresh()
+
+    def _capture_region(self, x1, y1, x2, y2, settle=True):
+        """
+        获取指定区域的图像视图（RGB）
+        锁定帧时直接从锁定帧中裁剪；否则等待画面稳定后抓取新帧再裁剪
+        """
+        return self.frame_source.crop(x1, y1, x2, y2, frame=self._current_frame(settle))
+
+    @tracer.traced("vision")
+    def find_text(self, text, x1, y1, x2, y2, threshold=0.6,save=False, rec_only=False, max_distance=0):
         """
         在指定区域内查找文本
         :param text: 要查找的文本
@@ -34,32 +260,112 @@ class VisionProcess(metaclass=SingletonMeta):
         :param x2: 区域右下角的 x 坐标
         :param y2: 区域右下角的 y 坐标
         :param threshold: 匹配阈值，范围从 0 到 1
-        :return: 匹配文本的中心坐标 (x, y) 和置信度，如果未找到则返回 (-1, -1, 0)
+        :param rec_only: 仅识别模式，适用于只有一行水平文字的紧凑按钮区域，
+                         跳过文本检测和方向分类，识别置信度不足时自动回退到完整流程
+        :param max_distance: 容忍的 OCR 错字数（编辑距离），默认要求精确包含
+        :return: 得分最高的匹配文本的中心坐标 (x, y) 和置信度，如果未找到则返回 (-1, -1, 0)
         """
         logger.debug(f"开始在区域 ({x1}, {y1}, {x2}, {y2}) 内查找文本: {text}")
-        time.sleep(0.5)
-        screenshot = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-        result = self.ocr.ocr(np.array(screenshot), cls=True)
+        screenshot = self._capture_region(x1, y1, x2, y2)
+        if rec_only:
+            found = self._recognize_line(text, screenshot, x1, y1, x2, y2)
+            if found is not None:
+                return found
+        result = self._run_ocr(screenshot, (x1, y1, x2, y2), cls=True)
         if result[0] is None:
             logger.info(f"未找到文本 {text}")
             if save:
-                screenshot.save(f"temp/{text}{int(time.time())}.png")
+                Image.fromarray(screenshot).save(f"temp/{text}{int(time.time())}.png")
             return -1, -1, 0
 
-        for line in result:
-            for box in line:
-                detected_text = box[1][0]
-                confidence = box[1][1]
-                if text in detected_text:# and confidence >= threshold:
-                    # 计算文本中心坐标
-                    coords = box[0]
-                    center_x = (coords[0][0] + coords[1][0] + coords[2][0] + coords[3][0]) / 4 + x1
-                    center_y = (coords[0][1] + coords[1][1] + coords[2][1] + coords[3][1]) / 4 + y1
-                    logger.info(f"找到文本 {text}，中心坐标: ({center_x}, {center_y})，置信度: {confidence}")
-                    return int(center_x), int(center_y), confidence
+        match = compile_matcher((text,), max_distance).match(self._ocr_items(result, x1, y1), threshold).get(text)
+        if match is not None:
+            logger.info(f"找到文本 {text}，中心坐标: ({match.x}, {match.y})，置信度: {match.confidence}")
+            return match.x, match.y, match.confidence
         logger.info(f"未找到符合条件的文本 {text},找到的内容为：{result}")
         return -1, -1, 0
 
+    @staticmethod
+    def _ocr_items(result, offset_x, offset_y):
+        """
+        把 PaddleOCR 结果转换为 [(中心 x, 中心 y, 文本, 置信度), ...]，坐标加上区域偏移
+        """
+        items = []
+        for line in result:
+            for coords, (detected_text, confidence) in line or []:
+                center_x = sum(pt[0] for pt in coords) / 4 + offset_x
+                center_y = sum(pt[1] for pt in coords) / 4 + offset_y
+                items.append((int(center_x), int(center_y), detected_text, confidence))
+        return items
+
+    def _recognize_line(self, text, screenshot, x1, y1, x2, y2):
+        """
+        把整个区域当作一行文字直接送入识别模型
+        :return: 识别结果可信时返回 (x, y, 置信度) 或 (-1, -1, 0)；不可信时返回 None，由调用方走完整流程
+        """
+        result = self._run_ocr(screenshot, (x1, y1, x2, y2), det=False, cls=False)
+        recognized, confidence = result[0][0] if result and result[0] else ("", 0.0)
+        if text in recognized and confidence >= self.REC_ONLY_MIN_CONFIDENCE:
+            center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
+            logger.info(f"找到文本 {text}（仅识别），中心坐标: ({center_x}, {center_y})，置信度: {confidence}")
+            return center_x, center_y, confidence
+        if not recognized.strip() or confidence >= self.REC_ONLY_MIN_CONFIDENCE:
+            logger.info(f"未找到文本 {text}（仅识别），识别内容为：{recognized}")
+            return -1, -1, 0
+        logger.debug(f"仅识别置信度不足 ({recognized}, {confidence:.2f})，回退到完整 OCR 流程")
+        return None
+
+    @tracer.traced("vision")
+    def find_texts(self, queries, threshold=0.6):
+        """
+        在多个区域中查找文本，所有区域拼接到同一张画布上只做一次 OCR
+        :param queries: [(文本, (x1, y1, x2, y2)), ...]，同一区域可对应多个文本
+        :param threshold: 匹配阈值，范围从 0 到 1
+        :return: 与 queries 一一对应的 [(x, y, 置信度), ...]，未找到为 (-1, -1, 0)
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        rois = list(dict.fromkeys(tuple(roi) for _, roi in queries))
+        logger.debug(f"批量查找文本: {[text for text, _ in queries]}")
+
+        # 各区域从同一帧裁剪，纵向拼接，中间用黑色间隔隔开避免文本框跨区域合并
+        frame = self._current_frame()
+        crops = [self.frame_source.crop(*roi, frame=frame) for roi in rois]
+        width = max(crop.shape[1] for crop in crops)
+        height = sum(crop.shape[0] for crop in crops) + self.TILE_GAP * (len(crops) - 1)
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        offsets = []
+        y = 0
+        for crop in crops:
+            canvas[y:y + crop.shape[0], :crop.shape[1]] = crop
+            offsets.append(y)
+            y += crop.shape[0] + self.TILE_GAP
+
+        result = self._run_ocr(canvas, ("batch",) + tuple(rois), cls=True)
+
+        # 按文本框中心所在的拼块把识别结果分回各区域，并换算为屏幕坐标
+        detected = {roi: [] for roi in rois}
+        for center_x, center_y, detected_text, confidence in self._ocr_items(result, 0, 0):
+            for roi, crop, offset in zip(rois, crops, offsets):
+                if offset <= center_y < offset + crop.shape[0]:
+                    detected[roi].append((center_x + roi[0], center_y - offset + roi[1],
+                                          detected_text, confidence))
+                    break
+
+        # 每个区域的全部查询文本编译为一个匹配器，一遍得出各文本的最佳命中
+        matches = {}
+        for roi in rois:
+            patterns = tuple(dict.fromkeys(text for text, q_roi in queries if tuple(q_roi) == roi))
+            matches[roi] = compile_matcher(patterns, 0).match(detected[roi], threshold)
+        found = []
+        for text, roi in queries:
+            match = matches[tuple(roi)].get(text)
+            found.append((match.x, match.y, match.confidence) if match else (-1, -1, 0))
+        logger.info(f"批量查找文本结果: {dict(zip([text for text, _ in queries], found))}")
+        return found
+
+    @tracer.traced("vision")
     def find_image(self, template_path, x1, y1, x2, y2, threshold=0.8,save=False):
         """
         在指定区域内查找图像并返回中心坐标
@@ -73,76 +379,307 @@ class VisionProcess(metaclass=SingletonMeta):
         """
         logger.debug(f"开始在区域 ({x1}, {y1}, {x2}, {y2}) 内查找图像: {template_path}")
         # 截取指定区域的屏幕截图
-        time.sleep(0.5)
-        screenshot = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-        screenshot = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        screenshot = self._capture_region(x1, y1, x2, y2)
+        screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
 
-        # 读取模板图像
-        template = cv2.imread(template_path, cv2.IMREAD_COLOR)
-
-        # 进行模板匹配
-        result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        # 从注册表取预加载的模板并进行模板匹配
+        template = self.templates.get(template_path)
+        with tracer.span("match", "vision"):
+            match = self._template_matcher(screenshot, [template], threshold)
+            max_val, center_x, center_y = match(template, x1, y1)
 
         if max_val >= threshold:
-            h, w, _ = template.shape
-            center_x = max_loc[0] + w // 2 + x1
-            center_y = max_loc[1] + h // 2 + y1
             logger.info(f"找到图像 {template_path}，中心坐标: ({center_x}, {center_y})")
             return center_x, center_y
         else:
             logger.info(f"未找到图像 {template_path}")
             return -1, -1
 
-    def get_run_time(self,x1=897,y1=0,x2=1015,y2=27, scale=2):
+    @tracer.traced("vision")
+    def find_images(self, templates, x1, y1, x2, y2, threshold=0.8):
         """
-        将输入的NumPy数组图像扩大，并用黑色填充边缘
+        在同一次截图中匹配多个模板
+        :param templates: 模板名称或路径列表
         :param x1: 区域左上角的 x 坐标
         :param y1: 区域左上角的 y 坐标
         :param x2: 区域右下角的 x 坐标
         :param y2: 区域右下角的 y 坐标
-        :param scale: 扩大倍数（默认2倍）
-        :return: 扩大后的图像（NumPy数组）
+        :param threshold: 匹配阈值，范围从 0 到 1
+        :return: {模板名称: (x, y, 匹配度)}，未达到阈值的模板坐标为 (-1, -1)
+        """
+        logger.debug(f"开始在区域 ({x1}, {y1}, {x2}, {y2}) 内查找图像: {list(templates)}")
+        screenshot = self._capture_region(x1, y1, x2, y2)
+        screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
+
+        templates = {name: self.templates.get(name) for name in templates}
+        hits = {}
+        with tracer.span("match", "vision"):
+            match = self._template_matcher(screenshot, templates.values(), threshold)
+            for name, template in templates.items():
+                max_val, center_x, center_y = match(template, x1, y1)
+                if max_val >= threshold:
+                    hits[name] = (center_x, center_y, max_val)
+                else:
+                    hits[name] = (-1, -1, max_val)
+        found = [name for name, hit in hits.items() if hit[0] > 0]
+        logger.info(f"图像匹配结果: {found if found else '无'}")
+        return hits
+
+    @tracer.traced("vision")
+    def find_all_images(self, templates, x1, y1, x2, y2, threshold=0.8):
+        """
+        在同一次截图中找出多个模板的全部出现位置，如物品栏中并排的多个物品（含同类物品）
+        :param templates: 模板名称或路径列表
+        :param threshold: 匹配阈值，范围从 0 到 1
+        :return: [(模板名称, x, y, 匹配度)]，按 x 坐标从左到右排列；同一位置只保留匹配度最高的模板
+        """
+        logger.debug(f"开始在区域 ({x1}, {y1}, {x2}, {y2}) 内查找全部图像: {list(templates)}")
+        screenshot = self._capture_region(x1, y1, x2, y2)
+        screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
+
+        candidates = []
+        with tracer.span("match", "vision"):
+            for name in templates:
+                template = self.templates.get(name)
+                if screenshot.shape[0] < template.height or screenshot.shape[1] < template.width:
+                    continue
+                result = cv2.matchTemplate(screenshot, template.bgr, cv2.TM_CCOEFF_NORMED)
+                half_w, half_h = template.width // 2, template.height // 2
+                while True:
+                    _, max_val, _, (mx, my) = cv2.minMaxLoc(result)
+                    if max_val < threshold:
+                        break
+                    candidates.append((name, mx + half_w + x1, my + half_h + y1, max_val, half_w, half_h))
+                    # 抑制该位置的邻域，下一次取到的是另一个物品
+                    result[max(0, my - half_h):my + half_h + 1, max(0, mx - half_w):mx + half_w + 1] = -1
+
+        found = []
+        for name, x, y, score, half_w, half_h in sorted(candidates, key=lambda c: -c[3]):
+            if all(abs(x - fx) > half_w or abs(y - fy) > half_h for _, fx, fy, _ in found):
+                found.append((name, x, y, score))
+        found.sort(key=lambda hit: hit[1])
+        logger.info(f"图像匹配结果: {[name for name, _, _, _ in found] if found else '无'}")
+        return found
+
+    @staticmethod
+    def _match_template(screenshot, template, x1, y1):
+        """
+        在 BGR 截图中匹配模板
+        :return: (匹配度, 中心 x, 中心 y)，坐标已换算为屏幕坐标
+        """
+        if screenshot.shape[0] < template.height or screenshot.shape[1] < template.width:
+            return 0.0, -1, -1
+        result = cv2.matchTemplate(screenshot, template.bgr, cv2.TM_CCOEFF_NORMED)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        center_x = max_loc[0] + template.width // 2 + x1
+        center_y = max_loc[1] + template.height // 2 + y1
+        return max_val, center_x, center_y
+
+    def _template_matcher(self, screenshot, templates, threshold):
+        """
+        为一次截图准备匹配函数；金字塔模式下截图的灰度金字塔只构建一次，供多个模板共用
+        :return: match(template, x1, y1) -> (匹配度, 中心 x, 中心 y)
+        """
+        if not self.pyramid_match:
+            return lambda template, x1, y1: self._match_template(screenshot, template, x1, y1)
+        levels = max(len(template.pyramid) for template in templates) - 1
+        pyramid = build_pyramid(cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY), levels)
+        return lambda template, x1, y1: self._match_template_pyramid(
+            screenshot, pyramid, template, x1, y1, threshold)
+
+    @classmethod
+    def _match_template_pyramid(cls, screenshot, pyramid, template, x1, y1, threshold):
+        """
+        粗到细模板匹配
+        先在金字塔最粗一层的灰度图上找出若干候选位置，再只在候选附近用原分辨率彩色图精匹配，
+        任一候选达到阈值即提前返回。精匹配与 _match_template 相同，因此匹配度和坐标与全分辨率匹配一致。
+        :param pyramid: 截图的灰度金字塔
+        :return: (匹配度, 中心 x, 中心 y)，没有候选达到阈值时返回候选中的最佳结果
+        """
+        level = min(len(pyramid), len(template.pyramid)) - 1
+        while level > 0 and (pyramid[level].shape[0] < template.pyramid[level].shape[0]
+                             or pyramid[level].shape[1] < template.pyramid[level].shape[1]):
+            level -= 1
+        if level == 0:
+            return cls._match_template(screenshot, template, x1, y1)
+
+        coarse = cv2.matchTemplate(pyramid[level], template.pyramid[level], cv2.TM_CCOEFF_NORMED)
+        scale = 1 << level
+        margin = scale + cls.PYRAMID_MARGIN
+        suppress = max(template.pyramid[level].shape[:2]) // 2
+        height, width = screenshot.shape[:2]
+        best = (0.0, -1, -1)
+        for _ in range(cls.PYRAMID_CANDIDATES):
+            _, coarse_val, _, (cx, cy) = cv2.minMaxLoc(coarse)
+            if coarse_val < threshold - cls.PYRAMID_COARSE_SLACK:
+                break
+            # 抑制该候选的邻域，下一次取到的是另一个位置
+            coarse[max(0, cy - suppress):cy + suppress + 1, max(0, cx - suppress):cx + suppress + 1] = -1
+
+            left, top = max(0, cx * scale - margin), max(0, cy * scale - margin)
+            right = min(width, cx * scale + template.width + margin)
+            bottom = min(height, cy * scale + template.height + margin)
+            candidate = cls._match_template(screenshot[top:bottom, left:right], template, x1 + left, y1 + top)
+            if candidate[0] > best[0]:
+                best = candidate
+            if best[0] >= threshold:
+                break
+        return best
+
+    def _poll(self, x1, y1, x2, y2, check, timeout, poll_interval, on_change_only=True):
+        """
+        按采样间隔持续抓帧，区域签名相对上次检查发生变化时才调用 check
+        :param check: 在锁定帧内调用的检查函数，返回 (结果, 是否完成)
+        :param timeout: 超时秒数，None 表示一直等待
+        :return: (结果, 是否完成)
+        """
+        poll_interval = self.poll_interval if poll_interval is None else poll_interval
+        deadline = None if timeout is None else clock.now() + timeout
+        checked_signature = None
+        result = None
+        while True:
+            with self.snapshot() as frame:
+                signature = region_signature(self.frame_source.crop(x1, y1, x2, y2, frame=frame))
+                if (not on_change_only or checked_signature is None
+                        or signature_distance(signature, checked_signature) > self.change_threshold):
+                    checked_signature = signature
+                    result, done = check(signature)
+                    if done:
+                        return result, True
+            if deadline is not None and clock.now() >= deadline:
+                return result, False
+            self.state_mgr.sleep(poll_interval)
+
+    @tracer.traced("vision")
+    def wait_for_text(self, text, x1, y1, x2, y2, timeout=None, poll_interval=None, rec_only=False):
         """
-        # 1. 将NumPy数组转为PIL图像
+        等待文本出现在指定区域，画面变化后才重新 OCR
+        :param timeout: 超时秒数，None 表示一直等待
+        :param poll_interval: 采样间隔，默认使用 self.poll_interval
+        :return: 同 find_text，超时返回 (-1, -1, 0)
+        """
+        logger.debug(f"等待文本 {text} 出现在区域 ({x1}, {y1}, {x2}, {y2})，超时 {timeout}")
+
+        def check(_):
+            found = self.find_text(text, x1, y1, x2, y2, rec_only=rec_only)
+            return found, found[0] > 0
+
+        found, done = self._poll(x1, y1, x2, y2, check, timeout, poll_interval)
+        return found if done else (-1, -1, 0)
+
+    @tracer.traced("vision")
+    def wait_for_image(self, template_path, x1, y1, x2, y2, timeout=None, poll_interval=None, threshold=0.8):
+        """
+        等待图像出现在指定区域，画面变化后才重新匹配
+        :return: 同 find_image，超时返回 (-1, -1)
+        """
+        logger.debug(f"等待图像 {template_path} 出现在区域 ({x1}, {y1}, {x2}, {y2})，超时 {timeout}")
+
+        def check(_):
+            found = self.find_image(template_path, x1, y1, x2, y2, threshold=threshold)
+            return found, found[0] > 0
+
+        found, done = self._poll(x1, y1, x2, y2, check, timeout, poll_interval)
+        return found if done else (-1, -1)
+
+    def capture_signature(self, x1, y1, x2, y2):
+        """立即抓取区域签名，可作为 wait_for_region_change 的基准"""
+        return region_signature(self._capture_region(x1, y1, x2, y2, settle=False))
+
+    @tracer.traced("vision")
+    def wait_for_region_change(self, x1, y1, x2, y2, timeout=None, poll_interval=None, baseline=None):
+        """
+        等待区域画面相对基准发生变化
+        :param baseline: 基准签名（capture_signature 的返回值），默认取调用时的画面
+        :return: 是否在超时前发生变化
+        """
+        if baseline is None:
+            baseline = self.capture_signature(x1, y1, x2, y2)
+
+        def check(signature):
+            return None, signature_distance(signature, baseline) > self.change_threshold
+
+        return self._poll(x1, y1, x2, y2, check, timeout, poll_interval, on_change_only=False)[1]
+
+    @tracer.traced("vision")
+    def wait_for_region_stable(self, x1, y1, x2, y2, stable_time=1.0, timeout=None, poll_interval=None):
+        """
+        等待区域画面在 stable_time 秒内不再变化（如弹窗动画、列表加载结束）
+        :return: 是否在超时前稳定
+        """
+        state = {"signature": None, "since": clock.now()}
+
+        def check(signature):
+            if signature_distance(signature, state["signature"]) > self.change_threshold:
+                state["signature"] = signature
+                state["since"] = clock.now()
+            return None, clock.now() - state["since"] >= stable_time
+
+        return self._poll(x1, y1, x2, y2, check, timeout, poll_interval, on_change_only=False)[1]
+
+    @tracer.traced("vision")
+    def get_run_time(self, x1=None, y1=None, x2=None, y2=None, scale=2):
+        """
+        读取游戏运行时间
+        优先使用字形模板快速读取；置信度不足时将区域扩大并用黑色填充边缘后交给 OCR，
+        OCR 读出的结果同时用于学习字形
+        :param x1: 区域左上角的 x 坐标，默认使用布局中的时钟区域
+        :param y1: 区域左上角的 y 坐标
+        :param x2: 区域右下角的 x 坐标
+        :param y2: 区域右下角的 y 坐标
+        :param scale: OCR 回退时的扩大倍数（默认2倍）
+        :return: (时间文本, 总秒数)，未识别时返回 (0, 60)
+        """
+        if x1 is None:
+            x1, y1, x2, y2 = layout.current().region("common.clock")
+        result = None
         try:
-            time.sleep(0.5)
-            img = ImageGrab.grab(bbox=(x1, y1, x2, y2))
+            # 1. 截取时间区域
+            img = self._capture_region(x1, y1, x2, y2)
 
-            # 2. 原始尺寸
-            original_width, original_height = img.size
+            # 2. 字形模板快速读取
+            with tracer.span("clock.read", "vision"):
+                run_time, run_time_sec, confidence = self.clock_reader.read(img)
+            if run_time is not None and confidence >= self.clock_reader.min_confidence:
+                return run_time, run_time_sec
 
-            # 3. 新尺寸
+            # 3. 原始尺寸
+            original_height, original_width = img.shape[:2]
+
+            # 4. 新尺寸
             new_width = int(original_width * scale)
             new_height = int(original_height * scale)
 
-            # 4. 创建黑色背景的新图像
-            expanded_img = Image.new("RGB", (new_width, new_height), (0, 0, 0))
+            # 5. 创建黑色背景的新图像
+            expanded_img = np.zeros((new_height, new_width, 3), dtype=np.uint8)
 
-            # 5. 计算居中位置并粘贴
+            # 6. 计算居中位置并粘贴
             paste_x = (new_width - original_width) // 2
             paste_y = (new_height - original_height) // 2
-            expanded_img.paste(img, (paste_x, paste_y))
-            result = self.ocr.ocr(np.array(expanded_img), cls=True)
+            expanded_img[paste_y:paste_y + original_height, paste_x:paste_x + original_width] = img
+            result = self._run_ocr(expanded_img, ("run_time", x1, y1, x2, y2, scale), cls=True)
             if result[0] is None or (":" not in result[0][0][1][0]):
                 logger.info(f"未找到当前运行时间")
                 return 0, 60
-            minutes, seconds = map(int, result[0][0][1][0].split(':'))
-            return result[0][0][1][0], minutes * 60 + seconds
+            run_time = result[0][0][1][0]
+            minutes, seconds = map(int, run_time.split(':'))
+            if not self.clock_reader.ready:
+                self.clock_reader.learn(img, run_time, result[0][0][1][1])
+            return run_time, minutes * 60 + seconds
         except Exception as e:
             logger.error(f"Error in get_current_time: {e}\n,{result}")
             return 0, 60
 
-    def get_all_coordinates_and_text(self,x1, y1, x2, y2):
-        screenshot = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-        result = self.ocr.ocr(np.array(screenshot), cls=True)
-        output = []
-
-        for line in result[0]:
-            box, (text, _) = line
-            x_coords = [pt[0] for pt in box]
-            y_coords = [pt[1] for pt in box]
-            center_x = int(sum(x_coords) / 4) + x1  # 加上偏移量
-            center_y = int(sum(y_coords) / 4) + y1
-            output.append((center_x, center_y, text))
-        return output
+    @tracer.traced("vision")
+    def get_all_coordinates_and_text(self,x1, y1, x2, y2, with_confidence=False):
+        """
+        识别区域内全部文本
+        :param with_confidence: 为 True 时每项附带置信度
+        :return: [(x, y, 文本)] 或 [(x, y, 文本, 置信度)]，坐标为屏幕坐标
+        """
+        screenshot = self._capture_region(x1, y1, x2, y2, settle=False)
+        result = self._run_ocr(screenshot, (x1, y1, x2, y2), cls=True)
+        items = self._ocr_items(result, x1, y1)
+        if with_confidence:
+            return items
+        return [(center_x, center_y, text) for center_x, center_y, text, _ in items]